@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Locally maintained OANDA account state
+Loads the full account once, then applies deltas from the /changes endpoint
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Price-dependent fields reported in the /changes 'state' block
+ACCOUNT_STATE_FIELDS = (
+    'unrealizedPL', 'NAV', 'marginUsed', 'marginAvailable', 'positionValue',
+    'marginCloseoutUnrealizedPL', 'marginCloseoutNAV', 'marginCloseoutMarginUsed',
+    'marginCloseoutPercent', 'marginCloseoutPositionValue', 'withdrawalLimit',
+    'marginCallMarginUsed', 'marginCallPercent'
+)
+
+
+def realized_pl(transaction: Dict) -> Optional[float]:
+    """Realized PL of an ORDER_FILL that closed or reduced trades, else None"""
+    if transaction.get('type') != 'ORDER_FILL':
+        return None
+    if not transaction.get('tradesClosed') and not transaction.get('tradeReduced'):
+        return None
+    return float(transaction.get('pl', 0.0))
+
+
+def r_multiple(entry: float, exit: float, stop: float, units: float) -> Optional[float]:
+    """
+    Trade result in multiples of its own risk (entry to stop loss)
+
+    Price moves stand in for PnL / amount risked: both are the trade's
+    units times a price distance, so the units and the currency
+    conversion cancel. None for a trade without a stop.
+    """
+    risk = abs(entry - stop)
+    if not risk:
+        return None
+    return (exit - entry) * (1 if units > 0 else -1) / risk
+
+
+def closed_trade_outcome(trade: Dict) -> Optional[float]:
+    """R multiple of a closed OANDA Trade from its fill prices and stop loss order"""
+    stop = (trade.get('stopLossOrder') or {}).get('price')
+    if stop is None or trade.get('averageClosePrice') is None:
+        return None
+    return r_multiple(float(trade['price']), float(trade['averageClosePrice']),
+                      float(stop), float(trade['initialUnits']))
+
+
+class AccountModel:
+    """Account, positions, trades and orders kept up to date by transaction ID"""
+
+    def __init__(self, transport, base_url: str, account_id: str,
+                 on_fill: Optional[Callable[[Dict], None]] = None):
+        """
+        Initialize the model
+
+        Args:
+            transport: OandaTransport used for REST calls
+            base_url: REST API base URL
+            account_id: OANDA account ID
+            on_fill: Called with every ORDER_FILL transaction that realizes PL
+        """
+        self.transport = transport
+        self.url = f"{base_url}/v3/accounts/{account_id}"
+        self.on_fill = on_fill
+
+        self.account: Dict = {}
+        self.positions: Dict[str, Dict] = {}
+        self.trades: Dict[str, Dict] = {}
+        self.orders: Dict[str, Dict] = {}
+        self.last_transaction_id: Optional[str] = None
+
+        self.loaded = False
+        self.stale = True
+        self.full_loads = 0
+        self.delta_refreshes = 0
+        self._lock = threading.Lock()
+
+    def mark_stale(self):
+        """Force the next refresh() to poll for changes"""
+        self.stale = True
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the model up to date
+
+        The first call loads the full account; later calls only fetch the
+        changes since the last transaction ID. Does nothing unless the model
+        was marked stale or force is set.
+        """
+        with self._lock:
+            if not (self.stale or force or not self.loaded):
+                return True
+            ok = self._poll_changes() if self.loaded else self._load()
+            if ok:
+                self.stale = False
+            return ok
+
+    def _load(self) -> bool:
+        response = self.transport.get(self.url, endpoint='account')
+        if response.status_code != 200:
+            logger.error(f"Failed to load account: {response.text}")
+            return False
+
+        data = response.json()
+        account = dict(data['account'])
+        self.positions = {p['instrument']: p for p in account.pop('positions', [])}
+        self.trades = {t['id']: t for t in account.pop('trades', [])}
+        self.orders = {o['id']: o for o in account.pop('orders', [])}
+        self.account = account
+        self.last_transaction_id = data.get('lastTransactionID', account.get('lastTransactionID'))
+        self.loaded = True
+        self.full_loads += 1
+        return True
+
+    def _poll_changes(self) -> bool:
+        params = {'sinceTransactionID': self.last_transaction_id}
+        response = self.transport.get(f"{self.url}/changes", endpoint='changes', params=params)
+        if response.status_code != 200:
+            # Typically the transaction ID is too old - start over from a full load, but
+            # first pass on fills from the gap, which the full load does not report
+            logger.warning(f"Account changes unavailable ({response.status_code}), reloading account")
+            since = self.last_transaction_id
+            replayed = self._replay_transactions(since)
+            self.loaded = False
+            if not self._load():
+                return False
+            if not replayed and self.last_transaction_id != since:
+                logger.warning(f"Fills in transactions {int(since) + 1}-{self.last_transaction_id} "
+                               f"may not have been recorded")
+            return True
+
+        data = response.json()
+        self.apply_changes(data.get('changes', {}))
+        self.apply_state(data.get('state', {}))
+        self.last_transaction_id = data['lastTransactionID']
+        self.account['lastTransactionID'] = self.last_transaction_id
+        self.delta_refreshes += 1
+        return True
+
+    def _replay_transactions(self, since: str) -> bool:
+        """Pass every transaction after since through on_fill; False if any page failed"""
+        if self.on_fill is None:
+            return True
+        while True:
+            response = self.transport.get(f"{self.url}/transactions/sinceid", endpoint='transactions',
+                                          params={'id': since})
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch transactions since {since}: {response.text}")
+                return False
+            data = response.json()
+            transactions = data.get('transactions', [])
+            for transaction in transactions:
+                if realized_pl(transaction) is not None:
+                    self.on_fill(transaction)
+            # Pages are capped at 1000 transactions
+            if not transactions or transactions[-1]['id'] == data.get('lastTransactionID'):
+                return True
+            since = transactions[-1]['id']
+
+    def apply_changes(self, changes: Dict):
+        """Apply an AccountChanges object"""
+        for order in changes.get('ordersCreated', []):
+            self.orders[order['id']] = order
+        for key in ('ordersCancelled', 'ordersFilled', 'ordersTriggered'):
+            for order in changes.get(key, []):
+                self.orders.pop(order['id'], None)
+
+        for trade in changes.get('tradesOpened', []) + changes.get('tradesReduced', []):
+            self.trades[trade['id']] = trade
+        for trade in changes.get('tradesClosed', []):
+            self.trades.pop(trade['id'], None)
+
+        for position in changes.get('positions', []):
+            self.positions[position['instrument']] = position
+
+        for transaction in changes.get('transactions', []):
+            if 'accountBalance' in transaction:
+                self.account['balance'] = transaction['accountBalance']
+            if self.on_fill is not None and realized_pl(transaction) is not None:
+                self.on_fill(transaction)
+
+    def apply_state(self, state: Dict):
+        """Apply an AccountChangesState object (price-dependent values)"""
+        for field in ACCOUNT_STATE_FIELDS:
+            if field in state:
+                self.account[field] = state[field]
+
+        for position_state in state.get('positions', []):
+            position = self.positions.get(position_state['instrument'])
+            if position is None:
+                continue
+            position['unrealizedPL'] = position_state.get('netUnrealizedPL', position.get('unrealizedPL'))
+            for side in ('long', 'short'):
+                if side in position and f'{side}UnrealizedPL' in position_state:
+                    position[side]['unrealizedPL'] = position_state[f'{side}UnrealizedPL']
+
+        for trade_state in state.get('trades', []):
+            trade = self.trades.get(trade_state['id'])
+            if trade is not None:
+                trade.update(trade_state)
+
+    def summary(self) -> Optional[Dict]:
+        """Account summary in the same shape as GET /summary"""
+        if not self.loaded:
+            return None
+        account = dict(self.account)
+        account['openTradeCount'] = len(self.trades)
+        account['pendingOrderCount'] = len(self.orders)
+        return {'account': account, 'lastTransactionID': self.last_transaction_id}
+
+    def open_positions(self) -> List[Dict]:
+        """Positions with units on either side, in the same shape as GET /openPositions"""
+        return [p for p in self.positions.values()
+                if float(p['long']['units']) or float(p['short']['units'])]
+
+    def pending_orders(self) -> List[Dict]:
+        """Orders in the same shape as GET /pendingOrders"""
+        return list(self.orders.values())
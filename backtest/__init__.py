@@ -0,0 +1,9 @@
+"""
+Backtesting
+Vectorized strategy signals and a NumPy stop-loss / take-profit engine
+"""
+
+from backtest.engine import DEFAULT_BACKTEST_CONFIG, BacktestResult, Backtester
+from backtest.strategies import STRATEGY_VOTES, Signals, algorithm_signals, strategy_signals
+from backtest.sweep import ParameterSweep, SharedCandles, parameter_grid
+from backtest.walk_forward import WalkForward, WalkForwardResult
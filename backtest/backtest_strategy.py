@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Backtest a strategy on stored candles
+Usage: python backtest/backtest_strategy.py --start 2024-01-01 --end 2024-12-31
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_codec import decode_candles, ns_to_rfc3339
+from candle_store import CandleStore, frame_to_records, to_ns
+from backtest.engine import DEFAULT_BACKTEST_CONFIG, Backtester, pip_size
+from backtest.strategies import STRATEGY_VOTES, algorithm_signals, strategy_signals
+
+logger = logging.getLogger(__name__)
+
+
+def download_history(store: CandleStore, config: dict, instrument: str, granularity: str,
+                     start: str, end: str) -> int:
+    """Append candles from the newest stored one (or start) up to end to the store"""
+    base_url = "https://api-fxpractice.oanda.com" if config.get('practice', True) \
+        else "https://api-fxtrade.oanda.com"
+    session = requests.Session()
+    session.headers.update({'Authorization': f"Bearer {config['access_token']}",
+                            'Accept-Encoding': 'gzip'})
+    url = f"{base_url}/v3/instruments/{instrument}/candles"
+    end_ns = to_ns(end)
+
+    appended = 0
+    while True:
+        last = store.last_time(instrument, granularity)
+        params = {'granularity': granularity, 'price': 'M', 'count': 5000}
+        if last is None:
+            params['from'] = str(ns_to_rfc3339([to_ns(start)])[0])
+        else:
+            if last >= end_ns:
+                break
+            params['from'] = str(ns_to_rfc3339([last])[0])
+            params['includeFirst'] = 'false'
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        frame = decode_candles(response.content)
+        added = store.append(instrument, granularity, frame_to_records(frame.completed()))
+        appended += added
+        if len(frame) < 5000 or added == 0:
+            break
+    return appended
+
+
+def run_event_driven(args, config: dict, store: CandleStore, instruments: list):
+    """Replay all instruments through ForexTradingBot.run() on one simulated account"""
+    from local_oanda import CandleMarket
+    from trading_algorithms import AlgorithmFactory
+    from backtest.event_driven import EventDrivenBacktest
+
+    for instrument in instruments:
+        if args.download:
+            added = download_history(store, config, instrument, args.granularity, args.start, args.end)
+            logger.info(f"Downloaded {added} {args.granularity} candles for {instrument}")
+
+    market = CandleMarket.from_store(store, instruments, args.granularity)
+    market.spreads = {i: args.spread_pips * pip_size(i) for i in instruments}
+
+    def configure(bot):
+        bot.algorithm_name = args.algorithm
+        bot.algorithm = AlgorithmFactory.create_algorithm(args.algorithm, bot.algorithm_config)
+        bot.risk_config['max_risk_per_trade'] = args.risk
+
+    backtest = EventDrivenBacktest(market, {'initial_balance': args.balance, 'instruments': instruments})
+    result = backtest.run(to_ns(args.start), to_ns(args.end), configure)
+    logger.info(f"{result.summary()} ({backtest.cycles:,} cycles, {backtest.requests:,} requests "
+                f"in {backtest.elapsed:.1f}s, {backtest.cycles / max(backtest.elapsed, 1e-9):,.0f} cycles/s)")
+    name = f"live_{args.algorithm}_{'-'.join(instruments)}_{args.start}_{args.end}"
+    prefix = result.save(args.output, name)
+    logger.info(f"Results written to {prefix}_*")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest a strategy on stored candles')
+    parser.add_argument('--start', required=True, help='First candle time (e.g. 2024-01-01)')
+    parser.add_argument('--end', required=True, help='End time, exclusive')
+    parser.add_argument('--instruments', default=None, help='Comma-separated (default: config instruments)')
+    parser.add_argument('--granularity', default='M5')
+    parser.add_argument('--algorithm', default='hybrid', choices=sorted(STRATEGY_VOTES))
+    parser.add_argument('--config', default='config.json', help='Bot configuration (algorithm settings)')
+    parser.add_argument('--store-dir', default='data/candles')
+    parser.add_argument('--download', action='store_true', help='Fetch missing candles from OANDA first')
+    parser.add_argument('--exact', action='store_true',
+                        help="Signals from the algorithm's own analyze() per bar (slow)")
+    parser.add_argument('--window', type=int, default=200, help='Candles passed to analyze() with --exact')
+    parser.add_argument('--event-driven', action='store_true',
+                        help="Run the bot's own trading loop against a simulated broker and clock")
+    parser.add_argument('--balance', type=float, default=DEFAULT_BACKTEST_CONFIG['initial_balance'])
+    parser.add_argument('--risk', type=float, default=DEFAULT_BACKTEST_CONFIG['risk_per_trade'])
+    parser.add_argument('--spread-pips', type=float, default=DEFAULT_BACKTEST_CONFIG['spread_pips'])
+    parser.add_argument('--max-bars', type=int, default=DEFAULT_BACKTEST_CONFIG['max_bars'])
+    parser.add_argument('--output', default='backtest/results')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config) as f:
+            config = json.load(f)
+    algorithm_config = config.get('algorithm', {})
+    instruments = (args.instruments.split(',') if args.instruments
+                   else config.get('trading', {}).get('instruments', ['EUR_USD']))
+
+    store = CandleStore(args.store_dir)
+    backtester = Backtester({'initial_balance': args.balance, 'risk_per_trade': args.risk,
+                             'spread_pips': args.spread_pips, 'max_bars': args.max_bars})
+
+    algorithm = None
+    if args.exact:
+        from trading_algorithms import AlgorithmFactory
+        algorithm = AlgorithmFactory.create_algorithm(args.algorithm, algorithm_config)
+
+    if args.event_driven:
+        run_event_driven(args, config, store, instruments)
+        return
+
+    for instrument in instruments:
+        if args.download:
+            added = download_history(store, config, instrument, args.granularity, args.start, args.end)
+            logger.info(f"Downloaded {added} {args.granularity} candles for {instrument}")
+
+        df = store.read_frame(instrument, args.granularity, args.start, args.end)
+        if df.empty:
+            logger.error(f"No stored {args.granularity} candles for {instrument} in {args.start} - {args.end}"
+                         f" (use --download)")
+            continue
+
+        start = time.perf_counter()
+        if algorithm is not None:
+            signals = algorithm_signals(algorithm, df, args.window)
+        else:
+            signals = strategy_signals(args.algorithm, df, algorithm_config)
+        result = backtester.run(df, signals, instrument)
+        elapsed = time.perf_counter() - start
+
+        logger.info(f"{result.summary()} ({len(df):,} candles in {elapsed:.2f}s)")
+        name = f"{args.algorithm}_{instrument}_{args.granularity}_{args.start}_{args.end}"
+        prefix = result.save(args.output, name)
+        logger.info(f"Results written to {prefix}_*")
+
+
+if __name__ == "__main__":
+    main()
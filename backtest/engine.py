@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtest engine
+Stop-loss / take-profit exits over per-bar entry signals, scanned with NumPy
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candle_codec import rfc3339_to_ns
+from backtest.strategies import Signals, strategy_signals
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKTEST_CONFIG = {
+    'initial_balance': 10000.0,
+    'risk_per_trade': 0.01,     # Equity fraction lost at the stop (0 = fixed units)
+    'units': 1000,              # Units per trade when risk_per_trade is 0
+    'min_units': 100,           # Smaller positions are skipped, as in the bot
+    'spread_pips': 1.0,         # Bid/ask spread; half is paid on entry and half on exit
+    'max_bars': 0,              # Close trades after this many bars (0 = no limit)
+    'exit_on_reverse': True,    # Close (and reverse) on an opposite signal
+    'account_currency': 'USD'
+}
+
+TRADE_COLUMNS = ['entry_time', 'exit_time', 'direction', 'units', 'entry_price', 'exit_price',
+                 'stop_loss', 'take_profit', 'bars', 'pnl', 'balance', 'reason']
+
+
+def pip_size(instrument: str) -> float:
+    return 0.01 if instrument.endswith('JPY') else 0.0001
+
+
+def account_factor(instrument: str, account_currency: str, price: np.ndarray) -> np.ndarray:
+    """
+    Multiplier converting quote-currency amounts to the account currency
+
+    Exact when the account currency is the quote or the base currency;
+    crosses are left in their quote currency.
+    """
+    base, _, quote = instrument.partition('_')
+    if base == account_currency:
+        return 1.0 / price
+    return np.ones_like(price, dtype=np.float64)
+
+
+class BacktestResult:
+    """Trade list, mark-to-market equity curve and summary statistics"""
+
+    def __init__(self, instrument: str, trades: pd.DataFrame, equity: pd.Series, initial_balance: float):
+        self.instrument = instrument
+        self.trades = trades
+        self.equity = equity
+        self.initial_balance = initial_balance
+        self.stats = self._stats()
+
+    def _stats(self) -> Dict:
+        pnl = self.trades['pnl'].values
+        wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+        equity = self.equity.values
+        drawdown = 1 - equity / np.maximum.accumulate(equity) if len(equity) else np.zeros(1)
+
+        daily = self.equity.resample('1D').last().dropna()
+        returns = daily.pct_change().dropna()
+        sharpe = float(returns.mean() / returns.std() * np.sqrt(252)) if returns.std() > 0 else 0.0
+
+        final = float(equity[-1]) if len(equity) else self.initial_balance
+        return {
+            'trades': int(len(pnl)),
+            'final_balance': final,
+            'total_return': final / self.initial_balance - 1,
+            'win_rate': float(len(wins) / len(pnl)) if len(pnl) else 0.0,
+            'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else float('inf'),
+            'avg_trade': float(pnl.mean()) if len(pnl) else 0.0,
+            'max_drawdown': float(drawdown.max()),
+            'sharpe': sharpe,
+            'avg_bars_held': float(self.trades['bars'].mean()) if len(pnl) else 0.0,
+            'exits': self.trades['reason'].value_counts().to_dict()
+        }
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{self.instrument}: {s['trades']} trades, return {s['total_return']:+.2%}, "
+                f"win rate {s['win_rate']:.1%}, profit factor {s['profit_factor']:.2f}, "
+                f"max drawdown {s['max_drawdown']:.2%}, Sharpe {s['sharpe']:.2f}")
+
+    def save(self, directory: str, name: str) -> str:
+        """Write <name>_trades.csv, <name>_equity.csv and <name>_stats.json"""
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, name)
+        self.trades.to_csv(f"{prefix}_trades.csv", index=False)
+        self.equity.rename('equity').to_csv(f"{prefix}_equity.csv", index_label='time')
+        with open(f"{prefix}_stats.json", 'w') as f:
+            json.dump(self.stats, f, indent=2)
+        return prefix
+
+
+class Backtester:
+    """
+    Single-instrument backtest over per-bar entry signals
+
+    A signal on a bar's close opens a position at the next bar's open
+    while flat. Each position is then scanned forward in growing blocks
+    of bars with NumPy for the first bar whose range touches the stop or
+    the target (the stop wins when a bar touches both, and a gap through
+    either level fills at the bar's open). Without a hit it closes at the
+    next bar's open after an opposite signal, after max_bars, or at the
+    end of the data. Only trades taken are scanned, so the cost grows
+    with the number of trades and bars held, not with the signal count.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Initialize the backtester
+
+        Args:
+            config: Overrides for DEFAULT_BACKTEST_CONFIG
+        """
+        self.config = {**DEFAULT_BACKTEST_CONFIG, **(config or {})}
+
+    def run_strategy(self, algorithm: str, df: pd.DataFrame, instrument: str,
+                     algorithm_config: Optional[Dict] = None) -> BacktestResult:
+        """Backtest an algorithm's vectorized rules (see strategy_signals)"""
+        return self.run(df, strategy_signals(algorithm, df, algorithm_config), instrument)
+
+    @staticmethod
+    def _first_hit(o: np.ndarray, h: np.ndarray, l: np.ndarray, start: int, last: int,
+                   direction: int, stop: float, target: float) -> Optional[Tuple[int, float, str]]:
+        """First bar in [start, last] touching stop or target: (bar, fill price, reason)"""
+        size = 32
+        while start <= last:
+            end = min(start + size, last + 1)
+            if direction > 0:
+                stopped = l[start:end] <= stop
+                reached = h[start:end] >= target
+            else:
+                stopped = h[start:end] >= stop
+                reached = l[start:end] <= target
+            hits = stopped | reached
+            if hits.any():
+                k = int(hits.argmax())
+                j = start + k
+                if stopped[k]:
+                    return j, (o[j] if (o[j] - stop) * direction < 0 else stop), 'stop_loss'
+                return j, (o[j] if (o[j] - target) * direction > 0 else target), 'take_profit'
+            start = end
+            size *= 2
+        return None
+
+    def run(self, df: pd.DataFrame, signals: Signals, instrument: str) -> BacktestResult:
+        """
+        Simulate the signals over df
+
+        Args:
+            df: Candles in time order (time as RFC3339 strings or epoch ns, open, high, low, close)
+            signals: Per-bar entry signals for df
+            instrument: Used for the pip size and account currency conversion
+        """
+        c = self.config
+        o, h, l, cl = (np.asarray(df[name].values, dtype=np.float64) for name in ('open', 'high', 'low', 'close'))
+        n = len(df)
+        half_spread = c['spread_pips'] * pip_size(instrument) / 2
+
+        direction = signals.direction
+        candidates = np.flatnonzero(direction != 0)
+        opposite = {1: np.flatnonzero(direction < 0), -1: np.flatnonzero(direction > 0)}
+
+        rows = []
+        balance = float(c['initial_balance'])
+        next_bar = 0
+        while True:
+            k = int(np.searchsorted(candidates, next_bar))
+            if k == len(candidates) or candidates[k] + 1 >= n:
+                break
+            s = int(candidates[k])
+            d = int(direction[s])
+            entry = s + 1
+            fill = o[entry] + d * half_spread
+            stop = fill - d * signals.stop_distance[s]
+            target = fill + d * signals.target_distance[s]
+
+            if c['risk_per_trade'] > 0:
+                risk = signals.stop_distance[s] * account_factor(instrument, c['account_currency'],
+                                                                  np.array([fill]))[0]
+                units = int(balance * c['risk_per_trade'] / risk / 100) * 100
+            else:
+                units = int(c['units'])
+            if units < c['min_units']:
+                next_bar = s + 1
+                continue
+
+            last, reason = n - 1, 'end'
+            if c['exit_on_reverse']:
+                later = opposite[d]
+                j = int(np.searchsorted(later, entry))
+                if j < len(later) and later[j] < last:
+                    last, reason = int(later[j]), 'reverse'
+            if c['max_bars'] and entry + c['max_bars'] - 1 < last:
+                last, reason = entry + c['max_bars'] - 1, 'max_bars'
+
+            hit = self._first_hit(o, h, l, entry, last, d, stop, target)
+            if hit is not None:
+                exit_bar, price, reason = hit
+                next_bar = exit_bar
+            elif reason == 'reverse':
+                # Out at the next open; the reversing signal itself may open the next trade
+                exit_bar, price = last + 1, o[last + 1]
+                next_bar = last
+            else:
+                exit_bar, price = last, cl[last]
+                next_bar = last + 1 if reason == 'max_bars' else n
+
+            exit_fill = price - d * half_spread
+            pnl = d * units * (exit_fill - fill) * account_factor(
+                instrument, c['account_currency'], np.array([exit_fill]))[0]
+            balance += pnl
+            rows.append((entry, exit_bar, d, units, fill, exit_fill, stop, target,
+                         exit_bar - entry, pnl, balance, reason))
+
+        times = df['time'].values
+        if times.dtype.kind != 'i':
+            times = rfc3339_to_ns(times)
+        times = pd.to_datetime(times, unit='ns', utc=True)
+        trades = pd.DataFrame(rows, columns=TRADE_COLUMNS)
+        equity = self._equity_curve(trades, cl, instrument)
+        if len(trades):
+            trades['entry_time'] = times[trades['entry_time'].values]
+            trades['exit_time'] = times[trades['exit_time'].values]
+            trades['direction'] = np.where(trades['direction'] > 0, 'long', 'short')
+        return BacktestResult(instrument, trades, pd.Series(equity, index=times), c['initial_balance'])
+
+    def _equity_curve(self, trades: pd.DataFrame, close: np.ndarray, instrument: str) -> np.ndarray:
+        """Balance plus the open position's mark-to-market value at every close"""
+        n = len(close)
+        realized = np.zeros(n)
+        unrealized = np.zeros(n)
+        if len(trades):
+            entry = trades['entry_time'].values.astype(np.int64)
+            exit_ = trades['exit_time'].values.astype(np.int64)
+            np.add.at(realized, exit_, trades['pnl'].values)
+
+            # Bars each position was held over a close: entry .. exit - 1
+            lengths = exit_ - entry
+            held = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - entry, lengths)
+            d = np.repeat(trades['direction'].values, lengths)
+            units = np.repeat(trades['units'].values, lengths)
+            fill = np.repeat(trades['entry_price'].values, lengths)
+            mark = close[held]
+            factor = account_factor(instrument, self.config['account_currency'], mark)
+            np.add.at(unrealized, held, d * units * (mark - fill) * factor)
+        return self.config['initial_balance'] + np.cumsum(realized) + unrealized
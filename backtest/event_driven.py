@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Event-driven backtest of the live bot
+Runs ForexTradingBot.run() unchanged against a simulated broker and clock
+"""
+
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from clock import SimulatedClock
+from forex_bot import ForexTradingBot
+from local_oanda import CandleMarket, SimulatorSession, V20Simulator
+from backtest.engine import TRADE_COLUMNS, BacktestResult
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_ID = '101-001-0000000-001'
+SIMULATOR_URL = 'http://v20.simulator'  # Never resolved; requests stay in-process
+CYCLE_NS = 300 * 1_000_000_000
+
+DEFAULT_REPLAY_CONFIG = {
+    'initial_balance': 10000.0,
+    'margin_rate': 0.02,
+    'instruments': None,           # Instruments traded (default: all in the market)
+    'max_positions': None,         # Override the bot's max_positions
+    'warmup_candles': 200,         # Base candles before the first cycle (the bot's initial_count)
+    'concurrent_analysis': False,  # Analysis threads only add overhead without network latency
+    'log_level': logging.WARNING   # Bot log level during the run (its INFO output dominates the cost)
+}
+
+EXIT_REASONS = {
+    'STOP_LOSS_ORDER': 'stop_loss',
+    'TAKE_PROFIT_ORDER': 'take_profit',
+    'MARKET_ORDER_POSITION_CLOSEOUT': 'close',
+    'MARKET_ORDER': 'close'
+}
+
+
+class EventDrivenBacktest:
+    """
+    Replays history through the bot's own trading loop
+
+    The bot's transport talks to a V20Simulator in-process instead of over
+    HTTP, so every REST call, parse, buffer update and order goes through
+    the live code. Time comes from a SimulatedClock: the five
+    minute sleep between cycles (and the hourly one while the market is
+    closed) just moves the clock, and the simulator only sees candles that
+    have opened by then. Stop-loss and take-profit orders are triggered on
+    the candles in between, as the broker would.
+    """
+
+    def __init__(self, market: CandleMarket, config: Optional[Dict] = None):
+        """
+        Initialize the backtest
+
+        Args:
+            market: Candles replayed by the simulated broker
+            config: Overrides for DEFAULT_REPLAY_CONFIG
+        """
+        self.market = market
+        self.config = {**DEFAULT_REPLAY_CONFIG, **(config or {})}
+        self.cycles = 0
+        self.requests = 0
+        self.elapsed = 0.0
+
+    def _default_range(self) -> tuple:
+        first = min(int(bars['time'][0]) for bars in self.market.data.values())
+        last = max(int(bars['time'][-1]) for bars in self.market.data.values())
+        return first + self.config['warmup_candles'] * self.market.base_ns, last + self.market.base_ns
+
+    def create_bot(self, clock: SimulatedClock, simulator: V20Simulator) -> ForexTradingBot:
+        """The live bot wired to the simulator; streams and the on-disk store are off"""
+        bot = ForexTradingBot(ACCOUNT_ID, 'backtest-token', base_url=SIMULATOR_URL,
+                              transport_config={'rate_limit': 0, 'max_retries': 0},
+                              stream_config={'enabled': False, 'transaction_stream': False},
+                              clock=clock)
+        bot.transport.session.close()
+        bot.transport.session = SimulatorSession(simulator)
+        bot.instruments = list(self.config['instruments'] or self.market.instruments)
+        if self.config['max_positions'] is not None:
+            bot.max_positions = self.config['max_positions']
+        bot.execution_config['concurrent_analysis'] = self.config['concurrent_analysis']
+        # The store holds candles from after the simulated time
+        bot.candle_store = None
+        return bot
+
+    def run(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+            configure: Optional[Callable[[ForexTradingBot], None]] = None) -> BacktestResult:
+        """
+        Run the bot from start_ns until end_ns
+
+        Args:
+            start_ns: First cycle time (default: warmup_candles into the data)
+            end_ns: Time the loop stops and open positions are closed
+            configure: Called with the bot before it starts (algorithm, limits)
+        """
+        default_start, default_end = self._default_range()
+        start_ns = default_start if start_ns is None else start_ns
+        end_ns = default_end if end_ns is None else end_ns
+        # Cycles land on candle boundaries, as a bot started on one would
+        start_ns = -(-start_ns // self.market.base_ns) * self.market.base_ns
+
+        clock = SimulatedClock(start_ns)
+        simulator = V20Simulator(self.market, ACCOUNT_ID, self.config['initial_balance'],
+                                 self.config['margin_rate'], clock=clock.time_ns)
+        bot = self.create_bot(clock, simulator)
+        if configure is not None:
+            configure(bot)
+
+        times: List[int] = [start_ns]
+        equity: List[float] = [simulator.nav()]
+        self.cycles = 0
+
+        def on_tick(now_ns: int):
+            # The bot sleeps 300s after a cycle and 3600s while the market is closed
+            if now_ns - times[-1] == CYCLE_NS:
+                self.cycles += 1
+            times.append(now_ns)
+            equity.append(simulator.nav())
+            if now_ns >= end_ns:
+                bot.running = False
+
+        clock.subscribe(on_tick)
+        bot_logger = logging.getLogger('forex_bot')
+        level = bot_logger.level
+        bot_logger.setLevel(self.config['log_level'])
+        started = time.perf_counter()
+        try:
+            bot.run()
+            bot.stop()
+        finally:
+            bot_logger.setLevel(level)
+        self.elapsed = time.perf_counter() - started
+        self.requests = bot.transport.total_calls
+        equity[-1] = simulator.nav()
+
+        name = ','.join(bot.instruments)
+        index = pd.to_datetime(np.array(times, dtype=np.int64), unit='ns', utc=True)
+        return BacktestResult(name, self._trades(simulator, end_ns), pd.Series(equity, index=index),
+                              self.config['initial_balance'])
+
+    def _trades(self, simulator: V20Simulator, end_ns: int) -> pd.DataFrame:
+        """Closed trades from the simulator's transaction log: TRADE_COLUMNS plus instrument"""
+        closing = {}
+        for transaction in simulator.transactions:
+            for closed in transaction.get('tradesClosed', []):
+                closing[closed['tradeID']] = transaction
+        levels = {t['id']: float(t['price']) for t in simulator.transactions
+                  if t['type'] in ('STOP_LOSS', 'TAKE_PROFIT')}
+
+        rows = []
+        for trade_id, fill in closing.items():
+            trade = simulator.trades[trade_id]
+            units = int(trade['initialUnits'])
+            entry = pd.Timestamp(trade['openTime'])
+            exit_ = pd.Timestamp(trade['closeTime'])
+            reason = EXIT_REASONS.get(fill['reason'], fill['reason'].lower())
+            if reason == 'close' and exit_.value >= end_ns:
+                reason = 'end'
+            rows.append((entry, exit_, 'long' if units > 0 else 'short', abs(units),
+                         float(trade['price']), float(trade['averageClosePrice']),
+                         levels.get(trade.get('stopLossOrderID'), np.nan),
+                         levels.get(trade.get('takeProfitOrderID'), np.nan),
+                         int((exit_.value - entry.value) // self.market.base_ns),
+                         float(trade['realizedPL']), float(fill['accountBalance']), reason,
+                         trade['instrument']))
+        return pd.DataFrame(rows, columns=TRADE_COLUMNS + ['instrument'])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Vectorized strategy signals
+Each AlgorithmFactory algorithm's entry rules evaluated on every bar at once
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from trading_algorithms import Signal
+from batch_analysis import DEFAULT_BATCH_CONFIG, STRATEGY_VOTES
+from indicator_graph import hybrid_graph
+
+
+class Signals(NamedTuple):
+    """Per-bar entry signals, evaluated on each bar's close"""
+    direction: np.ndarray        # +1 buy, -1 sell, 0 none (int8)
+    confidence: np.ndarray
+    stop_distance: np.ndarray    # Price distance from entry to the stop loss
+    target_distance: np.ndarray  # Price distance from entry to the take profit
+
+
+# Indicators the vote rules read, besides ATR for the exits
+INDICATORS = ['rsi', 'ema_fast', 'ema_slow', 'adx', 'plus_di', 'minus_di', 'macd', 'macd_hist',
+              'bb_upper', 'bb_lower', 'stoch_k', 'stoch_d', 'atr']
+
+
+def strategy_signals(algorithm: str, df: pd.DataFrame, config: Optional[Dict] = None,
+                     cache: Optional[Dict[str, np.ndarray]] = None) -> Signals:
+    """
+    Entry signals for every bar of a candle history
+
+    The votes of the named algorithm are averaged into a score in
+    [-1, 1]; as in BatchAnalyzer a score of +-0.5 or more is a signal
+    with the score's magnitude as confidence, and signals below
+    min_confidence are dropped, as the bot does. Stops and targets are
+    placed atr_stop_mult / atr_target_mult ATRs from the entry.
+    Indicators come from one shared hybrid_graph run; pass the same
+    cache dict for every config over one df to reuse unchanged indicators.
+    """
+    if algorithm not in STRATEGY_VOTES:
+        raise ValueError(f"No vectorized rules for algorithm {algorithm}; "
+                         f"choose from {', '.join(STRATEGY_VOTES)}")
+    c = {**DEFAULT_BATCH_CONFIG, 'min_confidence': 0.5, **(config or {})}
+    run = hybrid_graph(c).run_frame(df, cache)
+    values = run.compute(INDICATORS)
+    close = df['close'].values
+
+    votes = STRATEGY_VOTES[algorithm](values, close, c)
+    score = sum(votes.values()) / len(votes)
+    direction = np.where(score >= 0.5, 1, np.where(score <= -0.5, -1, 0)).astype(np.int8)
+    confidence = np.abs(score)
+    direction[confidence < c['min_confidence']] = 0
+
+    atr = values['atr']
+    direction[~(atr > 0)] = 0
+    return Signals(direction, confidence, atr * c['atr_stop_mult'], atr * c['atr_target_mult'])
+
+
+_SIDES = {Signal.BUY: 1, Signal.STRONG_BUY: 1, Signal.SELL: -1, Signal.STRONG_SELL: -1}
+
+
+def algorithm_signals(algorithm, df: pd.DataFrame, window: int = 200,
+                      min_confidence: float = 0.5) -> Signals:
+    """
+    Entry signals from an AlgorithmFactory algorithm's own analyze()
+
+    Calls analyze on the window candles ending at every bar, so it
+    reproduces any strategy exactly, at a few milliseconds per bar.
+    """
+    n = len(df)
+    direction = np.zeros(n, dtype=np.int8)
+    confidence = np.zeros(n)
+    stop_distance = np.full(n, np.nan)
+    target_distance = np.full(n, np.nan)
+    close = df['close'].values
+
+    for i in range(window - 1, n):
+        signal = algorithm.analyze(df.iloc[i - window + 1:i + 1], float(close[i]))
+        side = _SIDES.get(signal.signal, 0)
+        if side == 0 or signal.confidence < min_confidence:
+            continue
+        direction[i] = side
+        confidence[i] = signal.confidence
+        stop_distance[i] = abs(signal.entry_price - signal.stop_loss)
+        target_distance[i] = abs(signal.take_profit - signal.entry_price)
+    return Signals(direction, confidence, stop_distance, target_distance)
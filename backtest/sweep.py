@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweep
+Backtests every combination of an algorithm_config grid on a process pool
+Usage: python backtest/sweep.py --start 2024-01-01 --end 2024-12-31 --param rsi_period=10,14,21
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CANDLE_DTYPE, CandleStore
+from backtest.engine import DEFAULT_BACKTEST_CONFIG, Backtester
+from backtest.strategies import STRATEGY_VOTES, strategy_signals
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = CANDLE_DTYPE.names  # time, open, high, low, close, volume; all 8-byte fields
+
+
+def parameter_grid(grid: Dict[str, Iterable]) -> List[Dict]:
+    """
+    Every combination of the grid values, in a stable order
+
+    Combinations with ema_fast >= ema_slow or macd_fast >= macd_slow are
+    dropped, since they only mirror another combination's signals.
+    """
+    names = sorted(grid)
+    combos = []
+    for values in itertools.product(*(list(grid[name]) for name in names)):
+        params = dict(zip(names, values))
+        if any(fast in params and slow in params and params[fast] >= params[slow]
+               for fast, slow in (('ema_fast', 'ema_slow'), ('macd_fast', 'macd_slow'))):
+            continue
+        combos.append(params)
+    return combos
+
+
+def parse_param(text: str) -> Tuple[str, List]:
+    """'rsi_period=10,14,21' -> ('rsi_period', [10, 14, 21])"""
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"Expected name=v1,v2,... got {text}")
+    return name.strip(), [json.loads(v) for v in values.split(',')]
+
+
+def params_key(instrument: str, params: Dict) -> str:
+    return json.dumps([instrument, params], sort_keys=True)
+
+
+class SharedCandles:
+    """
+    Candle columns for several instruments in one shared memory block
+
+    The parent copies each instrument's records in once; workers attach
+    by name and read the columns as NumPy views of the same pages, so
+    nothing is pickled or copied per worker, with fork or spawn.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Tuple[int, int]]):
+        self.shm = shm
+        self.layout = layout  # instrument -> (row offset, rows)
+        self.rows = sum(rows for _, rows in layout.values())
+
+    @classmethod
+    def create(cls, candles: Dict[str, np.ndarray]) -> 'SharedCandles':
+        """Copy CANDLE_DTYPE records per instrument into a new block"""
+        layout, offset = {}, 0
+        for instrument, records in candles.items():
+            layout[instrument] = (offset, len(records))
+            offset += len(records)
+        shm = shared_memory.SharedMemory(create=True, size=max(offset * len(COLUMNS) * 8, 1))
+        shared = cls(shm, layout)
+        for instrument, records in candles.items():
+            columns = shared.columns(instrument, writeable=True)
+            for name in COLUMNS:
+                columns[name][:] = records[name]
+        return shared
+
+    @property
+    def spec(self) -> Tuple[str, Dict[str, Tuple[int, int]]]:
+        """Picklable handle passed to workers"""
+        return self.shm.name, self.layout
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, Dict[str, Tuple[int, int]]]) -> 'SharedCandles':
+        name, layout = spec
+        return cls(shared_memory.SharedMemory(name=name), layout)
+
+    def columns(self, instrument: str, writeable: bool = False) -> Dict[str, np.ndarray]:
+        """Column views for one instrument (column-major: each column is contiguous)"""
+        offset, rows = self.layout[instrument]
+        views = {}
+        for i, name in enumerate(COLUMNS):
+            view = np.ndarray(rows, dtype=CANDLE_DTYPE[name], buffer=self.shm.buf,
+                              offset=(i * self.rows + offset) * 8)
+            view.flags.writeable = writeable
+            views[name] = view
+        return views
+
+    def frame(self, instrument: str) -> pd.DataFrame:
+        """Candle DataFrame over the shared columns (time as epoch ns), without copying"""
+        return pd.DataFrame(self.columns(instrument), copy=False)
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+# Per-worker state set up once by _init_worker
+_worker: Dict = {}
+
+
+def _init_worker(spec: Tuple, algorithm: str, base_config: Dict, backtest_config: Dict):
+    shared = SharedCandles.attach(spec)
+    _worker.update({
+        'shared': shared,
+        'frames': {instrument: shared.frame(instrument) for instrument in shared.layout},
+        'algorithm': algorithm,
+        'base_config': base_config,
+        'backtester': Backtester(backtest_config)
+    })
+
+
+def _run_task(task: Tuple[str, Dict]) -> Dict:
+    instrument, params = task
+    start = time.perf_counter()
+    df = _worker['frames'][instrument]
+    signals = strategy_signals(_worker['algorithm'], df, {**_worker['base_config'], **params})
+    result = _worker['backtester'].run(df, signals, instrument)
+    return {'instrument': instrument, 'params': params, 'stats': result.stats,
+            'seconds': round(time.perf_counter() - start, 4), 'pid': os.getpid()}
+
+
+def completed_keys(path: str) -> set:
+    """Keys of the results already written to a sweep file"""
+    keys = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    keys.add(params_key(row['instrument'], row['params']))
+    return keys
+
+
+class ParameterSweep:
+    """
+    Backtests an algorithm over a grid of algorithm_config values
+
+    Each (instrument, parameters) pair is one task. Workers attach the
+    shared candles once in their initializer, so a task only carries a
+    small parameter dict; results stream back in completion order and
+    are appended to a JSON-lines file as they arrive, so a long sweep
+    can be watched, interrupted and resumed.
+    """
+
+    def __init__(self, candles: Dict[str, np.ndarray], algorithm: str = 'hybrid',
+                 base_config: Optional[Dict] = None, backtest_config: Optional[Dict] = None,
+                 workers: Optional[int] = None):
+        """
+        Initialize the sweep
+
+        Args:
+            candles: CANDLE_DTYPE records per instrument
+            algorithm: Vectorized rules to backtest (see STRATEGY_VOTES)
+            base_config: algorithm_config values shared by every combination
+            backtest_config: Overrides for DEFAULT_BACKTEST_CONFIG
+            workers: Processes in the pool (default: CPU count)
+        """
+        self.candles = candles
+        self.algorithm = algorithm
+        self.base_config = dict(base_config or {})
+        self.backtest_config = {**DEFAULT_BACKTEST_CONFIG, **(backtest_config or {})}
+        self.workers = workers or os.cpu_count() or 1
+
+    def tasks(self, combos: List[Dict]) -> List[Tuple[str, Dict]]:
+        return [(instrument, params) for params in combos for instrument in self.candles]
+
+    def run(self, combos: List[Dict], output: Optional[str] = None,
+            resume: bool = False) -> Iterator[Dict]:
+        """
+        Backtest every combination on every instrument
+
+        Args:
+            combos: Parameter dicts, e.g. from parameter_grid
+            output: JSON-lines file each result is appended to as it finishes
+            resume: Skip tasks whose results are already in output
+
+        Yields:
+            One result dict per task in completion order
+        """
+        tasks = self.tasks(combos)
+        if resume and output:
+            done = completed_keys(output)
+            tasks = [t for t in tasks if params_key(*t) not in done]
+        if not tasks:
+            return
+
+        shared = SharedCandles.create(self.candles)
+        out = None
+        try:
+            if output:
+                os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+                out = open(output, 'a' if resume else 'w')
+            initargs = (shared.spec, self.algorithm, self.base_config, self.backtest_config)
+            # A few tasks per message keeps IPC small without starving workers at the end
+            chunksize = max(1, min(8, len(tasks) // (self.workers * 8)))
+            with multiprocessing.Pool(self.workers, _init_worker, initargs) as pool:
+                for result in pool.imap_unordered(_run_task, tasks, chunksize):
+                    if out is not None:
+                        out.write(json.dumps(result) + '\n')
+                        out.flush()
+                    yield result
+        finally:
+            if out is not None:
+                out.close()
+            shared.close()
+            shared.unlink()
+
+
+def load_results(path: str) -> pd.DataFrame:
+    """A sweep file as one row per task: instrument, each parameter and each statistic"""
+    rows = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                stats = {k: v for k, v in row['stats'].items() if k != 'exits'}
+                rows.append({'instrument': row['instrument'], **row['params'], **stats})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel parameter sweep over algorithm_config')
+    parser.add_argument('--start', required=True, help='First candle time (e.g. 2024-01-01)')
+    parser.add_argument('--end', required=True, help='End time, exclusive')
+    parser.add_argument('--param', action='append', type=parse_param, default=[],
+                        help='Grid axis as name=v1,v2,... (repeatable)')
+    parser.add_argument('--grid', help='JSON file mapping parameter names to value lists')
+    parser.add_argument('--instruments', default=None, help='Comma-separated (default: config instruments)')
+    parser.add_argument('--granularity', default='M5')
+    parser.add_argument('--algorithm', default='hybrid', choices=sorted(STRATEGY_VOTES))
+    parser.add_argument('--config', default='config.json', help='Bot configuration (base algorithm settings)')
+    parser.add_argument('--store-dir', default='data/candles')
+    parser.add_argument('--workers', type=int, default=None, help='Processes (default: CPU count)')
+    parser.add_argument('--balance', type=float, default=DEFAULT_BACKTEST_CONFIG['initial_balance'])
+    parser.add_argument('--risk', type=float, default=DEFAULT_BACKTEST_CONFIG['risk_per_trade'])
+    parser.add_argument('--spread-pips', type=float, default=DEFAULT_BACKTEST_CONFIG['spread_pips'])
+    parser.add_argument('--output', default=None, help='Results file (default: backtest/results/sweep_<algorithm>.jsonl)')
+    parser.add_argument('--resume', action='store_true', help='Skip combinations already in the results file')
+    parser.add_argument('--top', type=int, default=10, help='Best combinations to print')
+    parser.add_argument('--sort', default='sharpe', help='Statistic to rank combinations by')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config) as f:
+            config = json.load(f)
+    instruments = (args.instruments.split(',') if args.instruments
+                   else config.get('trading', {}).get('instruments', ['EUR_USD']))
+
+    grid = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid.update(json.load(f))
+    grid.update(dict(args.param))
+    if not grid:
+        parser.error('Give at least one --param or a --grid file')
+    combos = parameter_grid(grid)
+
+    store = CandleStore(args.store_dir)
+    candles = {}
+    for instrument in instruments:
+        records = np.array(store.read(instrument, args.granularity, args.start, args.end))
+        if len(records) == 0:
+            logger.error(f"No stored {args.granularity} candles for {instrument} in {args.start} - {args.end}")
+            continue
+        candles[instrument] = records
+    if not candles:
+        return
+
+    output = args.output or os.path.join('backtest', 'results', f"sweep_{args.algorithm}.jsonl")
+    sweep = ParameterSweep(candles, args.algorithm, config.get('algorithm', {}),
+                           {'initial_balance': args.balance, 'risk_per_trade': args.risk,
+                            'spread_pips': args.spread_pips}, args.workers)
+    total = len(sweep.tasks(combos))
+    logger.info(f"{len(combos)} combinations x {len(candles)} instruments = {total} backtests "
+                f"on {sweep.workers} workers")
+
+    start = time.perf_counter()
+    for i, result in enumerate(sweep.run(combos, output, args.resume), 1):
+        if i % max(1, total // 20) == 0:
+            elapsed = time.perf_counter() - start
+            logger.info(f"{i}/{total} done ({i / elapsed:.1f} backtests/s)")
+    logger.info(f"Sweep finished in {time.perf_counter() - start:.1f}s; results in {output}")
+
+    results = load_results(output)
+    if not results.empty:
+        ranked = results.groupby(list(grid))[args.sort].mean().sort_values(ascending=False)
+        print(f"\nTop {args.top} by mean {args.sort} across instruments:")
+        print(ranked.head(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Walk-forward optimization
+Rolling in-sample parameter selection with the out-of-sample results stitched together
+Usage: python backtest/walk_forward.py --start 2020-01-01 --end 2025-01-01 --param rsi_period=10,14,21
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_codec import rfc3339_to_ns
+from candle_store import CandleStore
+from backtest.engine import DEFAULT_BACKTEST_CONFIG, BacktestResult, Backtester
+from backtest.strategies import STRATEGY_VOTES, Signals, strategy_signals
+from backtest.sweep import parameter_grid, parse_param
+
+logger = logging.getLogger(__name__)
+
+NS_PER_DAY = 86400 * 1_000_000_000
+
+DEFAULT_WALK_FORWARD_CONFIG = {
+    'in_sample_days': 365,      # Optimization window length
+    'out_of_sample_days': 30,   # Evaluation window following each optimization window
+    'step_days': None,          # Window spacing (default: out_of_sample_days, so OOS windows tile)
+    'anchored': False,          # Grow the in-sample window from the start instead of rolling it
+    'metric': 'sharpe',         # In-sample statistic maximized
+    'min_trades': 10            # In-sample windows with fewer trades never win
+}
+
+WINDOW_STATS = ['trades', 'total_return', 'win_rate', 'profit_factor', 'max_drawdown', 'sharpe']
+
+
+class Window(NamedTuple):
+    """Bar index ranges [start, end) of one walk-forward step"""
+    in_start: int
+    in_end: int
+    out_start: int
+    out_end: int
+
+
+class ComboRun(NamedTuple):
+    """One parameter set backtested over the whole history"""
+    equity: np.ndarray       # Mark-to-market equity at every bar
+    entry_bar: np.ndarray    # Per trade, in entry order
+    pnl: np.ndarray
+    trades: pd.DataFrame
+
+
+class WalkForwardResult:
+    """Per-window choices and the stitched out-of-sample backtest"""
+
+    def __init__(self, windows: pd.DataFrame, backtest: BacktestResult):
+        self.windows = windows
+        self.backtest = backtest
+        self.stats = backtest.stats
+
+    def summary(self) -> str:
+        changes = int((self.windows['params'] != self.windows['params'].shift()).sum()) - 1
+        return (f"{len(self.windows)} windows, parameters changed {max(changes, 0)} times | "
+                f"out-of-sample {self.backtest.summary()}")
+
+    def save(self, directory: str, name: str) -> str:
+        """BacktestResult.save plus <name>_windows.csv"""
+        prefix = self.backtest.save(directory, name)
+        self.windows.to_csv(f"{prefix}_windows.csv", index=False)
+        return prefix
+
+
+class WalkForward:
+    """
+    Walk-forward analysis of one instrument
+
+    Each step picks the parameter combination with the best in-sample
+    metric and trades it over the following out-of-sample window; the
+    out-of-sample equity of the chosen combinations is chained into one
+    curve, so every bar of it was traded with settings chosen on earlier
+    data only.
+
+    Overlapping windows share their work. Indicators are causal, so one
+    full-history array per indicator node serves every window (and with
+    node names carrying their parameters, every combination that uses
+    the same node). Each combination is backtested once over the whole
+    history, and a window's in-sample statistics are read from that run's
+    equity curve and trades, as if those settings had been trading all
+    along. A 60-window run therefore costs one backtest per combination
+    rather than sixty. Only the chosen combination of each window is then
+    backtested again on the out-of-sample bars alone, so no position
+    crosses a window boundary.
+    """
+
+    def __init__(self, df: pd.DataFrame, instrument: str, algorithm: str = 'hybrid',
+                 base_config: Optional[Dict] = None, backtest_config: Optional[Dict] = None,
+                 config: Optional[Dict] = None):
+        """
+        Initialize the analysis
+
+        Args:
+            df: Candles in time order (time as RFC3339 strings or epoch ns)
+            instrument: Used for pip size and currency conversion
+            algorithm: Vectorized rules to optimize (see STRATEGY_VOTES)
+            base_config: algorithm_config values shared by every combination
+            backtest_config: Overrides for DEFAULT_BACKTEST_CONFIG
+            config: Overrides for DEFAULT_WALK_FORWARD_CONFIG
+        """
+        self.df = df
+        self.instrument = instrument
+        self.algorithm = algorithm
+        self.base_config = dict(base_config or {})
+        self.backtester = Backtester(backtest_config)
+        self.config = {**DEFAULT_WALK_FORWARD_CONFIG, **(config or {})}
+        self.indicator_cache: Dict[str, np.ndarray] = {}
+
+        times = df['time'].values
+        self.times = times if times.dtype.kind == 'i' else rfc3339_to_ns(times)
+        # Parsed once instead of in every backtest
+        self.frame = df.assign(time=self.times)
+        # Last bar of each UTC day, for daily-return Sharpe ratios as in BacktestResult
+        day = self.times // NS_PER_DAY
+        self.day_ends = np.flatnonzero(np.r_[day[1:] != day[:-1], True])
+
+    def windows(self) -> List[Window]:
+        """Walk-forward steps as bar ranges, from the first candle onwards"""
+        c = self.config
+        in_ns = int(c['in_sample_days'] * NS_PER_DAY)
+        out_ns = int(c['out_of_sample_days'] * NS_PER_DAY)
+        step_ns = int((c['step_days'] or c['out_of_sample_days']) * NS_PER_DAY)
+        first, last = int(self.times[0]), int(self.times[-1])
+
+        windows, k = [], 0
+        while True:
+            in_end_ns = first + in_ns + k * step_ns
+            if in_end_ns > last:
+                break
+            in_start_ns = first if c['anchored'] else in_end_ns - in_ns
+            bounds = np.searchsorted(self.times, [in_start_ns, in_end_ns, in_end_ns + out_ns])
+            if bounds[2] > bounds[1]:
+                windows.append(Window(int(bounds[0]), int(bounds[1]), int(bounds[1]), int(bounds[2])))
+            k += 1
+        return windows
+
+    def run_combo(self, params: Dict) -> ComboRun:
+        """Backtest one combination over the whole history, reusing cached indicators"""
+        signals = strategy_signals(self.algorithm, self.frame, {**self.base_config, **params},
+                                   self.indicator_cache)
+        result = self.backtester.run(self.frame, signals, self.instrument)
+        trades = result.trades
+        entry_bar = np.searchsorted(self.times, trades['entry_time'].astype(np.int64).values) \
+            if len(trades) else np.zeros(0, dtype=np.int64)
+        return ComboRun(result.equity.values, entry_bar, trades['pnl'].values, trades)
+
+    def trade_window(self, params: Dict, start: int, end: int, balance: float) -> ComboRun:
+        """
+        Backtest one combination on bars [start, end) alone, from balance
+
+        Signals still come from the whole history, so indicators are warm
+        at the window start. The run begins on the bar before the window,
+        whose signal fills at the window's first open, and positions still
+        open on the last bar close at its close. Equity covers bars
+        [start - 1, end), the first being balance.
+        """
+        signals = strategy_signals(self.algorithm, self.frame, {**self.base_config, **params},
+                                   self.indicator_cache)
+        first = start - 1
+        backtester = Backtester({**self.backtester.config, 'initial_balance': balance})
+        result = backtester.run(self.frame.iloc[first:end], Signals(*(a[first:end] for a in signals)),
+                                self.instrument)
+        trades = result.trades
+        entry_bar = np.searchsorted(self.times, trades['entry_time'].astype(np.int64).values) \
+            if len(trades) else np.zeros(0, dtype=np.int64)
+        return ComboRun(result.equity.values, entry_bar, trades['pnl'].values, trades)
+
+    def window_stats(self, run: ComboRun, start: int, end: int, offset: int = 0) -> Dict:
+        """
+        BacktestResult statistics of bars [start, end) of a run
+
+        Trades are those entered in the window; returns are measured from
+        the equity at the close before the window.
+
+        Args:
+            run: Full-history run, or a trade_window run with offset start - 1
+            offset: History bar of run.equity[0]
+        """
+        equity = run.equity[start - offset:end - offset]
+        base = run.equity[start - offset - 1] if start > offset else self.backtester.config['initial_balance']
+        lo, hi = np.searchsorted(run.entry_bar, [start, end])
+        pnl = run.pnl[lo:hi]
+        wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+
+        days = self.day_ends[(self.day_ends >= start) & (self.day_ends < end - 1)]
+        daily = run.equity[np.r_[days, end - 1] - offset]
+        returns = daily[1:] / daily[:-1] - 1
+        std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+        return {
+            'trades': int(len(pnl)),
+            'total_return': float(equity[-1] / base - 1),
+            'win_rate': float(len(wins) / len(pnl)) if len(pnl) else 0.0,
+            'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else float('inf'),
+            'max_drawdown': float((1 - equity / np.maximum.accumulate(equity)).max()),
+            'sharpe': float(returns.mean() / std * np.sqrt(252)) if std > 0 else 0.0
+        }
+
+    def run(self, combos: List[Dict]) -> WalkForwardResult:
+        """
+        Optimize over combos in every in-sample window and stitch the out-of-sample results
+
+        Combinations are backtested one at a time and each window keeps
+        only the index and score of its best combination so far, so memory
+        stays at one history's worth whatever the grid size. Each window's
+        choice is then traded on its out-of-sample bars from the stitched
+        equity at the window start, with every position closed by the
+        window end, so the stitched curve and trade list agree.
+
+        Args:
+            combos: Parameter dicts, e.g. from parameter_grid
+        """
+        c = self.config
+        windows = self.windows()
+        if not windows:
+            raise ValueError("History shorter than one in-sample window plus one bar")
+        initial = self.backtester.config['initial_balance']
+
+        # Ties (including too few trades everywhere) go to the first combination
+        best: List[Optional[Dict]] = [None] * len(windows)
+        for i, params in enumerate(combos):
+            run = self.run_combo(params)
+            for j, w in enumerate(windows):
+                stats = self.window_stats(run, w.in_start, w.in_end)
+                score = stats[c['metric']] if stats['trades'] >= c['min_trades'] else -np.inf
+                if best[j] is None or score > best[j]['score']:
+                    best[j] = {'combo': i, 'score': score}
+
+        rows, curves, trades, level = [], [], [], initial
+        for j, (w, pick) in enumerate(zip(windows, best)):
+            run = self.trade_window(combos[pick['combo']], w.out_start, w.out_end, level)
+            stats = self.window_stats(run, w.out_start, w.out_end, w.out_start - 1)
+            curves.append(run.equity[1:])
+            trades.append(run.trades.assign(window=j))
+            level = float(curves[-1][-1])
+            rows.append({'window': j,
+                         'in_start': self._time(w.in_start), 'in_end': self._time(w.in_end - 1),
+                         'out_start': self._time(w.out_start), 'out_end': self._time(w.out_end - 1),
+                         'params': json.dumps(combos[pick['combo']], sort_keys=True),
+                         f"in_sample_{c['metric']}": float(pick['score']),
+                         **{f"oos_{name}": stats[name] for name in WINDOW_STATS}})
+
+        first, last = windows[0].out_start, windows[-1].out_end
+        index = pd.to_datetime(self.times[first:last], unit='ns', utc=True)
+        equity = pd.Series(np.concatenate(curves), index=index)
+        trades = pd.concat(trades, ignore_index=True)
+        backtest = BacktestResult(self.instrument, trades, equity, initial)
+        return WalkForwardResult(pd.DataFrame(rows), backtest)
+
+    def _time(self, bar: int) -> pd.Timestamp:
+        return pd.Timestamp(int(self.times[bar]), tz='UTC')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward optimization of algorithm_config')
+    parser.add_argument('--start', required=True, help='First candle time (e.g. 2020-01-01)')
+    parser.add_argument('--end', required=True, help='End time, exclusive')
+    parser.add_argument('--param', action='append', type=parse_param, default=[],
+                        help='Grid axis as name=v1,v2,... (repeatable)')
+    parser.add_argument('--grid', help='JSON file mapping parameter names to value lists')
+    parser.add_argument('--instrument', default='EUR_USD')
+    parser.add_argument('--granularity', default='H1')
+    parser.add_argument('--algorithm', default='hybrid', choices=sorted(STRATEGY_VOTES))
+    parser.add_argument('--config', default='config.json', help='Bot configuration (base algorithm settings)')
+    parser.add_argument('--store-dir', default='data/candles')
+    parser.add_argument('--in-sample-days', type=float, default=DEFAULT_WALK_FORWARD_CONFIG['in_sample_days'])
+    parser.add_argument('--out-of-sample-days', type=float,
+                        default=DEFAULT_WALK_FORWARD_CONFIG['out_of_sample_days'])
+    parser.add_argument('--step-days', type=float, default=None)
+    parser.add_argument('--anchored', action='store_true', help='Expanding in-sample window')
+    parser.add_argument('--metric', default=DEFAULT_WALK_FORWARD_CONFIG['metric'], choices=WINDOW_STATS)
+    parser.add_argument('--min-trades', type=int, default=DEFAULT_WALK_FORWARD_CONFIG['min_trades'])
+    parser.add_argument('--balance', type=float, default=DEFAULT_BACKTEST_CONFIG['initial_balance'])
+    parser.add_argument('--risk', type=float, default=DEFAULT_BACKTEST_CONFIG['risk_per_trade'])
+    parser.add_argument('--spread-pips', type=float, default=DEFAULT_BACKTEST_CONFIG['spread_pips'])
+    parser.add_argument('--output-dir', default='backtest/results')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config) as f:
+            config = json.load(f)
+
+    grid = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid.update(json.load(f))
+    grid.update(dict(args.param))
+    if not grid:
+        parser.error('Give at least one --param or a --grid file')
+    combos = parameter_grid(grid)
+
+    df = CandleStore(args.store_dir).read_frame(args.instrument, args.granularity, args.start, args.end)
+    if df.empty:
+        logger.error(f"No stored {args.granularity} candles for {args.instrument} in {args.start} - {args.end}")
+        return
+
+    walk = WalkForward(df, args.instrument, args.algorithm, config.get('algorithm', {}),
+                       {'initial_balance': args.balance, 'risk_per_trade': args.risk,
+                        'spread_pips': args.spread_pips},
+                       {'in_sample_days': args.in_sample_days, 'out_of_sample_days': args.out_of_sample_days,
+                        'step_days': args.step_days, 'anchored': args.anchored,
+                        'metric': args.metric, 'min_trades': args.min_trades})
+    logger.info(f"{len(combos)} combinations over {len(walk.windows())} windows of {len(df):,} candles")
+
+    start = time.perf_counter()
+    result = walk.run(combos)
+    logger.info(f"Walk-forward finished in {time.perf_counter() - start:.1f}s")
+    print(result.windows[['window', 'out_start', 'params', f"in_sample_{args.metric}",
+                          'oos_total_return']].to_string(index=False))
+    print(result.summary())
+    prefix = result.save(args.output_dir, f"walk_forward_{args.algorithm}_{args.instrument}_{args.granularity}")
+    print(f"Saved {prefix}_*")
+
+
+if __name__ == "__main__":
+    main()
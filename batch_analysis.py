@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Batched multi-instrument analysis
+Computes every indicator for all instruments at once on (instruments x bars) arrays
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from trading_algorithms import Signal, TradingSignal
+from streaming_indicators import DEFAULT_INDICATOR_CONFIG, _ewm_alpha, indicator_config
+import indicator_kernels
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_CONFIG = {
+    **DEFAULT_INDICATOR_CONFIG,
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'adx_threshold': 25,
+    'atr_stop_mult': 1.5,     # Stop loss distance in ATRs
+    'atr_target_mult': 3.0,   # Take profit distance in ATRs (2:1 reward/risk)
+    'min_bars': 50            # Instruments with less history are skipped
+}
+
+
+def ewm(x: np.ndarray, alpha) -> np.ndarray:
+    """
+    pandas ewm(adjust=False).mean() along the last axis
+
+    Loops over bars and vectorizes across every leading axis, so the cost
+    hardly depends on how many series are stacked. alpha broadcasts
+    against x[..., 0]; NaN handling matches pandas exactly. With the
+    numba kernel backend each series is smoothed in compiled code instead.
+    """
+    alpha = np.broadcast_to(np.asarray(alpha, dtype=np.float64), x.shape[:-1])
+    if indicator_kernels.get_backend() == 'numba':
+        rows = indicator_kernels.ewm_rows(x.reshape(-1, x.shape[-1]), alpha.reshape(-1))
+        return rows.reshape(x.shape)
+    factor = 1. - alpha
+    out = np.empty_like(x)
+    weighted = x[..., 0].copy()
+    old_wt = np.ones_like(weighted)
+    out[..., 0] = weighted
+
+    for t in range(1, x.shape[-1]):
+        cur = x[..., t]
+        observed = cur == cur
+        has_value = weighted == weighted
+        old_wt = np.where(has_value, old_wt * factor, old_wt)
+        update = has_value & observed
+        blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update & (weighted != cur), blended, weighted)
+        weighted = np.where(~has_value & observed, cur, weighted)
+        old_wt = np.where(update, 1., old_wt)
+        out[..., t] = weighted
+    return out
+
+
+def _rolling(x: np.ndarray, period: int, func) -> np.ndarray:
+    """Apply a window reduction along the last axis, NaN for the warm-up bars"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= period:
+        out[..., period - 1:] = func(sliding_window_view(x, period, axis=-1), axis=-1)
+    return out
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    out[..., 0] = np.nan
+    out[..., 1:] = x[..., :-1]
+    return out
+
+
+def compute_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       config: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    Every indicator in the algorithm configuration for all instruments
+
+    Args:
+        high, low, close: (instruments, bars) arrays aligned on time
+
+    Returns:
+        Indicator name -> (instruments, bars) array, matching the
+        streaming_indicators batch formulas
+    """
+    c = indicator_config(config, DEFAULT_BATCH_CONFIG)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prev_close = _shift(close)
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+        delta = close - prev_close
+        up = high - _shift(high)
+        down = -(low - _shift(low))
+        plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+        minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+
+        # First pass: all recurrences whose inputs are known up front
+        stages = [
+            ('gain', np.clip(delta, 0, None), _ewm_alpha(alpha=1 / c['rsi_period'])),
+            ('loss', np.clip(-delta, 0, None), _ewm_alpha(alpha=1 / c['rsi_period'])),
+            ('ema_fast', close, _ewm_alpha(c['ema_fast'])),
+            ('ema_slow', close, _ewm_alpha(c['ema_slow'])),
+            ('atr', tr, _ewm_alpha(alpha=1 / c['atr_period'])),
+            ('adx_atr', tr, _ewm_alpha(alpha=1 / c['adx_period'])),
+            ('plus_dm', plus_dm, _ewm_alpha(alpha=1 / c['adx_period'])),
+            ('minus_dm', minus_dm, _ewm_alpha(alpha=1 / c['adx_period'])),
+            ('macd_fast', close, _ewm_alpha(c['macd_fast'])),
+            ('macd_slow', close, _ewm_alpha(c['macd_slow']))
+        ]
+        smoothed = ewm(np.stack([stage[1] for stage in stages]),
+                       np.array([stage[2] for stage in stages])[:, None])
+        s = {stage[0]: smoothed[i] for i, stage in enumerate(stages)}
+
+        rsi = 100 - 100 / (1 + s['gain'] / s['loss'])
+        plus_di = 100 * s['plus_dm'] / s['adx_atr']
+        minus_di = 100 * s['minus_dm'] / s['adx_atr']
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        macd_line = s['macd_fast'] - s['macd_slow']
+
+        # Second pass: recurrences over first-pass outputs
+        second = ewm(np.stack([dx, macd_line]),
+                     np.array([_ewm_alpha(alpha=1 / c['adx_period']), _ewm_alpha(c['macd_signal'])])[:, None])
+        macd_signal = second[1]
+
+        middle = _rolling(close, c['bb_period'], np.mean)
+        std = _rolling(close, c['bb_period'], lambda w, axis: np.std(w, axis=axis, ddof=1))
+        lowest = _rolling(low, c['stoch_k'], np.min)
+        highest = _rolling(high, c['stoch_k'], np.max)
+        stoch_k = 100 * (close - lowest) / (highest - lowest)
+
+    return {
+        'rsi': rsi,
+        'ema_fast': s['ema_fast'],
+        'ema_slow': s['ema_slow'],
+        'atr': s['atr'],
+        'adx': second[0],
+        'plus_di': plus_di,
+        'minus_di': minus_di,
+        'bb_upper': middle + c['bb_std'] * std,
+        'bb_middle': middle,
+        'bb_lower': middle - c['bb_std'] * std,
+        'macd': macd_line,
+        'macd_signal': macd_signal,
+        'macd_hist': macd_line - macd_signal,
+        'stoch_k': stoch_k,
+        'stoch_d': _rolling(stoch_k, c['stoch_d'], np.mean)
+    }
+
+
+def hybrid_votes(values: Dict[str, np.ndarray], close: np.ndarray,
+                 config: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    The hybrid rules' votes (+1 buy, -1 sell, 0 neutral) from indicator values
+
+    Works elementwise on arrays of any shape: the latest bar of many
+    instruments, or every bar of one instrument's history.
+    """
+    c = indicator_config(config, DEFAULT_BATCH_CONFIG)
+    with np.errstate(invalid='ignore'):
+        trending = (values['adx'] > c['adx_threshold'])
+        trend_up = trending & (values['ema_fast'] > values['ema_slow']) & (values['plus_di'] > values['minus_di'])
+        trend_down = trending & (values['ema_fast'] < values['ema_slow']) & (values['minus_di'] > values['plus_di'])
+        return {
+            'trend': trend_up.astype(int) - trend_down.astype(int),
+            'rsi': (values['rsi'] < c['rsi_oversold']).astype(int)
+                   - (values['rsi'] > c['rsi_overbought']).astype(int),
+            'macd': np.sign(np.nan_to_num(values['macd_hist'])).astype(int),
+            'bollinger': (close < values['bb_lower']).astype(int)
+                         - (close > values['bb_upper']).astype(int)
+        }
+
+
+def _sign(x: np.ndarray) -> np.ndarray:
+    return np.sign(np.nan_to_num(x)).astype(int)
+
+
+def momentum_votes(v: Dict[str, np.ndarray], close: np.ndarray, c: Dict) -> Dict[str, np.ndarray]:
+    """RSI on the trending side of 50 without being stretched, MACD histogram, stochastic cross"""
+    with np.errstate(invalid='ignore'):
+        rsi = ((v['rsi'] > 50) & (v['rsi'] < c['rsi_overbought'])).astype(int) \
+            - ((v['rsi'] < 50) & (v['rsi'] > c['rsi_oversold'])).astype(int)
+    return {'rsi': rsi, 'macd': _sign(v['macd_hist']), 'stochastic': _sign(v['stoch_k'] - v['stoch_d'])}
+
+
+def trend_votes(v: Dict[str, np.ndarray], close: np.ndarray, c: Dict) -> Dict[str, np.ndarray]:
+    """EMA alignment, DI lines and MACD, only counted while ADX shows a trend"""
+    with np.errstate(invalid='ignore'):
+        trending = (v['adx'] > c['adx_threshold']).astype(int)
+    return {
+        'ema': trending * _sign(v['ema_fast'] - v['ema_slow']),
+        'di': trending * _sign(v['plus_di'] - v['minus_di']),
+        'macd': trending * _sign(v['macd'])
+    }
+
+
+def mean_reversion_votes(v: Dict[str, np.ndarray], close: np.ndarray, c: Dict) -> Dict[str, np.ndarray]:
+    """Fade RSI extremes, Bollinger band breaks and stochastic extremes"""
+    with np.errstate(invalid='ignore'):
+        return {
+            'rsi': (v['rsi'] < c['rsi_oversold']).astype(int) - (v['rsi'] > c['rsi_overbought']).astype(int),
+            'bollinger': (close < v['bb_lower']).astype(int) - (close > v['bb_upper']).astype(int),
+            'stochastic': (v['stoch_k'] < 20).astype(int) - (v['stoch_k'] > 80).astype(int)
+        }
+
+
+# Vote rules per AlgorithmFactory algorithm name
+STRATEGY_VOTES: Dict[str, Callable] = {
+    'momentum': momentum_votes,
+    'trend': trend_votes,
+    'mean_reversion': mean_reversion_votes,
+    'hybrid': hybrid_votes
+}
+
+
+def stack_frames(frames: Dict[str, pd.DataFrame], bars: int = 200
+                 ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Align per-instrument candle DataFrames on time
+
+    Candles missing for an instrument are forward filled from its last
+    close (flat high/low), so every row covers the same timestamps.
+
+    Returns:
+        (instruments, times, high, low, close) with (instruments, bars) arrays
+    """
+    instruments = [name for name, df in frames.items() if not df.empty]
+    if not instruments:
+        empty = np.empty((0, 0))
+        return [], np.empty(0, dtype=object), empty, empty, empty
+
+    # Common case: same granularity, every instrument has the same candles
+    tails = [frames[name].iloc[-bars:] for name in instruments]
+    times = tails[0]['time'].values
+    if all(len(df) == len(times) and (df['time'].values == times).all() for df in tails[1:]):
+        def stacked(name: str) -> np.ndarray:
+            return np.vstack([df[name].values for df in tails]).astype(np.float64)
+        return instruments, times, stacked('high'), stacked('low'), stacked('close')
+
+    indexed = [frames[name].set_index('time') for name in instruments]
+    times = indexed[0].index
+    for df in indexed[1:]:
+        times = times.union(df.index)
+    times = times[-bars:]
+
+    def column(name: str) -> np.ndarray:
+        return np.vstack([df[name].reindex(times).values for df in indexed])
+
+    close = pd.DataFrame(column('close').T).ffill().values.T
+    high = np.where(np.isnan(column('high')), close, column('high'))
+    low = np.where(np.isnan(column('low')), close, column('low'))
+    return instruments, np.asarray(times, dtype=object), high, low, close
+
+
+class BatchAnalyzer:
+    """
+    An algorithm's signal rules evaluated for many instruments in one pass
+
+    Each instrument gets the votes of the algorithm's STRATEGY_VOTES
+    rules (for hybrid: trend confirmed by ADX and the DI lines, RSI
+    extremes, MACD histogram sign and Bollinger band breaks). The net
+    vote sets direction and confidence; stops and targets are placed in
+    multiples of ATR.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, algorithm: str = 'hybrid'):
+        """
+        Initialize the analyzer
+
+        Args:
+            config: Algorithm configuration (same keys as algorithm_config)
+            algorithm: Default vote rules (a STRATEGY_VOTES name)
+        """
+        self.config = indicator_config(config, DEFAULT_BATCH_CONFIG)
+        self.algorithm = algorithm
+
+    @staticmethod
+    def supports(algorithm: str) -> bool:
+        """True if the algorithm has vectorized vote rules"""
+        return algorithm in STRATEGY_VOTES
+
+    def analyze(self, frames: Dict[str, pd.DataFrame], prices: Optional[Dict[str, float]] = None,
+                bars: int = 200, algorithm: Optional[str] = None) -> Dict[str, TradingSignal]:
+        """Signals for every instrument with enough history"""
+        instruments, _, high, low, close = stack_frames(frames, bars)
+        if not instruments:
+            return {}
+
+        # Instruments with too little history would all share one short window
+        enough = [len(frames[name]) >= self.config['min_bars'] for name in instruments]
+        if not all(enough):
+            short = [name for name, ok in zip(instruments, enough) if not ok]
+            logger.debug(f"Not enough candles for batch analysis: {short}")
+            keep = np.array(enough)
+            instruments = [name for name, ok in zip(instruments, enough) if ok]
+            high, low, close = high[keep], low[keep], close[keep]
+            if not instruments:
+                return {}
+
+        return self.analyze_arrays(instruments, high, low, close, prices, algorithm)
+
+    def analyze_arrays(self, instruments: List[str], high: np.ndarray, low: np.ndarray,
+                       close: np.ndarray, prices: Optional[Dict[str, float]] = None,
+                       algorithm: Optional[str] = None) -> Dict[str, TradingSignal]:
+        """Signals from pre-aligned (instruments, bars) arrays"""
+        c = self.config
+        algorithm = algorithm or self.algorithm
+        if not self.supports(algorithm):
+            raise ValueError(f"No vectorized rules for algorithm {algorithm}; "
+                             f"choose from {', '.join(STRATEGY_VOTES)}")
+        values = {name: series[:, -1] for name, series in compute_indicators(high, low, close, c).items()}
+        last_close = close[:, -1]
+        prices = prices or {}
+        entry = np.array([prices.get(name) or last_close[i] for i, name in enumerate(instruments)])
+
+        votes = STRATEGY_VOTES[algorithm](values, last_close, c)
+        score = sum(votes.values()) / len(votes)
+
+        atr = np.nan_to_num(values['atr'])
+        stop_distance = atr * c['atr_stop_mult']
+        target_distance = atr * c['atr_target_mult']
+
+        signals = {}
+        for i, name in enumerate(instruments):
+            signal = self._classify(score[i])
+            direction = 1 if signal in (Signal.BUY, Signal.STRONG_BUY) else -1
+            if signal == Signal.HOLD:
+                stop_loss = take_profit = float(entry[i])
+            else:
+                stop_loss = float(entry[i] - direction * stop_distance[i])
+                take_profit = float(entry[i] + direction * target_distance[i])
+
+            reason = ', '.join(f"{vote} {votes[vote][i]:+d}" for vote in votes)
+            signals[name] = TradingSignal(
+                signal=signal,
+                confidence=float(abs(score[i])),
+                entry_price=float(entry[i]),
+                stop_loss=stop_loss,
+                take_profit=take_profit,
+                reason=f"Batch {algorithm}: {reason}",
+                indicators={key: float(series[i]) for key, series in values.items()}
+            )
+        return signals
+
+    @staticmethod
+    def _classify(score: float) -> Signal:
+        if score >= 0.75:
+            return Signal.STRONG_BUY
+        if score >= 0.5:
+            return Signal.BUY
+        if score <= -0.75:
+            return Signal.STRONG_SELL
+        if score <= -0.5:
+            return Signal.SELL
+        return Signal.HOLD
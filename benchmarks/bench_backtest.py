@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized backtester
+Checks trades against a naive bar-by-bar simulation, then times a year of
+M5 candles for each algorithm's rules
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import Backtester, STRATEGY_VOTES, strategy_signals
+from backtest.engine import pip_size
+from bench_indicators import make_candles
+
+M5_PER_YEAR = 52 * 5 * 288
+
+
+def naive_trades(df, signals, instrument, config):
+    """Bar-by-bar reference with the same fill rules; returns (entry, exit, reason, pnl) per trade"""
+    o, h, l, c = (df[name].values for name in ('open', 'high', 'low', 'close'))
+    half = config['spread_pips'] * pip_size(instrument) / 2
+    units = config['units']
+    trades, position, pending = [], None, 0
+
+    for i in range(len(df)):
+        if position is None and pending:
+            d, s = pending, i - 1
+            fill = o[i] + d * half
+            position = [i, d, fill, fill - d * signals.stop_distance[s], fill + d * signals.target_distance[s]]
+        pending = 0
+        if position is not None:
+            entry, d, fill, stop, target = position
+            exit_price = reason = None
+            if (l[i] <= stop) if d > 0 else (h[i] >= stop):
+                exit_price, reason = (o[i] if (o[i] - stop) * d < 0 else stop), 'stop_loss'
+            elif (h[i] >= target) if d > 0 else (l[i] <= target):
+                exit_price, reason = (o[i] if (o[i] - target) * d > 0 else target), 'take_profit'
+            if reason:
+                trades.append((entry, i, reason, d * units * (exit_price - d * half - fill)))
+                position = None
+            elif signals.direction[i] == -d and i + 1 < len(df):
+                exit_price = o[i + 1] - d * half
+                trades.append((entry, i + 1, 'reverse', d * units * (exit_price - fill)))
+                position = None
+        if position is None and signals.direction[i] != 0:
+            pending = int(signals.direction[i])
+    if position is not None:
+        entry, d, fill = position[:3]
+        trades.append((entry, len(df) - 1, 'end', d * units * (c[-1] - d * half - fill)))
+    return trades
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized backtester')
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--parity-candles', type=int, default=20000)
+    args = parser.parse_args()
+
+    df = make_candles(int(args.years * M5_PER_YEAR))
+    config = {'risk_per_trade': 0, 'units': 10000}
+    backtester = Backtester(config)
+
+    sample = df.iloc[:args.parity_candles].reset_index(drop=True)
+    for algorithm in STRATEGY_VOTES:
+        signals = strategy_signals(algorithm, sample)
+        result = backtester.run(sample, signals, 'EUR_USD')
+        expected = naive_trades(sample, signals, 'EUR_USD', backtester.config)
+        assert len(result.trades) == len(expected), (algorithm, len(result.trades), len(expected))
+        assert list(result.trades['reason']) == [t[2] for t in expected], algorithm
+        assert np.allclose(result.trades['pnl'].values, [t[3] for t in expected], rtol=1e-9, atol=1e-9), algorithm
+    print(f"Parity OK: trades match a bar-by-bar simulation for {', '.join(STRATEGY_VOTES)} "
+          f"({args.parity_candles:,} candles)")
+
+    print(f"\n{args.years:g} year(s) of M5 ({len(df):,} candles), 1% risk per trade:")
+    backtester = Backtester()
+    for algorithm in STRATEGY_VOTES:
+        start = time.perf_counter()
+        signals = strategy_signals(algorithm, df)
+        signal_s = time.perf_counter() - start
+        start = time.perf_counter()
+        result = backtester.run(df, signals, 'EUR_USD')
+        run_s = time.perf_counter() - start
+        print(f"{algorithm:<15} signals {signal_s:.2f}s + simulation {run_s:.2f}s = {signal_s + run_s:.2f}s  "
+              f"| {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
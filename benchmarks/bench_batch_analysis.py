@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched multi-instrument analysis
+Checks the 2-D indicators against the per-instrument pandas formulas, then
+compares wall time as the number of instruments grows
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_analysis import BatchAnalyzer, compute_indicators, stack_frames
+from streaming_indicators import batch_indicators
+from bench_indicators import ROUNDED_COLUMNS, make_candles
+
+
+def check_parity(frames):
+    instruments, _, high, low, close = stack_frames(frames)
+    batched = compute_indicators(high, low, close)
+    for i, name in enumerate(instruments):
+        expected = batch_indicators(frames[name])
+        for column, series in batched.items():
+            a, e = series[i], expected[column].values
+            if column in ROUNDED_COLUMNS:
+                ok = np.allclose(a, e, rtol=1e-9, atol=1e-12, equal_nan=True)
+            else:
+                ok = np.array_equal(a, e, equal_nan=True)
+            assert ok, f"{name} {column} differs from the per-instrument formula"
+    print(f"Parity OK for {len(instruments)} instruments")
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched vs per-instrument analysis')
+    parser.add_argument('--counts', type=int, nargs='+', default=[2, 10, 28, 50])
+    parser.add_argument('--bars', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    universe = {f"PAIR_{i:02d}": make_candles(args.bars, seed=i) for i in range(max(args.counts))}
+    check_parity(dict(list(universe.items())[:4]))
+
+    analyzer = BatchAnalyzer()
+    print(f"{'instruments':>11} {'per-instr ms':>13} {'batched ms':>11} {'+signals ms':>12}")
+    for count in args.counts:
+        frames = dict(list(universe.items())[:count])
+        instruments, _, high, low, close = stack_frames(frames)
+
+        loop_ms = best_of(lambda: [batch_indicators(df) for df in frames.values()], args.repeat)
+        batch_ms = best_of(lambda: compute_indicators(high, low, close), args.repeat)
+        signal_ms = best_of(lambda: analyzer.analyze(frames), args.repeat)
+        print(f"{count:>11} {loop_ms:>13.1f} {batch_ms:>11.1f} {signal_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark candle decoding
+Compares the original dict-per-candle parse with the vectorized decoder
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_codec import decode_candles, ns_to_rfc3339, orjson
+
+
+def make_response(count: int, components: str = 'M') -> bytes:
+    """Synthetic OANDA candles response as raw bytes (price=M or MBA)"""
+    rng = np.random.default_rng(42)
+    closes = 1.1 + np.cumsum(rng.normal(0, 0.0002, count))
+    times = ns_to_rfc3339(np.datetime64('2024-01-01', 'ns').astype(np.int64)
+                          + np.arange(count, dtype=np.int64) * 300_000_000_000)
+
+    candles = []
+    for t, c in zip(times.tolist(), closes):
+        price = {'o': f"{c:.5f}", 'h': f"{c + 0.0003:.5f}", 'l': f"{c - 0.0003:.5f}", 'c': f"{c:.5f}"}
+        candle = {'complete': True, 'volume': int(rng.integers(1, 500)), 'time': t, 'mid': price}
+        if components == 'MBA':
+            candle['bid'] = price
+            candle['ask'] = price
+        candles.append(candle)
+    return json.dumps({'instrument': 'EUR_USD', 'granularity': 'M5', 'candles': candles}).encode()
+
+
+def legacy_parse(raw: bytes) -> pd.DataFrame:
+    """The original get_historical_prices parse"""
+    data = json.loads(raw)
+    candles = []
+    for candle in data['candles']:
+        candles.append({
+            'time': candle['time'],
+            'open': float(candle['mid']['o']),
+            'high': float(candle['mid']['h']),
+            'low': float(candle['mid']['l']),
+            'close': float(candle['mid']['c']),
+            'volume': candle['volume']
+        })
+    return pd.DataFrame(candles)
+
+
+def best_of(func, raw: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(raw)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark candle decoding')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"JSON decoder: {'orjson' if orjson is not None else 'json (install orjson for more speed)'}")
+    print("legacy MBA: original parse of the original price=MBA response")
+    print("legacy/arrays/frame: price=M response, dict parse vs typed arrays vs DataFrame from columns")
+    print(f"{'candles':>8} {'legacy MBA':>11} {'legacy ms':>10} {'arrays ms':>10} {'frame ms':>10} {'speedup':>8}")
+
+    for size in args.sizes:
+        raw = make_response(size)
+        raw_mba = make_response(size, 'MBA')
+
+        # Both paths must produce the same numbers
+        expected = legacy_parse(raw)
+        actual = decode_candles(raw).to_dataframe()
+        assert np.array_equal(expected['close'].values, actual['close'].values)
+        assert list(expected['time']) == list(actual['time'])
+
+        legacy_mba_ms = best_of(legacy_parse, raw_mba, args.repeat)
+        legacy_ms = best_of(legacy_parse, raw, args.repeat)
+        arrays_ms = best_of(decode_candles, raw, args.repeat)
+        frame_ms = best_of(lambda r: decode_candles(r).to_dataframe(), raw, args.repeat)
+
+        print(f"{size:>8} {legacy_mba_ms:>11.2f} {legacy_ms:>10.2f} {arrays_ms:>10.2f} {frame_ms:>10.2f} "
+              f"{legacy_mba_ms / frame_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+End-to-end trading cycle benchmark
+Runs ForexTradingBot against the local OANDA stand-in with injected latency
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forex_bot import ForexTradingBot
+from local_oanda import CandleMarket, LocalOandaServer, V20Simulator
+
+ACCOUNT_ID = '101-001-0000000-001'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark execute_trading_cycle against a local server')
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--instruments', default='EUR_USD,GBP_USD,USD_JPY,AUD_USD')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Injected latency per REST call')
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--serial', action='store_true', help='Disable concurrent instrument analysis')
+    parser.add_argument('--batch', action='store_true', help='Score all instruments in one vectorized pass')
+    parser.add_argument('--no-stream', action='store_true', help='Poll prices instead of streaming')
+    parser.add_argument('--no-incremental-state', action='store_true', help='Poll /summary instead of /changes')
+    parser.add_argument('--record', metavar='PATH', help='Capture all REST traffic to PATH')
+    parser.add_argument('--replay', metavar='PATH', help='Serve REST traffic from a capture instead of the server')
+    parser.add_argument('--replay-speed', type=float, default=1.0, help='Replay latency divisor (0 = no waiting)')
+    args = parser.parse_args()
+
+    instruments = args.instruments.split(',')
+    market = CandleMarket.synthetic(instruments, time.time_ns())
+    simulator = V20Simulator(market, ACCOUNT_ID)
+
+    transport_config = {'record_path': args.record, 'replay_path': args.replay,
+                        'replay_speed': args.replay_speed}
+    if args.record or args.replay:
+        # Stream traffic is not captured; poll so the replay sees every request
+        args.no_stream = True
+
+    with LocalOandaServer(simulator, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms) as server:
+        bot = ForexTradingBot(ACCOUNT_ID, 'local-token', base_url=server.base_url,
+                              transport_config=transport_config)
+        bot.instruments = instruments
+        bot.max_positions = len(instruments)
+        bot.execution_config['concurrent_analysis'] = not args.serial
+        bot.execution_config['batch_analysis'] = args.batch
+        # Start every run from the API, not candles persisted by an earlier run
+        bot.candle_store = None
+        if args.no_incremental_state:
+            bot.account_model = None
+
+        if not args.no_stream:
+            bot.start_price_stream()
+            # Give the stream time to deliver a first quote for every instrument
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and len(bot.price_stream.quotes) < len(instruments):
+                time.sleep(0.05)
+
+        timings = []
+        for _ in range(args.cycles):
+            calls_before = bot.transport.total_calls
+            start = time.perf_counter()
+            bot.execute_trading_cycle()
+            timings.append((time.perf_counter() - start) * 1000)
+            # Make every cycle revalidate its candles, as a real 5-minute cycle would
+            bot.candle_buffer._updated_at.clear()
+
+        bot.stop_price_stream()
+        report = bot.transport.latency_report()
+        bot.transport.close()
+
+    timings.sort()
+    print(f"\nCycles: {args.cycles}, instruments: {len(instruments)}, latency: {args.latency_ms}ms "
+          f"(+{args.jitter_ms}ms jitter), concurrent: {not args.serial}, stream: {not args.no_stream}")
+    print(f"Cycle ms - mean: {statistics.mean(timings):.1f}, p50: {timings[len(timings) // 2]:.1f}, "
+          f"p95: {timings[int(len(timings) * 0.95) - 1]:.1f}, max: {timings[-1]:.1f}")
+    print(f"Last cycle API calls: {bot.transport.total_calls - calls_before}")
+    if args.record:
+        print(f"Recorded {bot.transport.capture.records} requests to {args.record}")
+    if args.replay:
+        adapter = bot.transport.session.get_adapter(server.base_url)
+        print(f"Replayed {adapter.served} requests ({adapter.fallbacks} loose matches, {adapter.misses} misses)")
+    print(f"\n{'endpoint':<16} {'calls':>6} {'avg ms':>8} {'max ms':>8} {'wait ms':>8} {'coalesced':>9}")
+    for name, stats in report.items():
+        print(f"{name:<16} {stats['calls']:>6} {stats['avg_ms']:>8.1f} {stats['max_ms']:>8.1f} "
+              f"{stats['avg_wait_ms']:>8.1f} {stats['coalesced']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared indicator graph
+Checks parity with the batch formulas and compares the hybrid sub-strategies
+computing their indicators separately against one shared graph run
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicator_graph import HYBRID_REQUIREMENTS, hybrid_graph
+from streaming_indicators import batch_indicators
+from bench_indicators import ROUNDED_COLUMNS, make_candles
+
+
+def separate(graph, df):
+    """Each sub-strategy recomputes everything it needs on its own"""
+    for requirements in HYBRID_REQUIREMENTS.values():
+        graph.run_frame(df).compute(requirements)
+
+
+def shared(graph, df):
+    run = graph.run_frame(df)
+    for requirements in HYBRID_REQUIREMENTS.values():
+        run.compute(requirements)
+    return run
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the shared indicator graph')
+    parser.add_argument('--bars', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_candles(args.bars)
+    graph = hybrid_graph()
+
+    expected = batch_indicators(df)
+    run = graph.run_frame(df)
+    for column in expected.columns:
+        a, e = run[column], expected[column].values
+        if column in ROUNDED_COLUMNS:
+            assert np.allclose(a, e, rtol=1e-9, atol=1e-12, equal_nan=True), column
+        else:
+            assert np.array_equal(a, e, equal_nan=True), column
+    print(f"Parity OK for {len(expected.columns)} indicators")
+
+    run = shared(graph, df)
+    print(f"\nShared run over {args.bars} bars ({len(run.timings)} nodes computed once):")
+    print(f"{'node':<24} {'ms':>7} {'requests':>9}  deps")
+    for row in run.report():
+        print(f"{row['node']:<24} {row['ms']:>7.3f} {row['requests']:>9}  {', '.join(row['deps'])}")
+
+    separate_ms = best_of(lambda: separate(graph, df), args.repeat)
+    shared_ms = best_of(lambda: shared(graph, df), args.repeat)
+    print(f"\nSub-strategies computing separately: {separate_ms:.2f}ms, shared graph: {shared_ms:.2f}ms "
+          f"({separate_ms / shared_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming indicators
+Compares the per-candle cost of the streaming engine with recomputing the
+pandas batch formulas (parity is covered by tests/test_streaming_indicators.py)
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_codec import ns_to_rfc3339
+from streaming_indicators import IndicatorEngine, batch_indicators
+
+# Welford sliding windows agree with pandas' compensated sums only to rounding
+ROUNDED_COLUMNS = {'bb_upper', 'bb_middle', 'bb_lower', 'stoch_d'}
+
+
+def make_candles(count: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    # Flat candles exercise the zero-range paths
+    spread[rng.random(count) < 0.02] = 0.0
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    times = ns_to_rfc3339(np.datetime64('2024-01-01', 'ns').astype(np.int64)
+                          + np.arange(count, dtype=np.int64) * 300_000_000_000)
+    return pd.DataFrame({'time': times.astype(object), 'open': open_, 'high': high, 'low': low,
+                         'close': close, 'volume': rng.integers(1, 500, count)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming vs batch indicators')
+    parser.add_argument('--candles', type=int, default=5000)
+    parser.add_argument('--window', type=int, default=200, help='Candles the strategy sees per cycle')
+    parser.add_argument('--steps', type=int, default=500)
+    args = parser.parse_args()
+
+    df = make_candles(args.candles + args.steps)
+
+    # Per new candle: full recompute over the window vs one engine update
+    start = time.perf_counter()
+    for i in range(args.candles, args.candles + args.steps):
+        batch_indicators(df.iloc[i - args.window:i + 1])
+    batch_us = (time.perf_counter() - start) / args.steps * 1e6
+
+    engine = IndicatorEngine()
+    engine.update(df.iloc[args.candles - args.window:args.candles])
+    start = time.perf_counter()
+    for i in range(args.candles, args.candles + args.steps):
+        engine.update(df.iloc[i - args.window:i + 1])
+    stream_us = (time.perf_counter() - start) / args.steps * 1e6
+
+    print(f"Per candle, {args.window}-candle window: batch {batch_us:.0f}us, "
+          f"streaming {stream_us:.0f}us ({batch_us / stream_us:.1f}x), engine resets: {engine.resets}")
+
+
+if __name__ == "__main__":
+    main()
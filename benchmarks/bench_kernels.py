@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark indicator kernels
+Times each kernel on every available backend (parity with the pandas reference
+is covered by tests/test_indicator_kernels.py)
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicator_kernels as kernels
+
+
+def make_series(count: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    # Flat runs exercise the constant-series and zero-range paths
+    flat = rng.random(count) < 0.02
+    close[1:][flat[1:]] = close[:-1][flat[1:]]
+    spread[flat] = 0.0
+    return close + spread, close - spread, close
+
+
+def kernel_calls(high, low, close, with_nans):
+    calls = {
+        'ema': lambda: kernels.ema(with_nans, 20),
+        'wilder': lambda: kernels.wilder(with_nans, 14),
+        'true_range': lambda: kernels.true_range(high, low, close),
+        'atr': lambda: kernels.atr(high, low, close, 14),
+        'rsi': lambda: kernels.rsi(close, 14),
+        'adx': lambda: kernels.adx(high, low, close, 14),
+        'rolling_max': lambda: kernels.rolling_max(high, 14),
+        'rolling_min': lambda: kernels.rolling_min(low, 14)
+    }
+    return calls
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark indicator kernel backends')
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backends = [b for b in kernels.BACKENDS if b != 'numba' or kernels.numba is not None]
+    if kernels.numba is None:
+        print("Numba is not installed; only the reference backend is available")
+
+    high, low, close = make_series(args.bars)
+    calls = kernel_calls(high, low, close, close)
+    timings = {}
+    for backend in backends:
+        kernels.set_backend(backend)
+        for call in calls.values():
+            call()  # compile / warm up
+        timings[backend] = {name: best_of(call, args.repeat) for name, call in calls.items()}
+
+    print(f"\n{args.bars:,} bars, best of {args.repeat} (ms)")
+    print(f"{'kernel':<12} " + ' '.join(f"{b:>9}" for b in backends) + (f" {'speedup':>8}" if len(backends) > 1 else ''))
+    for name in calls:
+        row = f"{name:<12} " + ' '.join(f"{timings[b][name]:>9.1f}" for b in backends)
+        if len(backends) > 1:
+            row += f" {timings['numpy'][name] / timings['numba'][name]:>7.1f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
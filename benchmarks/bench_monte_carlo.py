@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Monte Carlo trade-sequence simulator
+Checks the block-at-a-time path evaluation against a trade-by-trade
+simulation and the Kelly stake against a grid search, then times 10k paths
+of 500 trades
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monte_carlo import TradeMonteCarlo, kelly_fraction, simulate_paths
+
+
+def sample_outcomes(n: int, seed: int = 1) -> np.ndarray:
+    """R multiples of a 2:1 strategy winning 40% of the time, with some slippage"""
+    rng = np.random.default_rng(seed)
+    wins = rng.random(n) < 0.4
+    return np.where(wins, rng.normal(2.0, 0.3, n), rng.normal(-1.0, 0.1, n))
+
+
+def naive_paths(steps: np.ndarray, starts: np.ndarray, horizon: int, block_size: int):
+    """Trade-by-trade reference: expand the blocks and scan every path"""
+    offsets = np.arange(block_size)
+    index = ((starts.T[:, :, None] + offsets) % len(steps)).reshape(starts.shape[1], -1)[:, :horizon]
+    level = np.cumsum(steps[index], axis=1)
+    peak = np.maximum(np.maximum.accumulate(level, axis=1), 0)
+    return level[:, -1], np.minimum(level.min(axis=1), 0), (peak - level).max(axis=1)
+
+
+def best_of(call, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Monte Carlo trade-sequence simulator')
+    parser.add_argument('--trades', type=int, default=500, help='Recorded outcomes resampled')
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--horizon', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    outcomes = sample_outcomes(args.trades)
+    rng = np.random.default_rng(2)
+    for fraction in (0.01, 0.2, 0.9):
+        with np.errstate(divide='ignore'):
+            steps = np.log(np.maximum(1 + fraction * outcomes, 0))
+        for block_size, horizon in ((1, 97), (10, 500), (7, 500), (500, 500)):
+            starts = rng.integers(0, len(outcomes), (-(-horizon // block_size), 300), dtype=np.int32)
+            actual = simulate_paths(steps, starts, horizon, block_size)
+            for name, expected in zip(('final', 'low', 'drawdown'),
+                                      naive_paths(steps, starts, horizon, block_size)):
+                assert np.allclose(actual[name], expected, rtol=1e-9, atol=1e-9, equal_nan=True), \
+                    (name, fraction, block_size)
+
+    grid = np.linspace(0, 0.99 / -outcomes.min(), 20001)
+    growth = np.log1p(grid[:, None] * outcomes).mean(axis=1)
+    assert abs(kelly_fraction(outcomes) - grid[growth.argmax()]) <= grid[1]
+    print("Parity OK: block-at-a-time paths match a trade-by-trade simulation; "
+          f"Kelly stake {kelly_fraction(outcomes):.3f} matches a grid search")
+
+    print(f"\n{args.paths:,} paths x {args.horizon} trades resampled from {args.trades} outcomes:")
+    for block_size in (1, 5, 10, 20):
+        mc = TradeMonteCarlo({'paths': args.paths, 'horizon': args.horizon,
+                              'block_size': block_size, 'seed': 0})
+        starts = mc.sample_starts(len(outcomes))
+        simulate_ms = best_of(lambda: mc.simulate(outcomes, 0.01, starts), args.repeat)
+        recommend_ms = best_of(lambda: mc.recommend(outcomes), args.repeat)
+        result = mc.recommend(outcomes)
+        label = 'bootstrap' if block_size == 1 else f"block {block_size}"
+        print(f"{label:<10} simulate {simulate_ms:6.1f}ms  recommend {recommend_ms:6.1f}ms  | {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark local multi-timeframe resampling
+Checks resampled candles against a pandas reference in the alignment timezone
+(across DST changes and weekend gaps), then times incremental updates
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_resampler import CandleResampler, resample
+from candle_store import CANDLE_DTYPE
+from bench_indicators import make_candles
+
+TARGETS = ['M15', 'M30', 'H1', 'H4', 'H12', 'D', 'W']
+TZ = 'America/New_York'
+
+
+def market_candles(days: int, seed: int = 1) -> np.ndarray:
+    """M5 candles from 2024-01-01 with the weekend close and a few tickless candles removed"""
+    df = make_candles(days * 288, seed)
+    times = pd.to_datetime(df['time'].str.rstrip('Z')).values.astype('datetime64[ns]').astype(np.int64)
+    # Shift the session by 17h so the trading week runs Monday to Friday
+    session = (pd.DatetimeIndex(times).tz_localize('UTC').tz_convert(TZ).tz_localize(None)
+               + pd.Timedelta(hours=7))
+    rng = np.random.default_rng(seed)
+    keep = (session.dayofweek < 5) & (rng.random(len(df)) > 0.03)
+
+    records = np.empty(int(keep.sum()), dtype=CANDLE_DTYPE)
+    records['time'] = times[keep]
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        records[column] = df[column].values[keep]
+    return records
+
+
+def reference(records: np.ndarray, target: str) -> pd.DataFrame:
+    """Group with pandas calendar arithmetic on local wall-clock time"""
+    utc = pd.DatetimeIndex(records['time'].astype('datetime64[ns]')).tz_localize('UTC')
+    if target in ('M15', 'M30'):
+        starts = utc.floor(target.replace('M', '') + 'min')
+    else:
+        local = utc.tz_convert(TZ).tz_localize(None) - pd.Timedelta(hours=17)
+        if target == 'W':
+            day = local.normalize()
+            local_start = day - pd.to_timedelta((day.dayofweek - 4) % 7, unit='D')
+        elif target == 'D':
+            local_start = local.normalize()
+        else:
+            local_start = local.floor(target.replace('H', '') + 'h')
+        starts = (local_start + pd.Timedelta(hours=17)).tz_localize(TZ).tz_convert('UTC')
+
+    df = pd.DataFrame({name: records[name] for name in ('open', 'high', 'low', 'close', 'volume')})
+    df['start'] = starts.tz_localize(None).values.astype('datetime64[ns]').astype(np.int64)
+    return df.groupby('start', sort=True).agg(open=('open', 'first'), high=('high', 'max'),
+                                              low=('low', 'min'), close=('close', 'last'),
+                                              volume=('volume', 'sum'))
+
+
+def check_parity(records: np.ndarray):
+    for target in TARGETS:
+        candles, complete = resample(records, 'M5', target)
+        expected = reference(records, target)
+        assert np.array_equal(candles['time'], expected.index.values), target
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            assert np.array_equal(candles[column], expected[column].values), (target, column)
+        assert complete[:-1].all()
+
+        # Feeding the same candles in uneven chunks gives the same result
+        resampler = CandleResampler('M5', max_size=len(records))
+        rng = np.random.default_rng(2)
+        cuts = np.sort(rng.choice(len(records), size=200, replace=False))
+        for chunk in np.split(records, cuts):
+            resampler.update('EUR_USD', target, chunk)
+        incremental = resampler.records('EUR_USD', target, len(candles))
+        assert np.array_equal(incremental, candles), target
+    print(f"Parity OK for {', '.join(TARGETS)} over {len(records):,} M5 candles (incl. DST changes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark local multi-timeframe resampling')
+    parser.add_argument('--days', type=int, default=400)
+    parser.add_argument('--count', type=int, default=200, help='Candles requested per call')
+    args = parser.parse_args()
+
+    records = market_candles(args.days)
+    check_parity(records)
+
+    print(f"\nPer new M5 candle: update folds it in, window also builds the {args.count}-candle DataFrame")
+    print(f"{'target':<6} {'full resample':>14} {'update':>9} {'+ window':>9}")
+    for target in TARGETS:
+        start = time.perf_counter()
+        resample(records, 'M5', target)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        resampler = CandleResampler('M5')
+        split = len(records) - 1000
+        resampler.update('EUR_USD', target, records[:split - 1000])
+        start = time.perf_counter()
+        for i in range(split - 1000, split):
+            resampler.update('EUR_USD', target, records[i:i + 1])
+        update_us = (time.perf_counter() - start) / 1000 * 1e6
+        start = time.perf_counter()
+        for i in range(split, len(records)):
+            resampler.update('EUR_USD', target, records[i:i + 1])
+            resampler.window('EUR_USD', target, args.count)
+        window_us = (time.perf_counter() - start) / 1000 * 1e6
+        print(f"{target:<6} {full_ms:>12.1f}ms {update_us:>7.0f}us {window_us:>7.0f}us")
+
+
+if __name__ == "__main__":
+    main()
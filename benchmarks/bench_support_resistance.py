@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark support/resistance detection
+Compares the incremental engine and the vectorized history scan with a naive
+per-candle recomputation (their parity is covered by tests/test_support_resistance.py)
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from support_resistance import DEFAULT_SR_CONFIG, SupportResistance, scan_levels
+from bench_indicators import make_candles
+
+M5_PER_YEAR = 52 * 5 * 288
+
+
+def naive_nearest(high, low, close, t, lookback, threshold, window):
+    """Recompute pivots in the lookback window and cluster pairwise"""
+    pivots = []
+    for c in range(max(t - lookback + 1, window), t - window + 1):
+        neighbours = range(c - window, c + window + 1)
+        if all(high[c] >= high[j] for j in neighbours):
+            pivots.append(high[c])
+        if all(low[c] <= low[j] for j in neighbours):
+            pivots.append(low[c])
+    # Pairwise merging: repeatedly join any two members within the threshold
+    groups = [[p] for p in pivots]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                if any(abs(a - b) / min(a, b) <= threshold for a in groups[i] for b in groups[j]):
+                    groups[i] += groups.pop(j)
+                    merged = True
+                    break
+            if merged:
+                break
+    levels = sorted(sum(g) / len(g) for g in groups)
+    below = [lvl for lvl in levels if lvl <= close[t]]
+    above = [lvl for lvl in levels if lvl > close[t]]
+    return (below[-1] if below else None), (above[0] if above else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark support/resistance detection')
+    parser.add_argument('--years', type=float, default=3.0, help='M5 history to scan')
+    parser.add_argument('--naive-candles', type=int, default=2000)
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_SR_CONFIG)
+    df = make_candles(int(args.years * M5_PER_YEAR))
+    high, low, close = df['high'].values, df['low'].values, df['close'].values
+
+    n = args.naive_candles
+    start = time.perf_counter()
+    for t in range(n):
+        naive_nearest(high, low, close, t, config['lookback_period'], config['sr_threshold'],
+                      config['pivot_window'])
+    naive_us = (time.perf_counter() - start) / n * 1e6
+
+    engine = SupportResistance(config)
+    start = time.perf_counter()
+    for t in range(n):
+        engine.update(high[t], low[t])
+        engine.nearest(close[t])
+    engine_us = (time.perf_counter() - start) / n * 1e6
+
+    start = time.perf_counter()
+    scan = scan_levels(high, low, close, config)
+    scan_s = time.perf_counter() - start
+
+    print(f"Per candle: naive {naive_us:.0f}us, incremental {engine_us:.1f}us ({naive_us / engine_us:.0f}x)")
+    print(f"Scan of {args.years:g} years of M5 ({len(close):,} candles): {scan_s:.2f}s "
+          f"(naive estimate {naive_us * len(close) / 1e6:.0f}s); "
+          f"{np.isfinite(scan['support']).mean():.0%} of candles have a support level")
+
+
+if __name__ == "__main__":
+    main()
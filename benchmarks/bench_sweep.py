@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the parallel parameter sweep
+Checks pooled results against serial backtests on the original DataFrames,
+then times the same grid with 1..N workers
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CANDLE_DTYPE
+from backtest import Backtester, strategy_signals
+from backtest.sweep import ParameterSweep, SharedCandles, parameter_grid, params_key
+from bench_indicators import make_candles
+from candle_codec import rfc3339_to_ns
+
+M5_PER_YEAR = 52 * 5 * 288
+
+GRID = {
+    'rsi_period': [10, 14, 21],
+    'ema_fast': [8, 12, 20],
+    'ema_slow': [26, 50],
+    'atr_multiplier': [1.5, 2.0]
+}
+
+
+def records(df) -> np.ndarray:
+    out = np.empty(len(df), dtype=CANDLE_DTYPE)
+    out['time'] = rfc3339_to_ns(df['time'].values)
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        out[name] = df[name].values
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parallel parameter sweep')
+    parser.add_argument('--years', type=float, default=0.5)
+    parser.add_argument('--instruments', default='EUR_USD,USD_JPY')
+    parser.add_argument('--workers', default=None, help='Comma-separated worker counts (default: 1..CPU count)')
+    args = parser.parse_args()
+
+    instruments = args.instruments.split(',')
+    frames = {instrument: make_candles(int(args.years * M5_PER_YEAR), seed=i + 1)
+              for i, instrument in enumerate(instruments)}
+    candles = {instrument: records(df) for instrument, df in frames.items()}
+    combos = parameter_grid(GRID)
+
+    shared = SharedCandles.create(candles)
+    try:
+        for instrument, df in frames.items():
+            view = shared.frame(instrument)
+            assert np.shares_memory(view['close'].values, shared.columns(instrument)['close'])
+            assert (view['close'].values == df['close'].values).all()
+    finally:
+        shared.close()
+        shared.unlink()
+
+    sample = combos[::max(1, len(combos) // 4)]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'sweep.jsonl')
+        sweep = ParameterSweep(candles, workers=2)
+        pooled = {params_key(r['instrument'], r['params']): r['stats'] for r in sweep.run(sample, output)}
+        with open(output) as f:
+            assert sum(1 for _ in f) == len(pooled) == len(sample) * len(instruments)
+        # Resuming a finished sweep has nothing left to run
+        assert not list(sweep.run(sample, output, resume=True))
+
+    backtester = Backtester()
+    for params in sample:
+        for instrument, df in frames.items():
+            expected = backtester.run(df, strategy_signals('hybrid', df, params), instrument).stats
+            assert json.loads(json.dumps(expected)) == pooled[params_key(instrument, params)], (instrument, params)
+    print(f"Parity OK: pooled results match serial backtests ({len(pooled)} backtests)")
+
+    cpus = os.cpu_count() or 1
+    counts = ([int(w) for w in args.workers.split(',')] if args.workers
+              else sorted({1, 2, cpus} | {w for w in (4, 8, 16) if w < cpus}))
+    tasks = len(combos) * len(instruments)
+    print(f"\n{len(combos)} combinations x {len(instruments)} instruments = {tasks} backtests "
+          f"of {args.years:g} year(s) of M5 on {cpus} CPU(s):")
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        for _ in ParameterSweep(candles, workers=workers).run(combos):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>3} workers: {elapsed:6.2f}s  {tasks / elapsed:6.1f} backtests/s  "
+              f"speedup {baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark the volatility baseline
+Checks the incremental service against the batch formula over sliding
+200-candle windows, then compares per-cycle cost with the old range-based
+"average ATR"
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming_indicators import volatility_baseline
+from volatility import VolatilityService
+from bench_indicators import make_candles
+
+
+def old_avg_atr(df) -> float:
+    """What generate_signal_advanced used to compare the ATR with"""
+    return (df['high'].rolling(20).max() - df['low'].rolling(20).min()).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the volatility baseline')
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--window', type=int, default=200)
+    args = parser.parse_args()
+
+    df = make_candles(args.cycles + args.window)
+    expected = volatility_baseline(df['high'], df['low'], df['close'])
+
+    windows = [df.iloc[end - args.window:end] for end in range(args.window, len(df) + 1)]
+
+    service = VolatilityService()
+    ratios = []
+    for window in windows:
+        values = service.update('EUR_USD', window)
+        row = expected.loc[window.index[-1]]
+        for column in ('true_range', 'atr', 'atr_baseline'):
+            assert np.isclose(values[column], row[column], rtol=1e-9, atol=0, equal_nan=True), column
+        ratios.append(values['atr'] / values['atr_baseline'])
+    print(f"Parity OK: service matches the batch formula over {len(windows)} cycles")
+
+    service = VolatilityService()
+    start = time.perf_counter()
+    for window in windows:
+        service.update('EUR_USD', window)
+    service_us = (time.perf_counter() - start) / len(windows) * 1e6
+
+    start = time.perf_counter()
+    old = [old_avg_atr(window) for window in windows]
+    old_us = (time.perf_counter() - start) / len(windows) * 1e6
+
+    old_ratio = expected['atr'].values[args.window - 1:] / np.array(old)
+    print(f"Per cycle: rolling range {old_us:.0f}us, incremental baseline {service_us:.0f}us "
+          f"({old_us / service_us:.0f}x)")
+    print(f"ATR / baseline: mean {np.nanmean(ratios):.2f}; "
+          f"ATR / old 20-candle range: mean {np.nanmean(old_ratio):.2f} "
+          f"(the range is not on the ATR's scale)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark walk-forward optimization
+Checks cached indicators and sliced window statistics against uncached
+signals and per-window BacktestResults, checks that choices only use past
+data, then times a five-year, 60-window run against recomputing every window
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestResult, strategy_signals
+from backtest.sweep import parameter_grid
+from backtest.walk_forward import WINDOW_STATS, WalkForward
+from bench_indicators import make_candles
+
+M5_PER_DAY = 288
+
+GRID = {
+    'rsi_period': [10, 14, 21],
+    'ema_fast': [8, 12],
+    'bb_std': [2.0, 2.5],
+    'atr_stop_mult': [1.5, 2.0]
+}
+
+
+def check_cache(walk: WalkForward, combos):
+    """Signals from the shared indicator cache equal signals computed from scratch"""
+    for params in combos:
+        cached = strategy_signals(walk.algorithm, walk.frame, params, walk.indicator_cache)
+        fresh = strategy_signals(walk.algorithm, walk.frame, params)
+        for a, b in zip(cached, fresh):
+            np.testing.assert_array_equal(a, b)
+
+
+def check_window_stats(walk: WalkForward, combos, windows):
+    """Window statistics read from a full-history run equal BacktestResult on the same slice"""
+    for params in combos:
+        run = walk.run_combo(params)
+        for w in windows:
+            base = run.equity[w.in_start - 1] if w.in_start > 0 else walk.backtester.config['initial_balance']
+            lo, hi = np.searchsorted(run.entry_bar, [w.in_start, w.in_end])
+            index = pd.to_datetime(walk.times[w.in_start:w.in_end], unit='ns', utc=True)
+            expected = BacktestResult(walk.instrument, run.trades.iloc[lo:hi],
+                                      pd.Series(run.equity[w.in_start:w.in_end], index=index), base).stats
+            actual = walk.window_stats(run, w.in_start, w.in_end)
+            for name in WINDOW_STATS:
+                assert np.isclose(actual[name], expected[name], rtol=1e-9, atol=1e-12), (name, params, w)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark walk-forward optimization')
+    parser.add_argument('--years', type=float, default=5.0)
+    parser.add_argument('--in-sample-days', type=float, default=365)
+    parser.add_argument('--out-of-sample-days', type=float, default=24)
+    parser.add_argument('--naive-samples', type=int, default=6, help='Windows timed without caching')
+    args = parser.parse_args()
+
+    df = make_candles(int(args.years * 365 * M5_PER_DAY))
+    combos = parameter_grid(GRID)
+    config = {'in_sample_days': args.in_sample_days, 'out_of_sample_days': args.out_of_sample_days}
+    walk = WalkForward(df, 'EUR_USD', config=config)
+    windows = walk.windows()
+
+    check_cache(walk, combos[:4])
+    check_window_stats(walk, combos[:2], windows[::10])
+    print("Parity OK: cached indicators and sliced window statistics match uncached runs")
+
+    # Truncating the data after a window's first out-of-sample bar leaves its choice unchanged
+    small = combos[:4]
+    full = WalkForward(df, 'EUR_USD', config=config).run(small).windows
+    k = len(windows) // 2
+    cut = WalkForward(df.iloc[:windows[k].out_start + 1], 'EUR_USD', config=config).run(small).windows
+    assert list(cut['params']) == list(full['params'][:k + 1])
+    print(f"No lookahead: choices for windows 0-{k} unchanged with later data removed")
+
+    walk = WalkForward(df, 'EUR_USD', config=config)
+    start = time.perf_counter()
+    result = walk.run(combos)
+    elapsed = time.perf_counter() - start
+
+    # Without caching: signals and a backtest per window and combination, on the window's candles
+    sample = windows[::max(1, len(windows) // args.naive_samples)][:args.naive_samples]
+    start = time.perf_counter()
+    for w in sample:
+        window_df = df.iloc[w.in_start:w.in_end].reset_index(drop=True)
+        for params in combos:
+            walk.backtester.run_strategy(walk.algorithm, window_df, 'EUR_USD', params)
+    naive = (time.perf_counter() - start) / len(sample) * len(windows)
+
+    print(f"\n{args.years:g} years of M5 ({len(df):,} candles), {len(windows)} windows "
+          f"({args.in_sample_days:g}d in-sample / {args.out_of_sample_days:g}d out-of-sample), "
+          f"{len(combos)} combinations:")
+    print(f"walk-forward {elapsed:.1f}s ({len(walk.indicator_cache)} indicator nodes cached) vs "
+          f"~{naive:.0f}s recomputing every window ({naive / elapsed:.0f}x)")
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
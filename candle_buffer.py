@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Rolling per-instrument candle buffers
+Keeps recent candles in memory so each cycle only fetches what has changed
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candle_codec import CANDLE_COLUMNS, decode_candles
+from clock import Clock
+
+
+# Candle length in seconds for each OANDA granularity
+GRANULARITY_SECONDS = {
+    'S5': 5, 'S10': 10, 'S15': 15, 'S30': 30,
+    'M1': 60, 'M2': 120, 'M4': 240, 'M5': 300, 'M10': 600, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H2': 7200, 'H3': 10800, 'H4': 14400, 'H6': 21600, 'H8': 28800, 'H12': 43200,
+    'D': 86400, 'W': 604800
+}
+
+
+def parse_candles(candles: List[Dict]) -> pd.DataFrame:
+    """Convert OANDA candle JSON (price=M or MBA) to a mid-price DataFrame"""
+    return decode_candles(candles).to_dataframe()
+
+
+class CandleBuffer:
+    """Bounded candle history per (instrument, granularity)"""
+
+    def __init__(self, max_size: int = 1000, clock: Optional[Clock] = None):
+        """
+        Initialize the buffer
+
+        Args:
+            max_size: Maximum candles kept per (instrument, granularity)
+            clock: Time source for buffer ages and staleness (wall clock by default)
+        """
+        self.max_size = max_size
+        self.clock = clock or Clock()
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._updated_at: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, instrument: str, granularity: str) -> threading.Lock:
+        """Lock serializing fetches for one (instrument, granularity)"""
+        key = (instrument, granularity)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def size(self, instrument: str, granularity: str) -> int:
+        frame = self._frames.get((instrument, granularity))
+        return 0 if frame is None else len(frame)
+
+    def last_time(self, instrument: str, granularity: str) -> Optional[str]:
+        """Timestamp of the newest stored candle"""
+        frame = self._frames.get((instrument, granularity))
+        if frame is None or frame.empty:
+            return None
+        return frame['time'].iloc[-1]
+
+    def age(self, instrument: str, granularity: str) -> float:
+        """Seconds since this buffer was last updated (inf if never)"""
+        updated_at = self._updated_at.get((instrument, granularity))
+        if updated_at is None:
+            return float('inf')
+        return self.clock.monotonic() - updated_at
+
+    def is_stale(self, instrument: str, granularity: str, now: Optional[pd.Timestamp] = None) -> bool:
+        """
+        True if the newest candle is too old to be topped up incrementally,
+        i.e. more candles are missing than the buffer can hold
+        """
+        last_time = self.last_time(instrument, granularity)
+        if last_time is None:
+            return True
+        if now is None:
+            now = pd.Timestamp(self.clock.time_ns(), tz='UTC')
+        gap = (now - pd.Timestamp(last_time)).total_seconds()
+        return gap / GRANULARITY_SECONDS.get(granularity, 60) >= self.max_size
+
+    def replace(self, instrument: str, granularity: str, frame: pd.DataFrame):
+        """Replace the buffer with a full download"""
+        key = (instrument, granularity)
+        self._frames[key] = frame.tail(self.max_size).reset_index(drop=True)
+        self._updated_at[key] = self.clock.monotonic()
+
+    def append(self, instrument: str, granularity: str, frame: pd.DataFrame):
+        """
+        Merge newer candles into the buffer
+
+        Candles with a timestamp already present (e.g. the previously
+        incomplete candle) replace the stored row.
+        """
+        key = (instrument, granularity)
+        current = self._frames.get(key)
+        if current is None or current.empty:
+            self.replace(instrument, granularity, frame)
+            return
+
+        if not frame.empty:
+            # Times are sorted, so the replaced rows are a suffix; splice the
+            # column arrays rather than mask, concat and re-index the frame
+            keep = int(current['time'].searchsorted(frame['time'].iloc[0]))
+            start = max(0, keep + len(frame) - self.max_size)
+            spliced = pd.DataFrame({
+                column: np.concatenate((current[column].values[start:keep], frame[column].values))
+                for column in current.columns
+            })
+            # A download longer than the buffer still leaves only max_size rows
+            if len(spliced) > self.max_size:
+                spliced = spliced.tail(self.max_size).reset_index(drop=True)
+            self._frames[key] = spliced
+        self._updated_at[key] = self.clock.monotonic()
+
+    def window(self, instrument: str, granularity: str, count: int) -> pd.DataFrame:
+        """Return a copy of the newest `count` candles"""
+        frame = self._frames.get((instrument, granularity))
+        if frame is None:
+            return pd.DataFrame(columns=CANDLE_COLUMNS)
+        return frame.tail(count).reset_index(drop=True).copy()
+
+    def clear(self):
+        self._frames.clear()
+        self._updated_at.clear()
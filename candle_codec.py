@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Fast decoding of OANDA candle responses
+Parses candle JSON straight into typed NumPy columns
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+
+CANDLE_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+
+# OANDA RFC3339 timestamps are fixed width: 2024-01-02T03:04:05.000000000Z
+_RFC3339_LEN = 30
+_FRACTION_SCALE = 10 ** np.arange(8, -1, -1, dtype=np.int64)
+
+
+def loads(raw: Union[bytes, str]) -> Dict:
+    """Decode a JSON response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def rfc3339_to_ns(times: Iterable[str]) -> np.ndarray:
+    """Parse OANDA RFC3339 timestamps to int64 UTC epoch nanoseconds in bulk"""
+    times = list(times)
+    n = len(times)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    joined = ''.join(times).encode('ascii')
+    if len(joined) == n * _RFC3339_LEN:
+        chars = np.frombuffer(joined, dtype=np.uint8).reshape(n, _RFC3339_LEN)
+        if ((chars[:, 4] == ord('-')).all() and (chars[:, 10] == ord('T')).all()
+                and (chars[:, 19] == ord('.')).all() and (chars[:, 29] == ord('Z')).all()):
+            return _parse_fixed_width(chars)
+
+    # Anything unusual (other precisions, offsets) goes through NumPy's parser
+    stripped = [t[:-1] if t.endswith('Z') else t for t in times]
+    return np.array(stripped, dtype='datetime64[ns]').astype(np.int64)
+
+
+def _parse_fixed_width(chars: np.ndarray) -> np.ndarray:
+    digits = chars.astype(np.int64) - ord('0')
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    hour = digits[:, 11] * 10 + digits[:, 12]
+    minute = digits[:, 14] * 10 + digits[:, 15]
+    second = digits[:, 17] * 10 + digits[:, 18]
+    fraction = digits[:, 20:29] @ _FRACTION_SCALE
+
+    # Days since 1970-01-01 for a proleptic Gregorian date (Hinnant's days_from_civil)
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    return seconds * 1_000_000_000 + fraction
+
+
+def ns_to_rfc3339(times: np.ndarray) -> np.ndarray:
+    """Format epoch ns as OANDA RFC3339 timestamps"""
+    formatted = np.datetime_as_string(np.asarray(times, dtype=np.int64).astype('datetime64[ns]'), unit='ns')
+    return np.char.add(formatted, 'Z')
+
+
+class CandleFrame:
+    """Lightweight array-backed candle table"""
+
+    def __init__(self, time: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                 complete: np.ndarray, time_text: Optional[List[str]] = None):
+        self.time = time              # int64 epoch ns
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.complete = complete
+        self._time_text = time_text   # Original RFC3339 strings, if decoded from JSON
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in CANDLE_COLUMNS and column != 'complete':
+            raise KeyError(column)
+        return getattr(self, column)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.time) == 0
+
+    @property
+    def time_text(self) -> List[str]:
+        if self._time_text is None:
+            self._time_text = ns_to_rfc3339(self.time).tolist()
+        return self._time_text
+
+    def mask(self, keep: np.ndarray) -> 'CandleFrame':
+        """Rows where keep is True"""
+        time_text = None
+        if self._time_text is not None:
+            time_text = [t for t, k in zip(self._time_text, keep) if k]
+        return CandleFrame(self.time[keep], self.open[keep], self.high[keep], self.low[keep],
+                           self.close[keep], self.volume[keep], self.complete[keep], time_text)
+
+    def completed(self) -> 'CandleFrame':
+        """Only candles that have closed"""
+        if self.complete.all():
+            return self
+        return self.mask(self.complete)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame with RFC3339 time strings, as the bot has always used"""
+        return pd.DataFrame({
+            'time': self.time_text,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }, columns=CANDLE_COLUMNS)
+
+
+def decode_candles(data: Union[bytes, str, Dict, List[Dict]], price: str = 'mid') -> CandleFrame:
+    """
+    Decode an OANDA candles response into typed arrays
+
+    Args:
+        data: Raw response body, the decoded response, or its 'candles' list
+        price: Price component to read ('mid', 'bid' or 'ask')
+    """
+    if isinstance(data, (bytes, str)):
+        data = loads(data)
+    candles = data['candles'] if isinstance(data, dict) else data
+
+    n = len(candles)
+    if n == 0:
+        empty_f = np.empty(0, dtype=np.float64)
+        return CandleFrame(np.empty(0, dtype=np.int64), empty_f, empty_f.copy(), empty_f.copy(),
+                           empty_f.copy(), np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), [])
+
+    quotes = [c[price] for c in candles]
+    time_text = [c['time'] for c in candles]
+
+    # NumPy parses the decimal strings in C, one pass per column
+    opens = np.array([q['o'] for q in quotes], dtype=np.float64)
+    highs = np.array([q['h'] for q in quotes], dtype=np.float64)
+    lows = np.array([q['l'] for q in quotes], dtype=np.float64)
+    closes = np.array([q['c'] for q in quotes], dtype=np.float64)
+    volumes = np.fromiter((c['volume'] for c in candles), dtype=np.int64, count=n)
+    complete = np.fromiter((c.get('complete', True) for c in candles), dtype=bool, count=n)
+
+    return CandleFrame(rfc3339_to_ns(time_text), opens, highs, lows, closes,
+                       volumes, complete, time_text)
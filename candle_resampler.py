@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Multi-timeframe candle resampling
+Builds higher granularities locally from base candles with OANDA's alignment
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from candle_buffer import GRANULARITY_SECONDS
+from candle_codec import rfc3339_to_ns
+from candle_store import CANDLE_DTYPE, records_to_frame
+
+NS = 1_000_000_000
+HOUR_NS = 3600 * NS
+_SECOND = timedelta(seconds=1)
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# OANDA's defaults for the candles endpoint
+DEFAULT_ALIGNMENT = {
+    'daily_alignment': 17,                     # Hour daily candles open, in the alignment timezone
+    'alignment_timezone': 'America/New_York',  # Timezone for daily alignment (DST-aware)
+    'weekly_alignment': 'Friday'               # Day weekly candles open
+}
+
+
+def can_resample(base: str, target: str) -> bool:
+    """True if target candles can be built from whole base candles"""
+    if base not in GRANULARITY_SECONDS or target not in GRANULARITY_SECONDS:
+        return False
+    base_s, target_s = GRANULARITY_SECONDS[base], GRANULARITY_SECONDS[target]
+    return target_s > base_s and target_s % base_s == 0
+
+
+def _utc_offsets(utc_ns: np.ndarray, tz: ZoneInfo) -> np.ndarray:
+    """UTC offset in ns of tz at each instant"""
+    if len(utc_ns) <= 64:
+        # Incremental updates see a handful of candles; skip pandas' setup cost
+        return np.array([datetime.fromtimestamp(t // NS, timezone.utc).astimezone(tz).utcoffset()
+                         // _SECOND * NS for t in utc_ns.tolist()], dtype=np.int64)
+    index = pd.DatetimeIndex(utc_ns.astype('datetime64[ns]')).tz_localize('UTC')
+    local = index.tz_convert(tz).tz_localize(None).as_unit('ns')
+    return local.asi8 - utc_ns
+
+
+def _local_to_utc(local_ns: np.ndarray, tz: ZoneInfo) -> np.ndarray:
+    """Wall-clock times in tz (as naive epoch ns) back to UTC epoch ns"""
+    guess = local_ns - _utc_offsets(local_ns, tz)
+    return local_ns - _utc_offsets(guess, tz)
+
+
+def bucket_bounds(times: np.ndarray, granularity: str,
+                  alignment: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Open and close time (UTC epoch ns) of the candle each timestamp falls in
+
+    Sub-hourly candles are aligned to the top of the hour. Hourly and
+    longer candles follow OANDA's daily alignment: they are counted from
+    daily_alignment o'clock in alignment_timezone, so an H4 or D candle
+    opens at 17:00 New York time whether or not DST is in effect. Weekly
+    candles open on weekly_alignment at the daily alignment hour.
+    """
+    a = {**DEFAULT_ALIGNMENT, **(alignment or {})}
+    times = np.asarray(times, dtype=np.int64)
+    seconds = GRANULARITY_SECONDS[granularity]
+    period = seconds * NS
+
+    if seconds < 3600:
+        starts = times - times % period
+        return starts, starts + period
+
+    tz = ZoneInfo(a['alignment_timezone'])
+    anchor = a['daily_alignment'] * HOUR_NS
+    if granularity == 'W':
+        # 1970-01-01 was a Thursday
+        anchor += (WEEKDAYS.index(a['weekly_alignment']) - 3) % 7 * 24 * HOUR_NS
+
+    local = times + _utc_offsets(times, tz)
+    local_starts = (local - anchor) // period * period + anchor
+    return _local_to_utc(local_starts, tz), _local_to_utc(local_starts + period, tz)
+
+
+def _aggregate(records: np.ndarray, granularity: str,
+               alignment: Optional[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    OHLCV aggregation of time-ordered records
+
+    Returns:
+        (candles, close time of each candle)
+    """
+    if len(records) == 0:
+        return np.empty(0, dtype=CANDLE_DTYPE), np.empty(0, dtype=np.int64)
+
+    starts, ends = bucket_bounds(records['time'], granularity, alignment)
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+    last = np.concatenate((first[1:], [len(records)])) - 1
+
+    candles = np.empty(len(first), dtype=CANDLE_DTYPE)
+    candles['time'] = starts[first]
+    candles['open'] = records['open'][first]
+    candles['high'] = np.maximum.reduceat(records['high'], first)
+    candles['low'] = np.minimum.reduceat(records['low'], first)
+    candles['close'] = records['close'][last]
+    candles['volume'] = np.add.reduceat(records['volume'], first)
+    return candles, ends[first]
+
+
+def _fold(candle: np.ndarray, records: np.ndarray):
+    """Extend a one-candle array in place with later records from the same period"""
+    candle['high'] = max(candle['high'][0], records['high'].max())
+    candle['low'] = min(candle['low'][0], records['low'].min())
+    candle['close'] = records['close'][-1]
+    candle['volume'] += records['volume'].sum()
+
+
+def resample(records: np.ndarray, base: str, target: str,
+             alignment: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build target candles from completed base candles
+
+    Args:
+        records: CANDLE_DTYPE base candles in time order
+        base: Granularity of records
+        target: Granularity to build
+
+    Returns:
+        (candles, complete mask); a candle is complete once the base
+        candles reach its close or a later candle has begun, so only the
+        newest can be incomplete
+    """
+    if not can_resample(base, target):
+        raise ValueError(f"Cannot build {target} candles from {base}")
+    candles, ends = _aggregate(records, target, alignment)
+    if len(records) == 0:
+        return candles, np.empty(0, dtype=bool)
+    data_end = int(records['time'][-1]) + GRANULARITY_SECONDS[base] * NS
+    return candles, ends <= data_end
+
+
+def frame_to_candle_records(df: pd.DataFrame) -> np.ndarray:
+    """CANDLE_DTYPE records from a candle DataFrame with RFC3339 time strings"""
+    records = np.empty(len(df), dtype=CANDLE_DTYPE)
+    records['time'] = rfc3339_to_ns(df['time'].values)
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        records[column] = df[column].values
+    return records
+
+
+class _Series:
+    """Resampled state for one (instrument, granularity)"""
+
+    __slots__ = ('completed', 'open', 'open_end', 'last_base')
+
+    def __init__(self):
+        self.completed = np.empty(0, dtype=CANDLE_DTYPE)  # Closed target candles
+        self.open = np.empty(0, dtype=CANDLE_DTYPE)       # Running aggregate of the open target candle
+        self.open_end = 0                                  # Close time of the open candle
+        self.last_base: Optional[int] = None               # Newest base candle folded in
+
+
+class CandleResampler:
+    """
+    Incremental higher-timeframe candles from one base granularity
+
+    Completed base candles are folded in as they arrive: the open target
+    candle is a running OHLCV aggregate, and closed candles are appended
+    once and never recomputed. Candle boundaries (and the timezone lookups
+    behind them) are only computed when a base candle starts a new period.
+    """
+
+    def __init__(self, base: str = 'M5', max_size: int = 1000, alignment: Optional[Dict] = None):
+        """
+        Initialize the resampler
+
+        Args:
+            base: Granularity of the candles fed in
+            max_size: Maximum closed candles kept per (instrument, granularity)
+            alignment: daily_alignment / alignment_timezone / weekly_alignment overrides
+        """
+        self.base = base
+        self.base_ns = GRANULARITY_SECONDS[base] * NS
+        self.max_size = max_size
+        self.alignment = {**DEFAULT_ALIGNMENT, **(alignment or {})}
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, instrument: str, granularity: str) -> threading.Lock:
+        """Lock serializing updates for one (instrument, granularity)"""
+        key = (instrument, granularity)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def supports(self, granularity: str) -> bool:
+        return can_resample(self.base, granularity)
+
+    def size(self, instrument: str, granularity: str) -> int:
+        """Closed candles held"""
+        series = self._series.get((instrument, granularity))
+        return 0 if series is None else len(series.completed)
+
+    def last_base_time(self, instrument: str, granularity: str) -> Optional[int]:
+        series = self._series.get((instrument, granularity))
+        return None if series is None else series.last_base
+
+    def continues(self, instrument: str, granularity: str, records: np.ndarray) -> bool:
+        """
+        True if records pick up where the series left off
+
+        A window of base candles starting after the candle following the
+        newest one folded in may have skipped candles (e.g. after the bot
+        was down for longer than the window), and folding it in would
+        build wrong candles over the gap; reset() and reseed instead.
+        """
+        last_base = self.last_base_time(instrument, granularity)
+        return last_base is None or len(records) == 0 or int(records['time'][0]) <= last_base + self.base_ns
+
+    def reset(self, instrument: str, granularity: str):
+        """Drop the series so the next update starts it afresh"""
+        self._series.pop((instrument, granularity), None)
+
+    def update(self, instrument: str, granularity: str, records: np.ndarray) -> int:
+        """
+        Fold completed base candles in
+
+        Candles at or before the newest one already seen are ignored, so
+        overlapping windows can be passed on every call; see continues()
+        for windows that do not overlap.
+
+        Returns:
+            Number of target candles that closed
+        """
+        if not self.supports(granularity):
+            raise ValueError(f"Cannot build {granularity} candles from {self.base}")
+
+        series = self._series.setdefault((instrument, granularity), _Series())
+        if series.last_base is not None:
+            records = records[records['time'] > series.last_base]
+        if len(records) == 0:
+            return 0
+
+        data_end = int(records['time'][-1]) + self.base_ns
+        closed = []
+        if len(series.open):
+            inside = int(np.searchsorted(records['time'], series.open_end))
+            if inside:
+                _fold(series.open, records[:inside])
+            records = records[inside:]
+            if len(records) or data_end >= series.open_end:
+                closed.append(series.open)
+                series.open = np.empty(0, dtype=CANDLE_DTYPE)
+
+        if len(records):
+            candles, ends = _aggregate(records, granularity, self.alignment)
+            done = ends <= data_end
+            closed.append(candles[done])
+            if not done[-1]:
+                series.open = candles[-1:].copy()
+                series.open_end = int(ends[-1])
+
+        count = sum(len(candles) for candles in closed)
+        if count:
+            series.completed = np.concatenate([series.completed] + closed)[-self.max_size:]
+        series.last_base = data_end - self.base_ns
+        return count
+
+    def records(self, instrument: str, granularity: str, count: int,
+                forming: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Newest count candles, the open candle(s) last
+
+        Args:
+            forming: Base candles newer than those folded in (e.g. the
+                incomplete current candle), included in the open candle
+        """
+        series = self._series.get((instrument, granularity))
+        if series is None:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        tail = [series.open.copy()]
+        if forming is not None and len(forming):
+            if series.last_base is not None:
+                forming = forming[forming['time'] > series.last_base]
+            if len(series.open):
+                inside = int(np.searchsorted(forming['time'], series.open_end))
+                if inside:
+                    _fold(tail[0], forming[:inside])
+                forming = forming[inside:]
+            tail.append(_aggregate(forming, granularity, self.alignment)[0])
+        return np.concatenate([series.completed] + tail)[-count:]
+
+    def window(self, instrument: str, granularity: str, count: int,
+               forming: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """records() as a candle DataFrame, like CandleBuffer.window"""
+        return records_to_frame(self.records(instrument, granularity, count, forming))
+
+    def clear(self):
+        self._series.clear()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+On-disk candle store
+One append-only, memory-mapped file per instrument and granularity
+"""
+
+import os
+import struct
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from candle_codec import CandleFrame, decode_candles, ns_to_rfc3339
+
+logger = logging.getLogger(__name__)
+
+
+# Fixed-width candle record; columns are read as zero-copy views
+CANDLE_DTYPE = np.dtype([
+    ('time', '<i8'),      # Candle open time, UTC epoch nanoseconds
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8')
+])
+
+MAGIC = b'FXCANDL1'
+HEADER_SIZE = 64
+_COUNT_OFFSET = len(MAGIC)
+
+TimeLike = Union[int, str, pd.Timestamp, None]
+
+# Relative store roots are resolved against this file's directory (not the caller's cwd)
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def to_ns(value: TimeLike) -> Optional[int]:
+    """Convert a timestamp-like value to epoch ns (ints are taken as ns already)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return int(timestamp.to_datetime64().astype('datetime64[ns]').astype(np.int64))
+
+
+def frame_to_records(frame: CandleFrame) -> np.ndarray:
+    """Copy a decoded CandleFrame into CANDLE_DTYPE records"""
+    records = np.empty(len(frame), dtype=CANDLE_DTYPE)
+    for column in CANDLE_DTYPE.names:
+        records[column] = frame[column]
+    return records
+
+
+def candles_to_records(candles: List[Dict], complete_only: bool = True) -> np.ndarray:
+    """Convert OANDA candle JSON to CANDLE_DTYPE records, dropping incomplete candles"""
+    frame = decode_candles(candles)
+    if complete_only:
+        frame = frame.completed()
+    return frame_to_records(frame)
+
+
+def records_to_frame(records: np.ndarray) -> pd.DataFrame:
+    """Build a candle DataFrame with RFC3339 time strings, as returned by the API"""
+    return pd.DataFrame({
+        'time': ns_to_rfc3339(records['time']).astype(object),
+        'open': records['open'],
+        'high': records['high'],
+        'low': records['low'],
+        'close': records['close'],
+        'volume': records['volume']
+    })
+
+
+class CandleStore:
+    """
+    Persistent candle history
+
+    File layout: a 64-byte header (magic + committed record count) followed by
+    CANDLE_DTYPE records in time order. Appends write the records first and
+    only then bump the committed count, so a crash mid-append leaves the
+    previous contents intact; the partial tail is overwritten by the next append.
+    """
+
+    def __init__(self, root: str = 'data/candles'):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory holding one file per instrument and granularity
+                (created by the first append); relative paths are taken
+                from the package directory
+        """
+        self.root = os.path.join(PACKAGE_DIR, root)
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, instrument: str, granularity: str) -> str:
+        return os.path.join(self.root, f"{instrument}_{granularity}.candles")
+
+    def _lock(self, instrument: str, granularity: str) -> threading.Lock:
+        key = (instrument, granularity)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def count(self, instrument: str, granularity: str) -> int:
+        """Number of committed candles"""
+        path = self.path(instrument, granularity)
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as f:
+            return self._read_count(f)
+
+    def _read_count(self, f) -> int:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            raise ValueError(f"Not a candle store file: {f.name}")
+        return struct.unpack_from('<q', header, _COUNT_OFFSET)[0]
+
+    def _create(self, path: str):
+        """Create an empty store file; the header is written to a temp file and renamed into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC + struct.pack('<q', 0) + b'\0' * (HEADER_SIZE - _COUNT_OFFSET - 8))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def append(self, instrument: str, granularity: str, records: np.ndarray) -> int:
+        """
+        Append candles newer than the last stored one
+
+        Returns:
+            Number of candles actually appended
+        """
+        if len(records) == 0:
+            return 0
+
+        records = np.asarray(records, dtype=CANDLE_DTYPE)
+        path = self.path(instrument, granularity)
+
+        with self._lock(instrument, granularity):
+            if not os.path.exists(path):
+                os.makedirs(self.root, exist_ok=True)
+                self._create(path)
+
+            with open(path, 'r+b') as f:
+                count = self._read_count(f)
+
+                # Only strictly newer candles keep the file sorted and duplicate free
+                if count:
+                    f.seek(HEADER_SIZE + (count - 1) * CANDLE_DTYPE.itemsize)
+                    last_time = np.frombuffer(f.read(8), dtype='<i8')[0]
+                    records = records[records['time'] > last_time]
+                if len(records) == 0:
+                    return 0
+
+                # 1. Write the data past the committed end and make it durable
+                f.seek(HEADER_SIZE + count * CANDLE_DTYPE.itemsize)
+                f.write(records.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+                # 2. Commit by updating the record count
+                f.seek(_COUNT_OFFSET)
+                f.write(struct.pack('<q', count + len(records)))
+                f.flush()
+                os.fsync(f.fileno())
+
+        return len(records)
+
+    def read(self, instrument: str, granularity: str,
+             start: TimeLike = None, end: TimeLike = None) -> np.ndarray:
+        """
+        Memory-map committed candles with start <= time < end
+
+        The returned array is a read-only view of the file; use
+        arr['close'] etc. for individual columns.
+        """
+        path = self.path(instrument, granularity)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        count = self.count(instrument, granularity)
+        if count == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        data = np.memmap(path, dtype=CANDLE_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+        times = data['time']
+
+        lo = 0 if start is None else int(np.searchsorted(times, to_ns(start), side='left'))
+        hi = count if end is None else int(np.searchsorted(times, to_ns(end), side='left'))
+        return data[lo:hi]
+
+    def tail(self, instrument: str, granularity: str, n: int) -> np.ndarray:
+        """Memory-map the newest n committed candles"""
+        data = self.read(instrument, granularity)
+        return data[max(len(data) - n, 0):]
+
+    def last_time(self, instrument: str, granularity: str) -> Optional[int]:
+        """Epoch ns of the newest committed candle"""
+        data = self.tail(instrument, granularity, 1)
+        return int(data['time'][0]) if len(data) else None
+
+    def read_frame(self, instrument: str, granularity: str,
+                   start: TimeLike = None, end: TimeLike = None) -> pd.DataFrame:
+        """Range query returned as a candle DataFrame"""
+        return records_to_frame(self.read(instrument, granularity, start, end))
+
+    def instruments(self) -> List[Tuple[str, str]]:
+        """List stored (instrument, granularity) pairs"""
+        pairs = []
+        if not os.path.isdir(self.root):
+            return pairs
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith('.candles'):
+                instrument, _, granularity = name[:-len('.candles')].rpartition('_')
+                pairs.append((instrument, granularity))
+        return pairs
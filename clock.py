@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Time sources for the trading loop
+Wall-clock time for live trading, simulated time for event-driven backtests
+"""
+
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Callable, List
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class Clock:
+    """Wall clock; every time read and wait in the bot goes through one of these"""
+
+    def time_ns(self) -> int:
+        """Current UTC time in epoch ns"""
+        return time.time_ns()
+
+    def monotonic(self) -> float:
+        """Seconds for measuring intervals"""
+        return time.monotonic()
+
+    def utcnow(self) -> datetime:
+        """Current UTC time as a naive datetime (like datetime.utcnow)"""
+        return datetime.utcnow()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """
+    Clock that only moves when slept on or advanced
+
+    sleep() returns immediately after moving time forward, so a loop that
+    waits five minutes between cycles runs its next cycle straight away.
+    Subscribers are called with the new time after every move, which is
+    where a backtest samples equity or decides to stop the loop.
+    """
+
+    def __init__(self, start_ns: int):
+        """
+        Initialize the clock
+
+        Args:
+            start_ns: Starting UTC time in epoch ns
+        """
+        self._now = int(start_ns)
+        self._subscribers: List[Callable[[int], None]] = []
+        self._lock = threading.Lock()
+
+    def time_ns(self) -> int:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now / NS_PER_SECOND
+
+    def utcnow(self) -> datetime:
+        return datetime.fromtimestamp(self._now // NS_PER_SECOND, timezone.utc).replace(tzinfo=None)
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def subscribe(self, callback: Callable[[int], None]):
+        """Call callback(now_ns) whenever time moves"""
+        self._subscribers.append(callback)
+
+    def advance(self, seconds: float):
+        """Move time forward by seconds"""
+        self.set(self._now + int(seconds * NS_PER_SECOND))
+
+    def set(self, now_ns: int):
+        """Move time forward to now_ns (never backwards)"""
+        with self._lock:
+            if now_ns < self._now:
+                raise ValueError("Simulated time cannot move backwards")
+            self._now = int(now_ns)
+        for callback in self._subscribers:
+            callback(self._now)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cycle-scoped account snapshot
+Fetches account, positions and pending orders at most once per trading cycle
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class CycleSnapshot:
+    """
+    Lazily cached account state shared by every stage of a trading cycle
+
+    Outside of a cycle() block every access goes straight to the loaders,
+    so callers never see state left over from a previous cycle.
+    """
+
+    PARTS = ('account', 'positions', 'orders')
+
+    def __init__(self, load_account: Callable[[], Optional[Dict]],
+                 load_positions: Callable[[], List[Dict]],
+                 load_orders: Callable[[], List[Dict]]):
+        """
+        Initialize the snapshot
+
+        Args:
+            load_account: Fetches the account summary
+            load_positions: Fetches open positions
+            load_orders: Fetches pending orders
+        """
+        self._loaders = {
+            'account': load_account,
+            'positions': load_positions,
+            'orders': load_orders
+        }
+        self._values: Dict[str, object] = {}
+        self._lock = threading.RLock()
+        self.active = False
+
+        # Per-cycle counters
+        self.fetches = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    @contextmanager
+    def cycle(self):
+        """Cache state for the duration of one trading cycle"""
+        with self._lock:
+            self._values.clear()
+            self.fetches = 0
+            self.hits = 0
+            self.invalidations = 0
+            self.active = True
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.active = False
+                self._values.clear()
+
+    def _get(self, part: str):
+        if not self.active:
+            return self._loaders[part]()
+
+        with self._lock:
+            if part in self._values:
+                self.hits += 1
+                return self._values[part]
+
+            value = self._loaders[part]()
+            self.fetches += 1
+            # Don't cache a failed account fetch; the next stage may retry
+            if value is not None:
+                self._values[part] = value
+            return value
+
+    @property
+    def account(self) -> Optional[Dict]:
+        return self._get('account')
+
+    @property
+    def positions(self) -> List[Dict]:
+        return self._get('positions')
+
+    @property
+    def orders(self) -> List[Dict]:
+        return self._get('orders')
+
+    def invalidate(self, *parts: str):
+        """Drop cached state after a trade changes it (all parts by default)"""
+        with self._lock:
+            for part in parts or self.PARTS:
+                if self._values.pop(part, None) is not None:
+                    self.invalidations += 1
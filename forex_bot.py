@@ -5,11 +5,12 @@ Enhanced version with multiple trading strategies
 """
 
 import json
-import time
 import logging
-import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import argparse
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
 import pandas as pd
 import numpy as np
 
@@ -20,18 +21,34 @@ from trading_algorithms import (
     Signal,
     TradingSignal
 )
+from oanda_transport import OandaTransport
+from oanda_stream import PriceStream, TransactionStream, DEFAULT_STREAM_CONFIG
+from candle_buffer import CandleBuffer, GRANULARITY_SECONDS
+from cycle_snapshot import CycleSnapshot
+from account_model import AccountModel, closed_trade_outcome, r_multiple, realized_pl
+from candle_store import CANDLE_DTYPE, CandleStore, frame_to_records, records_to_frame
+from candle_codec import decode_candles, ns_to_rfc3339
+from streaming_indicators import IndicatorEngine
+from indicator_cache import IndicatorCache, candle_key, params_hash
+from indicator_graph import hybrid_graph
+from batch_analysis import BatchAnalyzer
+from candle_resampler import CandleResampler, frame_to_candle_records
+from volatility import VolatilityService
+from clock import Clock
+from monte_carlo import TradeMonteCarlo
 
-# Create logs directory if it doesn't exist
+# Create logs directory next to this file (not in whatever directory imports it)
 import os
-if not os.path.exists('logs'):
-    os.makedirs('logs')
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+if not os.path.exists(LOG_DIR):
+    os.makedirs(LOG_DIR)
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('logs/forex_bot.log'),
+        logging.FileHandler(os.path.join(LOG_DIR, 'forex_bot.log')),
         logging.StreamHandler()
     ]
 )
@@ -41,7 +58,10 @@ logger = logging.getLogger(__name__)
 class ForexTradingBot:
     """Enhanced trading bot with advanced algorithms"""
     
-    def __init__(self, account_id: str, access_token: str, practice: bool = True):
+    def __init__(self, account_id: str, access_token: str, practice: bool = True,
+                 transport_config: Optional[Dict] = None, stream_config: Optional[Dict] = None,
+                 base_url: Optional[str] = None, stream_url: Optional[str] = None,
+                 clock: Optional[Clock] = None):
         """
         Initialize the trading bot
         
@@ -49,7 +69,14 @@ class ForexTradingBot:
             account_id: Your OANDA account ID
             access_token: Your OANDA API access token
             practice: Whether to use practice (demo) or live account
+            transport_config: Overrides for the pooled HTTP transport
+                (pool size, timeouts, retries, gzip)
+            stream_config: Overrides for the streaming price feed
+            base_url: REST endpoint override (e.g. a local_oanda server)
+            stream_url: Streaming endpoint override (defaults to base_url when that is set)
+            clock: Time source for the main loop (a SimulatedClock replays history)
         """
+        self.clock = clock or Clock()
         self.account_id = account_id
         self.access_token = access_token
         self.headers = {
@@ -65,10 +92,25 @@ class ForexTradingBot:
             self.base_url = "https://api-fxtrade.oanda.com"
             self.stream_url = "https://stream-fxtrade.oanda.com"
             
+        if base_url:
+            self.base_url = base_url.rstrip('/')
+            self.stream_url = (stream_url or base_url).rstrip('/')
+        elif stream_url:
+            self.stream_url = stream_url.rstrip('/')
+            
         # Trading parameters
         self.instruments = ["EUR_USD", "GBP_USD"]
         self.max_positions = 2
         
+        # Execution configuration
+        self.execution_config = {
+            'concurrent_analysis': True,  # Fetch data and analyze instruments in parallel
+            'max_workers': 4,             # Keep <= transport pool_maxsize
+            'batch_analysis': False       # Score all instruments in one vectorized pass; uses approximate
+                                          # vote rules for built-in algorithms instead of analyze()
+        }
+        self._executor = None
+        
         # Algorithm configuration
         self.algorithm_name = "hybrid"  # Can be: momentum, trend, mean_reversion, hybrid
         self.algorithm_config = {
@@ -97,6 +139,55 @@ class ForexTradingBot:
             self.algorithm_config
         )
         self.risk_manager = RiskManager(self.risk_config)
+        self.batch_analyzer = BatchAnalyzer(self.algorithm_config)
+        
+        # Shared keep-alive connection pool for all REST calls
+        self.transport = OandaTransport(self.headers, transport_config)
+        
+        # Streaming price feed (started in run, polling is used while it is down)
+        self.stream_config = dict(DEFAULT_STREAM_CONFIG)
+        if stream_config:
+            self.stream_config.update(stream_config)
+        self.price_stream = None
+        self.transaction_stream = None
+        
+        # Rolling candle history so each cycle only downloads new candles
+        self.candle_config = {
+            'buffer_size': 1000,      # Max candles kept per instrument/granularity
+            'initial_count': 200,     # Candles fetched when a buffer is (re)seeded
+            'refresh_interval': 10,   # Seconds a buffer is reused without refetching
+            'use_store': True,        # Persist completed candles on disk
+            'store_dir': 'data/candles',
+            'base_granularity': 'M5', # Granularity downloaded; coarser ones are built from it
+            'resample': True,         # Build coarser granularities locally instead of downloading them
+            'resample_history': 20000 # Max base candles downloaded once to seed a resampled granularity
+        }
+        self.candle_buffer = CandleBuffer(self.candle_config['buffer_size'], self.clock)
+        self.candle_store = None
+        if self.candle_config['use_store']:
+            self.candle_store = CandleStore(self.candle_config['store_dir'])
+        self.candle_resampler = CandleResampler(self.candle_config['base_granularity'],
+                                                self.candle_config['buffer_size'])
+            
+        # Incremental indicators, handed to the strategies as df.attrs['indicators']
+        self.indicator_config = {
+            'streaming': True,  # Update indicators per new candle instead of recomputing
+            'cache': True,      # Reuse results while the candles are unchanged
+            'cache_entries': 512,
+            'cache_mb': 32,
+            'graph': True       # Attach a lazily evaluated indicator DAG as df.attrs['indicator_graph']
+        }
+        self._indicator_engines: Dict[Tuple[str, str], IndicatorEngine] = {}
+        self._indicator_engines_lock = threading.Lock()
+        self.indicator_graph = hybrid_graph(self.algorithm_config)
+        self.indicator_cache = None
+        if self.indicator_config['cache']:
+            self.indicator_cache = IndicatorCache(
+                self.indicator_config['cache_entries'],
+                self.indicator_config['cache_mb'] * 1024 * 1024
+            )
+        # ATR and its long-run average per instrument for volatility position scaling
+        self.volatility = VolatilityService(self.algorithm_config)
         
         # State tracking
         self.running = True
@@ -108,10 +199,55 @@ class ForexTradingBot:
         # Performance tracking for Kelly Criterion
         self.trade_history = []
         
+        # Monte Carlo stake sizing from closed-trade outcomes (use_kelly_criterion)
+        self.monte_carlo = TradeMonteCarlo()
+        self.kelly_risk = None
+        self._kelly_outcomes = deque(maxlen=self.monte_carlo.config['history'])  # R multiples
+        self._trade_risk: Dict[str, Tuple[float, float, float]] = {}  # Trade ID -> (entry, stop, units)
+        self._kelly_new_trades = self.monte_carlo.config['refresh_trades']  # Stale until first run
+        self._kelly_lock = threading.Lock()
+        
+        self._recorded_fills = set()
+        self._history_lock = threading.Lock()
+        
+        # Account state maintained from /changes deltas instead of full pulls
+        self.account_config = {
+            'incremental_state': True  # Poll /changes since the last transaction ID
+        }
+        self.account_model = None
+        if self.account_config['incremental_state']:
+            self.account_model = AccountModel(
+                self.transport,
+                self.base_url,
+                self.account_id,
+                on_fill=self.record_fill
+            )
+        
+        # Account state cached for the duration of each trading cycle
+        self.snapshot = CycleSnapshot(
+            self._load_account,
+            self._load_positions,
+            self._load_orders
+        )
+        
+    @classmethod
+    def from_config(cls, config: Dict, **kwargs) -> 'ForexTradingBot':
+        """
+        Build a bot from a config.json dict (see config_template.json)
+
+        Args:
+            config: Credentials, "practice" and the optional "network"
+                (transport_config) and "streaming" (stream_config) sections
+            **kwargs: Further constructor arguments (e.g. base_url)
+        """
+        return cls(config['account_id'], config['access_token'], config.get('practice', True),
+                   transport_config=config.get('network'), stream_config=config.get('streaming'),
+                   **kwargs)
+        
     def get_account_summary(self) -> Dict:
         """Get account summary including balance and margin"""
         url = f"{self.base_url}/v3/accounts/{self.account_id}/summary"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, endpoint='summary')
         
         if response.status_code == 200:
             return response.json()
@@ -119,16 +255,88 @@ class ForexTradingBot:
             logger.error(f"Failed to get account summary: {response.text}")
             return None
             
+    def _load_account(self) -> Optional[Dict]:
+        """Account summary from the local model, or a full /summary pull"""
+        if self.account_model is None:
+            return self.get_account_summary()
+        self.account_model.refresh()
+        return self.account_model.summary()
+        
+    def _load_positions(self) -> List[Dict]:
+        if self.account_model is None:
+            return self.get_open_positions()
+        self.account_model.refresh()
+        return self.account_model.open_positions()
+        
+    def _load_orders(self) -> List[Dict]:
+        if self.account_model is None:
+            return self.get_pending_orders()
+        self.account_model.refresh()
+        return self.account_model.pending_orders()
+        
+    def _invalidate_account_state(self):
+        """Make the next stage see the effect of an order or close"""
+        self.snapshot.invalidate()
+        if self.account_model is not None:
+            self.account_model.mark_stale()
+            
+    def start_price_stream(self):
+        """Open one streaming connection for all configured instruments"""
+        if self.price_stream is not None:
+            self.price_stream.stop()
+            
+        self.price_stream = PriceStream(
+            self.stream_url,
+            self.account_id,
+            self.headers,
+            self.instruments,
+            self.stream_config
+        )
+        self.price_stream.start()
+        
+    def stop_price_stream(self):
+        """Close the streaming connection"""
+        if self.price_stream is not None:
+            self.price_stream.stop()
+            self.price_stream = None
+            
+    def start_transaction_stream(self):
+        """Record fills (including stop-loss/take-profit) as soon as they happen"""
+        if self.transaction_stream is not None:
+            self.transaction_stream.stop()
+            
+        self.transaction_stream = TransactionStream(
+            self.stream_url,
+            self.account_id,
+            self.headers,
+            self.record_fill,
+            self.stream_config
+        )
+        self.transaction_stream.start()
+        
+    def stop_transaction_stream(self):
+        """Close the transaction stream"""
+        if self.transaction_stream is not None:
+            self.transaction_stream.stop()
+            self.transaction_stream = None
+            
     def get_current_price(self, instrument: str) -> Optional[float]:
         """Get current bid/ask prices for an instrument"""
+        # Use the streamed quote when the feed is healthy
+        if self.price_stream is not None:
+            quote = self.price_stream.get_quote(instrument)
+            if quote is not None:
+                return quote.mid
+                
+        # The forming candle's close is the latest price at any granularity
         url = f"{self.base_url}/v3/instruments/{instrument}/candles"
         params = {
             'count': 1,
-            'granularity': 'M1',
+            'granularity': self.candle_config['base_granularity'],
             'price': 'MBA'
         }
         
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.transport.get(url, endpoint='price', params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -141,40 +349,252 @@ class ForexTradingBot:
         logger.error(f"Failed to get price for {instrument}")
         return None
         
-    def get_historical_prices(self, instrument: str, count: int = 200) -> pd.DataFrame:
-        """Get historical price data for analysis"""
-        url = f"{self.base_url}/v3/instruments/{instrument}/candles"
-        params = {
-            'count': count,
-            'granularity': 'M5',  # 5-minute candles
-            'price': 'MBA'
-        }
+    def get_historical_prices(self, instrument: str, count: int = 200,
+                              granularity: str = 'M5') -> pd.DataFrame:
+        """
+        Get historical price data for analysis
         
-        response = requests.get(url, headers=self.headers, params=params)
+        Candles are kept in a rolling buffer per (instrument, granularity);
+        once it holds enough history only candles newer than the last stored
+        one are downloaded. An empty buffer is seeded from the on-disk
+        candle store, and completed candles are persisted to it.
         
-        if response.status_code == 200:
-            data = response.json()
-            candles = []
-            
-            for candle in data['candles']:
-                candles.append({
-                    'time': candle['time'],
-                    'open': float(candle['mid']['o']),
-                    'high': float(candle['mid']['h']),
-                    'low': float(candle['mid']['l']),
-                    'close': float(candle['mid']['c']),
-                    'volume': candle['volume']
-                })
+        Granularities that are whole multiples of the base granularity
+        (e.g. M15, H1, H4, D from M5) are built locally from the base
+        candles; they are only downloaded while there is not enough base
+        history to cover count candles.
+        """
+        if (granularity != self.candle_config['base_granularity'] and self.candle_config['resample']
+                and self.candle_resampler.supports(granularity)):
+            resampled = self._get_resampled_prices(instrument, count, granularity)
+            if resampled is not None:
+                return resampled
                 
-            return pd.DataFrame(candles)
+        buffer = self.candle_buffer
         
+        with buffer.lock(instrument, granularity):
+            have = buffer.size(instrument, granularity)
+            seeded = False
+            if have < count and self.candle_store is not None:
+                self._seed_buffer_from_store(instrument, granularity)
+                have = buffer.size(instrument, granularity)
+                seeded = True
+                
+            if (not seeded and have >= count and
+                    buffer.age(instrument, granularity) < self.candle_config['refresh_interval']):
+                return buffer.window(instrument, granularity, count)
+                
+            incremental = have >= count and not buffer.is_stale(instrument, granularity)
+            
+            url = f"{self.base_url}/v3/instruments/{instrument}/candles"
+            params = {
+                'granularity': granularity,
+                'price': 'M'  # Only mid prices are used; bid/ask would triple the payload
+            }
+            if incremental:
+                # 'from' is inclusive, so the last (possibly incomplete) candle is refreshed too
+                params['from'] = buffer.last_time(instrument, granularity)
+            else:
+                params['count'] = min(max(count, self.candle_config['initial_count']), 5000)
+                
+            response = self.transport.get(url, endpoint='candles', params=params)
+            
+            if response.status_code == 200:
+                frame = decode_candles(response.content)
+                candles = frame.to_dataframe()
+                
+                if self.candle_store is not None:
+                    self.candle_store.append(instrument, granularity, frame_to_records(frame.completed()))
+                    
+                if incremental:
+                    buffer.append(instrument, granularity, candles)
+                else:
+                    buffer.replace(instrument, granularity, candles)
+                    
+                return buffer.window(instrument, granularity, count)
+                
         logger.error(f"Failed to get historical data for {instrument}")
         return pd.DataFrame()
         
-    def generate_signal_advanced(self, instrument: str) -> Optional[Dict]:
-        """Generate trading signal using advanced algorithms"""
+    def _get_resampled_prices(self, instrument: str, count: int,
+                              granularity: str) -> Optional[pd.DataFrame]:
+        """
+        Candles of granularity built from the base candles, or None if
+        there is not enough base history yet
+        
+        The first request seeds the resampler from the candle store (or
+        the base buffer); later ones fold in only the base candles that
+        completed since. The newest row is the forming candle.
+        """
+        base = self.candle_config['base_granularity']
+        base_df = self.get_historical_prices(instrument, self.candle_config['initial_count'], base)
+        if base_df.empty:
+            return None
+            
+        # The newest base candle may still be forming
+        records = frame_to_candle_records(base_df)
+        
+        resampler = self.candle_resampler
+        with resampler.lock(instrument, granularity):
+            if not resampler.continues(instrument, granularity, records[:-1]):
+                logger.warning(f"{base} candles for {instrument} missing since the last {granularity} "
+                               f"update; rebuilding {granularity} from history")
+                resampler.reset(instrument, granularity)
+                
+            if resampler.last_base_time(instrument, granularity) is None:
+                needed = (count + 1) * (GRANULARITY_SECONDS[granularity] // GRANULARITY_SECONDS[base])
+                if needed > self.candle_config['resample_history']:
+                    return None
+                history = None
+                if self.candle_store is not None:
+                    history = self.candle_store.tail(instrument, base, needed)
+                # Stored history must reach the current window, or the gap would be folded in
+                if (history is None or len(history) < needed
+                        or (len(records) and history['time'][-1] < records['time'][0])):
+                    history = self._download_base_history(instrument, base, needed)
+                if history is None:
+                    return None
+                resampler.update(instrument, granularity, history)
+                
+            resampler.update(instrument, granularity, records[:-1])
+            
+            if resampler.size(instrument, granularity) + 1 < count:
+                logger.debug(f"Not enough {base} history to build {count} {granularity} candles "
+                             f"for {instrument}; downloading them")
+                return None
+            return resampler.window(instrument, granularity, count, forming=records[-1:])
+            
+    def _download_base_history(self, instrument: str, granularity: str,
+                               count: int) -> Optional[np.ndarray]:
+        """The newest count completed candles, paging back 5000 at a time"""
+        url = f"{self.base_url}/v3/instruments/{instrument}/candles"
+        pages = []
+        params = {'granularity': granularity, 'price': 'M'}
+        remaining = count
+        while remaining > 0:
+            params['count'] = min(remaining, 5000)
+            response = self.transport.get(url, endpoint='candles', params=params)
+            if response.status_code != 200:
+                logger.error(f"Failed to download {granularity} history for {instrument}")
+                return None
+            frame = decode_candles(response.content)
+            if frame.empty or (pages and frame['time'][-1] >= pages[-1]['time'][0]):
+                break
+            pages.append(frame_to_records(frame.completed()))
+            remaining -= len(frame)
+            if len(frame) < params['count']:
+                break
+            # 'to' is exclusive
+            params['to'] = str(ns_to_rfc3339(frame['time'][:1])[0])
+        pages.reverse()
+        return np.concatenate(pages) if pages else np.empty(0, dtype=CANDLE_DTYPE)
+        
+    def _seed_buffer_from_store(self, instrument: str, granularity: str):
+        """Top up the stored history from the API and load its tail into the buffer"""
+        store = self.candle_store
+        if store.last_time(instrument, granularity) is None:
+            return
+            
+        url = f"{self.base_url}/v3/instruments/{instrument}/candles"
+        
+        # Page forward from the last stored candle until we are caught up
+        while True:
+            last_time = store.last_time(instrument, granularity)
+            params = {
+                'granularity': granularity,
+                'price': 'M',
+                'from': str(ns_to_rfc3339([last_time])[0]),
+                'includeFirst': 'false',
+                'count': 5000
+            }
+            response = self.transport.get(url, endpoint='candles', params=params)
+            if response.status_code != 200:
+                logger.error(f"Failed to top up stored candles for {instrument}")
+                break
+                
+            frame = decode_candles(response.content)
+            appended = store.append(instrument, granularity, frame_to_records(frame.completed()))
+            if len(frame) < 5000 or appended == 0:
+                break
+                
+        records = store.tail(instrument, granularity, self.candle_config['buffer_size'])
+        self.candle_buffer.replace(instrument, granularity, records_to_frame(records))
+        
+    def _attach_indicators(self, instrument: str, df: pd.DataFrame, granularity: str = 'M5'):
+        """
+        Advance the instrument's streaming indicators over df and attach them
+        
+        Strategies can read the latest values from df.attrs['indicators']
+        (previous candle under 'prev') instead of recomputing every series.
+        Results are memoized on the candles and algorithm parameters, so the
+        50- and 200-candle views of the same data share one computation.
+        The attached dict may be shared between calls; treat it as read-only.
+        
+        df.attrs['indicator_graph'] gives full indicator series from the
+        shared dependency graph: each node is computed at most once for
+        these candles, however many sub-strategies or calls ask for it.
+        """
+        cache_key = None
+        if self.indicator_cache is not None:
+            cache_key = candle_key(instrument, granularity, df, params_hash(self.algorithm_config))
+            df.attrs['candle_key'] = cache_key
+            
+        if self.indicator_config['graph']:
+            if cache_key is None:
+                df.attrs['indicator_graph'] = self.indicator_graph.run_frame(df)
+            else:
+                # Full series depend on the window length, unlike the latest values
+                df.attrs['indicator_graph'] = self.indicator_cache.get_or_compute(
+                    ('graph', len(df)) + cache_key, lambda: self.indicator_graph.run_frame(df))
+            
+        if not self.indicator_config['streaming']:
+            return
+            
+        key = (instrument, granularity)
+        with self._indicator_engines_lock:
+            engine = self._indicator_engines.get(key)
+            if engine is None:
+                engine = self._indicator_engines[key] = IndicatorEngine(self.algorithm_config)
+                
+        if cache_key is None:
+            df.attrs['indicators'] = engine.update(df)
+            return
+            
+        df.attrs['indicators'] = self.indicator_cache.get_or_compute(cache_key, lambda: engine.update(df))
+        
+    def _analyze(self, df: pd.DataFrame, current_price: float) -> TradingSignal:
+        """
+        The algorithm's signal for df, memoized on the candles and price
+        
+        Needs df prepared by _attach_indicators; the cached TradingSignal
+        is shared between calls, so treat it as read-only.
+        """
+        cache_key = df.attrs.get('candle_key')
+        if cache_key is None:
+            return self.algorithm.analyze(df, current_price)
+            
+        def analyze() -> TradingSignal:
+            signal = self.algorithm.analyze(df, current_price)
+            graph_run = df.attrs.get('indicator_graph')
+            if graph_run is not None:
+                graph_run.log_report()
+            return signal
+            
+        return self.indicator_cache.get_or_compute(('signal', len(df), current_price) + cache_key, analyze)
+        
+    def generate_signal_advanced(self, instrument: str, signal: Optional[TradingSignal] = None,
+                                 df: Optional[pd.DataFrame] = None,
+                                 current_price: Optional[float] = None) -> Optional[Dict]:
+        """
+        Generate trading signal using advanced algorithms
+        
+        A signal precomputed by analyze_batch can be passed in, with the
+        candles and price it was computed from so they are not fetched
+        again; otherwise the configured algorithm analyzes the instrument
+        on its own.
+        """
         # Get account balance for position sizing
-        account = self.get_account_summary()
+        account = self.snapshot.account
         if not account:
             return None
             
@@ -186,23 +606,28 @@ class ForexTradingBot:
             return None
         
         # Get historical data
-        df = self.get_historical_prices(instrument, count=200)
+        if df is None:
+            df = self.get_historical_prices(instrument, count=200)
         if df.empty:
             return None
+        if signal is None:
+            self._attach_indicators(instrument, df)
             
-        current_price = self.get_current_price(instrument)
+        if current_price is None:
+            current_price = self.get_current_price(instrument)
         if not current_price:
             return None
             
         # Get trading signal from algorithm
-        signal = self.algorithm.analyze(df, current_price)
+        if signal is None:
+            signal = self._analyze(df, current_price)
         
         # Skip if no signal or low confidence
         if signal.signal == Signal.HOLD or signal.confidence < 0.5:
             return None
             
         # Check correlation risk
-        open_positions = self.get_open_positions()
+        open_positions = self.snapshot.positions
         open_instruments = [pos['instrument'] for pos in open_positions]
         
         if not self.risk_manager.check_correlation_risk(instrument, open_instruments):
@@ -212,21 +637,8 @@ class ForexTradingBot:
         # Calculate position size
         stop_distance = abs(current_price - signal.stop_loss)
         
-        if self.risk_config['use_kelly_criterion'] and len(self.trade_history) > 20:
-            # Calculate Kelly criterion from trade history
-            wins = [t['pnl'] for t in self.trade_history if t['pnl'] > 0]
-            losses = [abs(t['pnl']) for t in self.trade_history if t['pnl'] < 0]
-            
-            if wins and losses:
-                win_rate = len(wins) / len(self.trade_history)
-                avg_win = np.mean(wins)
-                avg_loss = np.mean(losses)
-                
-                risk_percent = self.risk_manager.calculate_kelly_criterion(
-                    win_rate, avg_win, avg_loss
-                )
-            else:
-                risk_percent = self.risk_config['max_risk_per_trade']
+        if self.risk_config['use_kelly_criterion']:
+            risk_percent = self.kelly_risk_percent()
         else:
             risk_percent = self.risk_config['max_risk_per_trade']
             
@@ -234,16 +646,10 @@ class ForexTradingBot:
             balance, stop_distance, risk_percent
         )
         
-        # Adjust for volatility
-        atr = signal.indicators.get('atr', 0)
-        if atr > 0:
-            # Calculate average ATR from historical data
-            avg_atr = df['high'].rolling(20).max() - df['low'].rolling(20).min()
-            avg_atr = avg_atr.mean()
-            
-            position_size = self.risk_manager.adjust_position_for_volatility(
-                position_size, atr, avg_atr
-            )
+        # Adjust for volatility against the instrument's long-run average ATR
+        position_size = self.volatility.adjust_position(
+            self.risk_manager, position_size, instrument, df
+        )
             
         # Round to valid lot size (OANDA uses units)
         position_size = int(position_size / 100) * 100  # Round to nearest 100
@@ -272,6 +678,75 @@ class ForexTradingBot:
             'risk_percent': risk_percent
         }
         
+    def generate_signals(self, instruments: List[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Generate advanced signals for several instruments
+        
+        In concurrent mode all instruments are fetched and analyzed in parallel,
+        but results are still yielded in the given order so the order placement
+        logic stays deterministic. In serial mode each signal is generated lazily.
+        """
+        if (self.execution_config['batch_analysis'] and len(instruments) > 1
+                and self.batch_analyzer.supports(self.algorithm_name)):
+            signals, frames, prices = self.analyze_batch(instruments)
+            for instrument in instruments:
+                yield instrument, self.generate_signal_advanced(
+                    instrument, signals.get(instrument), frames[instrument], prices.get(instrument))
+            return
+            
+        if not self.execution_config['concurrent_analysis'] or len(instruments) < 2:
+            for instrument in instruments:
+                yield instrument, self.generate_signal_advanced(instrument)
+            return
+            
+        futures = [
+            (instrument, self._get_executor().submit(self.generate_signal_advanced, instrument))
+            for instrument in instruments
+        ]
+        try:
+            for instrument, future in futures:
+                yield instrument, future.result()
+        finally:
+            # Once an order is placed the remaining results are not needed;
+            # don't let unfinished analysis spill over into the next cycle
+            for _, future in futures:
+                future.cancel()
+            wait([future for _, future in futures])
+            
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.execution_config['max_workers'],
+                thread_name_prefix='analysis'
+            )
+        return self._executor
+        
+    def analyze_batch(self, instruments: List[str]
+                      ) -> Tuple[Dict[str, TradingSignal], Dict[str, pd.DataFrame], Dict[str, float]]:
+        """
+        Signals for many instruments from one vectorized indicator pass
+        
+        Candles (and prices, when not streamed) are still fetched per
+        instrument, in parallel; instruments that could not be scored are
+        left out and fall back to per-instrument analysis. The votes are
+        those of algorithm_name, so only built-in algorithms are batched.
+        
+        Returns:
+            (signals, candles, prices) per instrument; the candles and
+            prices are reused when sizing the orders
+        """
+        def fetch(instrument: str) -> Tuple[pd.DataFrame, Optional[float]]:
+            return self.get_historical_prices(instrument, count=200), self.get_current_price(instrument)
+            
+        if self.execution_config['concurrent_analysis']:
+            results = list(self._get_executor().map(fetch, instruments))
+        else:
+            results = [fetch(instrument) for instrument in instruments]
+            
+        frames = {instrument: df for instrument, (df, _) in zip(instruments, results)}
+        prices = {instrument: price for instrument, (_, price) in zip(instruments, results) if price}
+        return self.batch_analyzer.analyze(frames, prices, algorithm=self.algorithm_name), frames, prices
+        
     def place_order(self, instrument: str, units: int, stop_loss: float = None, 
                    take_profit: float = None) -> bool:
         """Place a market order"""
@@ -299,11 +774,19 @@ class ForexTradingBot:
                 "price": f"{take_profit:.5f}"
             }
             
-        response = requests.post(url, headers=self.headers, json=order_data)
+        response = self.transport.post(url, endpoint='orders', json=order_data)
         
         if response.status_code == 201:
             logger.info(f"Order placed successfully for {instrument}: {units} units")
+            fill = response.json().get('orderFillTransaction') or {}
+            opened = fill.get('tradeOpened')
+            if opened and stop_loss:
+                # Remember what the trade risks so its close can be scored in R
+                with self._history_lock:
+                    self._trade_risk[opened['tradeID']] = (float(fill['price']), stop_loss,
+                                                           float(opened['units']))
             self.trades_today += 1
+            self._invalidate_account_state()
             return True
         else:
             logger.error(f"Failed to place order: {response.text}")
@@ -311,22 +794,34 @@ class ForexTradingBot:
             
     def get_open_positions(self) -> List[Dict]:
         """Get all open positions"""
-        url = f"{self.base_url}/v3/accounts/{self.account_id}/positions"
-        response = requests.get(url, headers=self.headers)
+        # /positions also lists every instrument ever traded, flat or not
+        url = f"{self.base_url}/v3/accounts/{self.account_id}/openPositions"
+        response = self.transport.get(url, endpoint='positions')
         
         if response.status_code == 200:
             return response.json()['positions']
         
         return []
         
+    def get_pending_orders(self) -> List[Dict]:
+        """Get all pending orders"""
+        url = f"{self.base_url}/v3/accounts/{self.account_id}/pendingOrders"
+        response = self.transport.get(url, endpoint='pending_orders')
+        
+        if response.status_code == 200:
+            return response.json()['orders']
+        
+        return []
+        
     def close_position(self, instrument: str) -> bool:
         """Close all positions for an instrument"""
         url = f"{self.base_url}/v3/accounts/{self.account_id}/positions/{instrument}/close"
         
-        response = requests.put(url, headers=self.headers)
+        response = self.transport.put(url, endpoint='close_position')
         
         if response.status_code == 200:
             logger.info(f"Closed position for {instrument}")
+            self._invalidate_account_state()
             return True
         else:
             logger.error(f"Failed to close position: {response.text}")
@@ -334,35 +829,37 @@ class ForexTradingBot:
             
     def manage_positions(self):
         """Advanced position management"""
-        positions = self.get_open_positions()
+        positions = self.snapshot.positions
         
         for position in positions:
             instrument = position['instrument']
             unrealized_pl = float(position['unrealizedPL'])
-            units = int(position['long']['units']) if 'long' in position else int(position['short']['units'])
+            # Both sides are always present; short units are negative
+            units = int(position['long']['units']) + int(position['short']['units'])
             
             # Get current market data
             df = self.get_historical_prices(instrument, count=50)
             if df.empty:
                 continue
+            self._attach_indicators(instrument, df)
                 
             current_price = self.get_current_price(instrument)
             if not current_price:
                 continue
                 
             # Get updated signal from algorithm
-            signal = self.algorithm.analyze(df, current_price)
+            signal = self._analyze(df, current_price)
             
             # Check for signal reversal
             if units > 0 and signal.signal in [Signal.SELL, Signal.STRONG_SELL]:
                 logger.info(f"Signal reversal detected for {instrument}. Closing long position.")
-                self.close_position(instrument)
-                self.update_trade_history(instrument, unrealized_pl)
+                if self.close_position(instrument):
+                    self._record_close_estimate(instrument, unrealized_pl)
                 
             elif units < 0 and signal.signal in [Signal.BUY, Signal.STRONG_BUY]:
                 logger.info(f"Signal reversal detected for {instrument}. Closing short position.")
-                self.close_position(instrument)
-                self.update_trade_history(instrument, unrealized_pl)
+                if self.close_position(instrument):
+                    self._record_close_estimate(instrument, unrealized_pl)
                 
             # Trailing stop logic for profitable positions
             elif unrealized_pl > 0:
@@ -376,94 +873,199 @@ class ForexTradingBot:
                     else:  # Short position
                         new_stop = current_price + (2 * atr)
                         
-    def update_trade_history(self, instrument: str, pnl: float):
-        """Update trade history for performance tracking"""
-        self.trade_history.append({
-            'timestamp': datetime.utcnow(),
-            'instrument': instrument,
-            'pnl': pnl
-        })
+    def _record_close_estimate(self, instrument: str, unrealized_pl: float):
+        """Record a close from its pre-close unrealized PL when no fill feed will report it"""
+        # The account model and the transaction stream both record the close's ORDER_FILL
+        if self.account_model is None and self.transaction_stream is None:
+            self.update_trade_history(instrument, unrealized_pl)
+            
+    def record_fill(self, transaction: Dict):
+        """
+        Record the realized PL of an ORDER_FILL that closed or reduced trades
         
-        # Keep only last 100 trades
-        if len(self.trade_history) > 100:
-            self.trade_history = self.trade_history[-100:]
+        Fills can arrive from both the transaction stream and the /changes
+        poll (which also covers anything missed while the stream was down),
+        so each transaction ID is recorded only once.
+        """
+        pnl = realized_pl(transaction)
+        if pnl is None:
+            return
             
-        # Update win/loss counters
-        if pnl > 0:
-            self.winning_trades += 1
-        else:
-            self.losing_trades += 1
+        with self._history_lock:
+            if transaction['id'] in self._recorded_fills:
+                return
+            self._recorded_fills.add(transaction['id'])
+            if len(self._recorded_fills) > 1000:
+                # Transaction IDs are increasing; forget the oldest half
+                keep = sorted(self._recorded_fills, key=int)[500:]
+                self._recorded_fills = set(keep)
+                
+            # Score closed trades against their own stop; reductions stay open
+            outcomes = []
+            for closed in transaction.get('tradesClosed', []):
+                entry = self._trade_risk.pop(closed['tradeID'], None)
+                outcome = None if entry is None else r_multiple(entry[0], float(transaction['price']), *entry[1:])
+                if outcome is not None:
+                    outcomes.append(outcome)
+                
+        logger.info(f"Fill {transaction['id']} for {transaction['instrument']}: "
+                   f"realized PnL ${pnl:.2f} ({transaction.get('reason', 'UNKNOWN')})")
+        self.update_trade_history(transaction['instrument'], pnl, outcomes)
+        
+    def update_trade_history(self, instrument: str, pnl: float, outcomes: List[float] = ()):
+        """Update trade history for performance tracking (outcomes: R multiples of the closed trades)"""
+        with self._history_lock:
+            self.trade_history.append({
+                'timestamp': self.clock.utcnow(),
+                'instrument': instrument,
+                'pnl': pnl
+            })
             
-        # Update daily PnL
-        self.daily_pnl += pnl
+            # Keep only last 100 trades
+            if len(self.trade_history) > 100:
+                self.trade_history = self.trade_history[-100:]
+            self._kelly_outcomes.extend(outcomes)
+            self._kelly_new_trades += len(outcomes)
+                
+            # Update win/loss counters
+            if pnl > 0:
+                self.winning_trades += 1
+            else:
+                self.losing_trades += 1
+                
+            # Update daily PnL
+            self.daily_pnl += pnl
+        
+    def get_closed_trades(self, count: int = 500) -> List[Dict]:
+        """Most recent closed trades, oldest first"""
+        url = f"{self.base_url}/v3/accounts/{self.account_id}/trades"
+        response = self.transport.get(url, params={'state': 'CLOSED', 'count': min(count, 500)},
+                                      endpoint='trades')
+        
+        if response.status_code == 200:
+            return response.json()['trades'][::-1]
+        
+        logger.error(f"Failed to get closed trades: {response.text}")
+        return []
+        
+    def initialize_kelly_sizing(self):
+        """Seed the Monte Carlo sample with the account's closed trades and size from it"""
+        trades = self.get_closed_trades(self.monte_carlo.config['history'])
+        outcomes = [closed_trade_outcome(t) for t in trades]
+        with self._history_lock:
+            self._kelly_outcomes.extend(r for r in outcomes if r is not None)
+        self.update_kelly_sizing()
+            
+    def update_kelly_sizing(self):
+        """Re-run the Monte Carlo stake recommendation on the recorded trade outcomes"""
+        with self._history_lock:
+            outcomes = np.array(self._kelly_outcomes)
+            self._kelly_new_trades = 0
+        max_risk = self.risk_config['max_risk_per_trade']
+        with self._kelly_lock:
+            result = self.monte_carlo.recommend(outcomes, max_fraction=max_risk)
+        if result is None:
+            self.kelly_risk = None
+            logger.info(f"Monte Carlo sizing needs {self.monte_carlo.config['min_trades']} closed trades, "
+                        f"have {len(outcomes)}; risking {max_risk:.1%} per trade")
+            return
+        self.kelly_risk = result.fraction
+        logger.info(f"Monte Carlo sizing over {len(outcomes)} trades: {result.summary()}")
+        
+    def kelly_risk_percent(self) -> float:
+        """Recommended risk per trade, refreshed every refresh_trades closed trades"""
+        if self._kelly_new_trades >= self.monte_carlo.config['refresh_trades']:
+            self.update_kelly_sizing()
+        if self.kelly_risk is None:
+            return self.risk_config['max_risk_per_trade']
+        return max(self.kelly_risk, self.monte_carlo.config['min_fraction'])
         
     def execute_trading_cycle(self):
         """Execute one complete trading cycle with advanced algorithms"""
+        calls_before = self.transport.total_calls
+        if self.indicator_cache is not None:
+            self.indicator_cache.start_cycle()
+        if self.account_model is not None:
+            self.account_model.mark_stale()
         try:
-            # Check account status
-            account = self.get_account_summary()
-            if account:
-                balance = float(account['account']['balance'])
-                margin_used = float(account['account']['marginUsed'])
-                margin_available = float(account['account']['marginAvailable'])
+            # Account state is fetched once and shared by every stage of the cycle
+            with self.snapshot.cycle():
+                # Check account status
+                account = self.snapshot.account
+                if account:
+                    balance = float(account['account']['balance'])
+                    margin_used = float(account['account']['marginUsed'])
+                    margin_available = float(account['account']['marginAvailable'])
                 
-                logger.info(f"Account - Balance: ${balance:.2f}, "
-                          f"Margin Used: ${margin_used:.2f}, "
-                          f"Margin Available: ${margin_available:.2f}")
+                    logger.info(f"Account - Balance: ${balance:.2f}, "
+                              f"Margin Used: ${margin_used:.2f}, "
+                              f"Margin Available: ${margin_available:.2f}")
                 
-                # Log performance metrics
-                if self.trades_today > 0:
-                    win_rate = self.winning_trades / (self.winning_trades + self.losing_trades) * 100
-                    logger.info(f"Today - Trades: {self.trades_today}, "
-                              f"Win Rate: {win_rate:.1f}%, "
-                              f"Daily PnL: ${self.daily_pnl:.2f}")
+                    # Log performance metrics
+                    if self.trades_today > 0 and self.winning_trades + self.losing_trades > 0:
+                        win_rate = self.winning_trades / (self.winning_trades + self.losing_trades) * 100
+                        logger.info(f"Today - Trades: {self.trades_today}, "
+                                  f"Win Rate: {win_rate:.1f}%, "
+                                  f"Daily PnL: ${self.daily_pnl:.2f}")
                 
-            # Manage existing positions
-            self.manage_positions()
-            
-            # Check for new trading opportunities
-            positions = self.get_open_positions()
-            if len(positions) < self.max_positions:
-                for instrument in self.instruments:
-                    # Skip if we already have a position
-                    if any(p['instrument'] == instrument for p in positions):
-                        continue
-                        
-                    # Generate advanced signal
-                    trade_signal = self.generate_signal_advanced(instrument)
-                    
-                    if trade_signal:
-                        # Log the signal details
-                        logger.info(f"\n{'='*50}")
-                        logger.info(f"TRADE SIGNAL for {instrument}:")
-                        logger.info(f"Signal: {trade_signal['signal']}")
-                        logger.info(f"Confidence: {trade_signal['confidence']:.2%}")
-                        logger.info(f"Entry: {trade_signal['entry_price']:.5f}")
-                        logger.info(f"Stop Loss: {trade_signal['stop_loss']:.5f}")
-                        logger.info(f"Take Profit: {trade_signal['take_profit']:.5f}")
-                        logger.info(f"Position Size: {abs(trade_signal['units'])} units")
-                        logger.info(f"Risk: {trade_signal['risk_percent']:.2%} of balance")
-                        logger.info(f"Reason: {trade_signal['reason']}")
-                        logger.info(f"{'='*50}\n")
+                # Manage existing positions
+                self.manage_positions()
+            
+                # Check for new trading opportunities
+                positions = self.snapshot.positions
+                if len(positions) < self.max_positions:
+                    # Skip instruments where we already have a position
+                    candidates = [
+                        instrument for instrument in self.instruments
+                        if not any(p['instrument'] == instrument for p in positions)
+                    ]
+                
+                    # Signals are yielded in instrument order in both modes
+                    for instrument, trade_signal in self.generate_signals(candidates):
+                        if trade_signal:
+                            # Log the signal details
+                            logger.info(f"\n{'='*50}")
+                            logger.info(f"TRADE SIGNAL for {instrument}:")
+                            logger.info(f"Signal: {trade_signal['signal']}")
+                            logger.info(f"Confidence: {trade_signal['confidence']:.2%}")
+                            logger.info(f"Entry: {trade_signal['entry_price']:.5f}")
+                            logger.info(f"Stop Loss: {trade_signal['stop_loss']:.5f}")
+                            logger.info(f"Take Profit: {trade_signal['take_profit']:.5f}")
+                            logger.info(f"Position Size: {abs(trade_signal['units'])} units")
+                            logger.info(f"Risk: {trade_signal['risk_percent']:.2%} of balance")
+                            logger.info(f"Reason: {trade_signal['reason']}")
+                            logger.info(f"{'='*50}\n")
                         
-                        # Place the order
-                        success = self.place_order(
-                            instrument=trade_signal['instrument'],
-                            units=trade_signal['units'],
-                            stop_loss=trade_signal['stop_loss'],
-                            take_profit=trade_signal['take_profit']
-                        )
+                            # Place the order
+                            success = self.place_order(
+                                instrument=trade_signal['instrument'],
+                                units=trade_signal['units'],
+                                stop_loss=trade_signal['stop_loss'],
+                                take_profit=trade_signal['take_profit']
+                            )
                         
-                        if success:
-                            # Only open one position per cycle
-                            break
+                            if success:
+                                # Only open one position per cycle
+                                break
                             
         except Exception as e:
             logger.error(f"Error in trading cycle: {e}", exc_info=True)
             
+        # Report API usage; without the snapshot every hit would have been a request
+        api_calls = self.transport.total_calls - calls_before
+        logger.info(f"API calls this cycle: {api_calls} "
+                   f"(snapshot saved {self.snapshot.hits}, "
+                   f"{api_calls + self.snapshot.hits} without it)")
+        if self.indicator_cache is not None:
+            cache = self.indicator_cache
+            logger.info(f"Indicator cache this cycle: {cache.cycle_hits} hits, {cache.cycle_misses} misses "
+                       f"({cache.cycle_hit_ratio:.0%} hit ratio, {len(cache)} entries, "
+                       f"{cache.bytes / 1024:.0f} KiB)")
+        self.transport.log_latency_report(logging.DEBUG)
+            
     def reset_daily_stats(self):
         """Reset daily statistics"""
-        current_hour = datetime.utcnow().hour
+        current_hour = self.clock.utcnow().hour
         
         # Reset at midnight UTC
         if current_hour == 0 and self.trades_today > 0:
@@ -478,14 +1080,28 @@ class ForexTradingBot:
         logger.info(f"Risk per trade: {self.risk_config['max_risk_per_trade']:.1%}")
         logger.info(f"Max daily loss: {self.risk_config['max_daily_loss']:.1%}")
         
+        if self.stream_config['enabled']:
+            self.start_price_stream()
+        if self.stream_config['transaction_stream']:
+            self.start_transaction_stream()
+        if self.risk_config['use_kelly_criterion']:
+            self.initialize_kelly_sizing()
+        if self.execution_config['batch_analysis']:
+            if self.batch_analyzer.supports(self.algorithm_name):
+                logger.warning(f"Batch analysis trades approximate vectorized {self.algorithm_name} "
+                               f"vote rules (batch_analysis.STRATEGY_VOTES), not the algorithm's analyze()")
+            else:
+                logger.info(f"Batch analysis has no vote rules for {self.algorithm_name}; "
+                            f"analyzing each instrument with the algorithm")
+            
         # Wait for market to open
         while self.running:
-            now = datetime.utcnow()
+            now = self.clock.utcnow()
             
             # Check if market is open (Sunday 5PM ET to Friday 5PM ET)
             if now.weekday() == 5 or (now.weekday() == 6 and now.hour < 22):
                 logger.info("Market is closed. Waiting...")
-                time.sleep(3600)  # Check every hour
+                self.clock.sleep(3600)  # Check every hour
                 continue
                 
             # Reset daily statistics
@@ -495,12 +1111,14 @@ class ForexTradingBot:
             self.execute_trading_cycle()
             
             # Wait before next cycle (5 minutes)
-            time.sleep(300)
+            self.clock.sleep(300)
             
     def stop(self):
         """Stop the bot gracefully"""
         logger.info("Stopping bot...")
         self.running = False
+        self.stop_price_stream()
+        self.stop_transaction_stream()
         
         # Close all positions before stopping
         positions = self.get_open_positions()
@@ -511,4 +1129,30 @@ class ForexTradingBot:
         if self.winning_trades + self.losing_trades > 0:
             win_rate = self.winning_trades / (self.winning_trades + self.losing_trades) * 100
             logger.info(f"Final Statistics - Total Trades: {self.winning_trades + self.losing_trades}, "
-                 
+                      f"Win Rate: {win_rate:.1f}%")
+            
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            
+        # Log API latency per endpoint and release pooled connections
+        self.transport.log_latency_report()
+        self.transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the forex trading bot')
+    parser.add_argument('--config', default='config.json', help='Bot configuration (see config_template.json)')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    bot = ForexTradingBot.from_config(config)
+    try:
+        bot.run()
+    except KeyboardInterrupt:
+        bot.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Record and replay HTTP traffic for deterministic performance runs
+Captures every REST request/response the bot makes and serves them back
+"""
+
+import gzip
+import json
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _request_target(url: str) -> Tuple[str, str]:
+    """(path, normalized query) so parameter order never breaks a match"""
+    parts = urlsplit(url)
+    return parts.path, urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+def _body_text(body) -> Optional[str]:
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        return body.decode('utf-8', errors='replace')
+    return str(body)
+
+
+class CaptureWriter:
+    """Append-only JSON-lines capture file (gzip-compressed if the name ends in .gz)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open(path, 'a')
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.records = 0
+
+    def write(self, request: requests.PreparedRequest, response: requests.Response, elapsed_ms: float):
+        record = {
+            't': round(time.monotonic() - self._start, 6),
+            'ms': round(elapsed_ms, 3),
+            'method': request.method,
+            'url': request.url,
+            'body': _body_text(request.body),
+            'status': response.status_code,
+            'ctype': response.headers.get('Content-Type', 'application/json'),
+            'response': response.text
+        }
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_capture(path: str) -> List[Dict]:
+    """Load every record from a capture file, skipping a torn last line"""
+    records = []
+    with _open(path, 'r') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping truncated record in {path}")
+    return records
+
+
+class RecordingAdapter(BaseAdapter):
+    """Wraps a transport adapter and writes every exchange to a CaptureWriter"""
+
+    def __init__(self, inner: BaseAdapter, writer: CaptureWriter):
+        super().__init__()
+        self.inner = inner
+        self.writer = writer
+
+    def send(self, request, stream=False, **kwargs):
+        start = time.perf_counter()
+        response = self.inner.send(request, stream=stream, **kwargs)
+        if not stream:
+            self.writer.write(request, response, (time.perf_counter() - start) * 1000)
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves recorded responses instead of touching the network
+
+    Requests are matched on method, path, query and body in recorded
+    order; if the workload has drifted (e.g. a strategy change sends a
+    different order) the next unused response for the same method and
+    path is used instead. Streaming endpoints are not captured, so
+    record with streaming disabled for a fully deterministic replay.
+    """
+
+    def __init__(self, records: List[Dict], speed: float = 1.0):
+        """
+        Initialize the adapter
+
+        Args:
+            records: Records from read_capture
+            speed: Latency scale; 1.0 reproduces recorded latency, 10.0 is
+                ten times faster, 0 disables waiting entirely
+        """
+        super().__init__()
+        self.speed = speed
+        self._exact: Dict[Tuple, Deque[int]] = defaultdict(deque)
+        self._by_path: Dict[Tuple, Deque[int]] = defaultdict(deque)
+        self._records = records
+        self._used = [False] * len(records)
+        self._lock = threading.Lock()
+        self.served = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+        for index, record in enumerate(records):
+            path, query = _request_target(record['url'])
+            self._exact[(record['method'], path, query, record.get('body'))].append(index)
+            self._by_path[(record['method'], path)].append(index)
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 1.0) -> 'ReplayAdapter':
+        return cls(read_capture(path), speed)
+
+    def _take(self, queue: Deque[int]) -> Optional[int]:
+        while queue:
+            index = queue.popleft()
+            if not self._used[index]:
+                self._used[index] = True
+                return index
+        return None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        path, query = _request_target(request.url)
+        with self._lock:
+            index = self._take(self._exact[(request.method, path, query, _body_text(request.body))])
+            if index is None:
+                index = self._take(self._by_path[(request.method, path)])
+                if index is not None:
+                    self.fallbacks += 1
+            if index is None:
+                self.misses += 1
+            else:
+                self.served += 1
+
+        if index is None:
+            return self._build(request, 404, 'application/json',
+                               json.dumps({'errorMessage': f"No recorded response for {request.method} {path}"}))
+
+        record = self._records[index]
+        if self.speed > 0:
+            time.sleep(record['ms'] / 1000 / self.speed)
+        return self._build(request, record['status'], record['ctype'], record['response'])
+
+    def _build(self, request, status: int, content_type: str, text: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK' if status < 400 else 'Error'
+        response._content = text.encode('utf-8')
+        response.headers = CaseInsensitiveDict({'Content-Type': content_type})
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
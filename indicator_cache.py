@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Indicator result cache
+LRU memoization of indicator values with an entry and memory cap
+"""
+
+import sys
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def params_hash(params: Optional[Dict]) -> str:
+    """Stable short hash of an indicator/algorithm configuration"""
+    encoded = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+
+def candle_key(instrument: str, granularity: str, df: pd.DataFrame, params: str) -> Tuple:
+    """
+    Cache key for indicator values over a candle DataFrame
+
+    The last row is the forming candle, so its OHLC is part of the key
+    next to the last closed candle's timestamp: a new tick or a new
+    candle both produce a new key.
+    """
+    last = df.iloc[-1]
+    last_closed = df['time'].iat[-2] if len(df) > 1 else None
+    forming = (last['time'], float(last['open']), float(last['high']),
+               float(last['low']), float(last['close']))
+    return instrument, granularity, last_closed, forming, params
+
+
+def _sizeof(value) -> int:
+    """Approximate memory held by a cached value"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + sys.getsizeof(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU cache for indicator results
+
+    Entries are evicted least recently used first once either the entry
+    count or the approximate memory footprint exceeds its cap. Hit and
+    miss counters are kept both in total and per trading cycle.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Approximate memory cap across all entries
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.cycle_hits = 0
+        self.cycle_misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                self.cycle_misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.cycle_hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """Cached value for key, computing and storing it on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def start_cycle(self):
+        """Reset the per-cycle hit/miss counters"""
+        with self._lock:
+            self.cycle_hits = 0
+            self.cycle_misses = 0
+
+    @property
+    def cycle_hit_ratio(self) -> float:
+        lookups = self.cycle_hits + self.cycle_misses
+        return self.cycle_hits / lookups if lookups else 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
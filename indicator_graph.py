@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Indicator dependency graph
+Indicators declared as DAG nodes so shared inputs are computed once per bar
+"""
+
+import time
+import logging
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import indicator_kernels as kernels
+from streaming_indicators import DEFAULT_INDICATOR_CONFIG, indicator_config
+from support_resistance import DEFAULT_SR_CONFIG, scan_levels
+
+logger = logging.getLogger(__name__)
+
+GRAPH_INPUTS = ('open', 'high', 'low', 'close')
+
+# Indicators each part of the hybrid algorithm reads
+HYBRID_REQUIREMENTS = {
+    'momentum': ['rsi', 'macd_hist', 'stoch_k', 'stoch_d', 'atr'],
+    'trend': ['ema_fast', 'ema_slow', 'adx', 'plus_di', 'minus_di', 'macd', 'atr'],
+    'mean_reversion': ['bb_upper', 'bb_middle', 'bb_lower', 'rsi', 'atr'],
+    'volatility': ['volatility_regime', 'atr']
+}
+
+
+class Node:
+    """One indicator: a function of its dependencies' outputs"""
+
+    __slots__ = ('name', 'func', 'deps')
+
+    def __init__(self, name: str, func: Callable, deps: Tuple[str, ...]):
+        self.name = name
+        self.func = func
+        self.deps = deps
+
+
+class IndicatorGraph:
+    """
+    Registry of indicator nodes and aliases
+
+    Nodes are named after what they compute including their parameters
+    (e.g. ema_20, atr_14), so two consumers asking for the same EMA or
+    ATR resolve to one node; friendly names such as ema_fast are aliases.
+    """
+
+    def __init__(self, inputs: Iterable[str] = GRAPH_INPUTS):
+        self.inputs = set(inputs)
+        self.nodes: Dict[str, Node] = {}
+        self.aliases: Dict[str, str] = {}
+
+    def add(self, name: str, func: Callable, deps: Iterable[str] = ()) -> str:
+        """Register a node (re-registering the same name is a no-op)"""
+        if name not in self.nodes:
+            deps = tuple(self.resolve(dep) for dep in deps)
+            for dep in deps:
+                if dep not in self.nodes and dep not in self.inputs:
+                    raise ValueError(f"Unknown dependency {dep} for indicator {name}")
+            self.nodes[name] = Node(name, func, deps)
+        return name
+
+    def alias(self, alias: str, target: str):
+        self.aliases[alias] = self.resolve(target)
+
+    def resolve(self, name: str) -> str:
+        return self.aliases.get(name, name)
+
+    def dependencies(self, names: Iterable[str]) -> List[str]:
+        """Nodes needed for names, in evaluation order"""
+        order, seen = [], set()
+
+        def visit(name: str):
+            if name in seen or name in self.inputs:
+                return
+            seen.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for name in names:
+            name = self.resolve(name)
+            if name not in self.nodes and name not in self.inputs:
+                raise KeyError(name)
+            visit(name)
+        return order
+
+    def run(self, inputs: Dict[str, np.ndarray], cache: Optional[Dict[str, np.ndarray]] = None) -> 'GraphRun':
+        return GraphRun(self, inputs, cache)
+
+    def run_frame(self, df: pd.DataFrame, cache: Optional[Dict[str, np.ndarray]] = None) -> 'GraphRun':
+        """Lazy evaluation over a candle DataFrame; nothing is computed until requested"""
+        return GraphRun(self, {name: df[name].values for name in self.inputs if name in df}, cache)
+
+
+class GraphRun:
+    """
+    Memoized evaluation of an IndicatorGraph over one set of candles
+
+    Every node is computed at most once, the first time anything needs
+    it. timings records each computed node (exclusive of its
+    dependencies) in evaluation order; requests counts how often each
+    node was asked for, directly or as a dependency.
+
+    cache, if given, is a dict of node values shared by runs over the
+    same inputs: nodes found there are not recomputed and computed nodes
+    are added to it. Because node names carry their parameters, graphs
+    built from different configs can share one cache and only compute
+    the indicators their configs change.
+
+    When attached to DataFrame.attrs the run is shared rather than
+    deep-copied into derived frames.
+    """
+
+    def __init__(self, graph: IndicatorGraph, inputs: Dict[str, np.ndarray],
+                 cache: Optional[Dict[str, np.ndarray]] = None):
+        self.graph = graph
+        self.values: Dict[str, np.ndarray] = dict(inputs)
+        self.cache = cache
+        self.timings: Dict[str, float] = OrderedDict()
+        self.requests: Counter = Counter()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.get(name)
+
+    def get(self, name: str) -> np.ndarray:
+        name = self.graph.resolve(name)
+        self.requests[name] += 1
+        if name in self.values:
+            return self.values[name]
+        if self.cache is not None and name in self.cache:
+            value = self.values[name] = self.cache[name]
+            return value
+
+        node = self.graph.nodes[name]
+        args = [self.get(dep) for dep in node.deps]
+        start = time.perf_counter()
+        value = node.func(*args)
+        self.timings[name] = (time.perf_counter() - start) * 1000
+        self.values[name] = value
+        if self.cache is not None:
+            self.cache[name] = value
+        return value
+
+    def compute(self, names: Iterable[str]) -> Dict[str, np.ndarray]:
+        return {name: self.get(name) for name in names}
+
+    def latest(self, names: Iterable[str]) -> Dict[str, float]:
+        return {name: float(self.get(name)[-1]) for name in names}
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.timings.values())
+
+    def report(self) -> List[Dict]:
+        """Computed nodes in evaluation order with time and request counts"""
+        return [{'node': name, 'ms': ms, 'requests': self.requests[name],
+                 'deps': list(self.graph.nodes[name].deps)}
+                for name, ms in self.timings.items()]
+
+    def log_report(self, level: int = logging.DEBUG):
+        if not logger.isEnabledFor(level) or not self.timings:
+            return
+        nodes = ', '.join(f"{row['node']} {row['ms']:.2f}ms x{row['requests']}" for row in self.report())
+        logger.log(level, f"Indicator graph: {len(self.timings)} nodes in {self.total_ms:.2f}ms ({nodes})")
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    out[:1] = np.nan
+    out[1:] = x[:-1]
+    return out
+
+
+def _rolling(func: str, period: int) -> Callable[[np.ndarray], np.ndarray]:
+    return lambda x: getattr(pd.Series(x).rolling(period), func)().values
+
+
+def _divide(a: np.ndarray, b: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return scale * a / b
+
+
+def _rsi(gain: np.ndarray, loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def _dx(plus_di: np.ndarray, minus_di: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+
+def hybrid_graph(config: Optional[Dict] = None) -> IndicatorGraph:
+    """
+    Every indicator used by the hybrid algorithm's sub-strategies
+
+    Outputs match the streaming_indicators batch formulas. ATR and the
+    ADX smoothing share one node when their periods agree, as do the
+    trend EMAs and the MACD EMAs, and Bollinger and the volatility
+    regime share one rolling standard deviation.
+    """
+    c = indicator_config(config, {**DEFAULT_INDICATOR_CONFIG, **DEFAULT_SR_CONFIG})
+    g = IndicatorGraph()
+
+    def wilder(name: str, source: str, period: int) -> str:
+        return g.add(name, lambda x: kernels.wilder(x, period), [source])
+
+    def ema(period: int, source: str = 'close') -> str:
+        name = f"ema_{period}" if source == 'close' else f"{g.resolve(source)}_ema_{period}"
+        return g.add(name, lambda x: kernels.ema(x, period), [source])
+
+    g.add('prev_close', _shift, ['close'])
+    g.add('delta', lambda close, prev: close - prev, ['close', 'prev_close'])
+    g.add('true_range', kernels.true_range, ['high', 'low', 'close'])
+
+    # RSI
+    g.add('gain', lambda d: np.clip(d, 0, None), ['delta'])
+    g.add('loss', lambda d: np.clip(-d, 0, None), ['delta'])
+    gain = wilder(f"avg_gain_{c['rsi_period']}", 'gain', c['rsi_period'])
+    loss = wilder(f"avg_loss_{c['rsi_period']}", 'loss', c['rsi_period'])
+    g.alias('rsi', g.add(f"rsi_{c['rsi_period']}", _rsi, [gain, loss]))
+
+    # ATR, shared with the ADX smoothing when the periods agree
+    g.alias('atr', wilder(f"atr_{c['atr_period']}", 'true_range', c['atr_period']))
+
+    # Trend EMAs and MACD
+    g.alias('ema_fast', ema(c['ema_fast']))
+    g.alias('ema_slow', ema(c['ema_slow']))
+    g.alias('macd', g.add(f"macd_{c['macd_fast']}_{c['macd_slow']}", lambda fast, slow: fast - slow,
+                          [ema(c['macd_fast']), ema(c['macd_slow'])]))
+    g.alias('macd_signal', ema(c['macd_signal'], source='macd'))
+    g.alias('macd_hist', g.add(f"macd_hist_{c['macd_fast']}_{c['macd_slow']}_{c['macd_signal']}",
+                               lambda line, signal: line - signal, ['macd', 'macd_signal']))
+
+    # ADX / DI
+    period = c['adx_period']
+    g.add('up_move', lambda high: high - _shift(high), ['high'])
+    g.add('down_move', lambda low: -(low - _shift(low)), ['low'])
+    g.add('plus_dm', lambda up, down: np.where((up > down) & (up > 0), up, 0.0), ['up_move', 'down_move'])
+    g.add('minus_dm', lambda up, down: np.where((down > up) & (down > 0), down, 0.0), ['up_move', 'down_move'])
+    adx_atr = wilder(f"atr_{period}", 'true_range', period)
+    g.alias('plus_di', g.add(f"plus_di_{period}", lambda dm, atr: _divide(dm, atr, 100),
+                             [wilder(f"plus_dm_{period}", 'plus_dm', period), adx_atr]))
+    g.alias('minus_di', g.add(f"minus_di_{period}", lambda dm, atr: _divide(dm, atr, 100),
+                              [wilder(f"minus_dm_{period}", 'minus_dm', period), adx_atr]))
+    g.add(f"dx_{period}", _dx, ['plus_di', 'minus_di'])
+    g.alias('adx', wilder(f"adx_{period}", f"dx_{period}", period))
+
+    # Bollinger bands and the volatility regime share the rolling std
+    bb = c['bb_period']
+    sma = g.add(f"sma_{bb}", _rolling('mean', bb), ['close'])
+    std = g.add(f"std_{bb}", _rolling('std', bb), ['close'])
+    g.alias('bb_middle', sma)
+    g.alias('bb_upper', g.add(f"bb_upper_{bb}_{c['bb_std']}", lambda mid, sd: mid + c['bb_std'] * sd, [sma, std]))
+    g.alias('bb_lower', g.add(f"bb_lower_{bb}_{c['bb_std']}", lambda mid, sd: mid - c['bb_std'] * sd, [sma, std]))
+    long_window = bb * 5
+    g.add(f"std_{bb}_avg_{long_window}", _rolling('mean', long_window), [std])
+    g.alias('volatility_regime', g.add(f"volatility_regime_{bb}", lambda sd, avg: _divide(sd, avg),
+                                       [std, f"std_{bb}_avg_{long_window}"]))
+
+    # Stochastic
+    k = c['stoch_k']
+    highest = g.add(f"highest_{k}", lambda x: kernels.rolling_max(x, k), ['high'])
+    lowest = g.add(f"lowest_{k}", lambda x: kernels.rolling_min(x, k), ['low'])
+    g.alias('stoch_k', g.add(f"stoch_k_{k}", lambda close, hi, lo: _divide(close - lo, hi - lo, 100),
+                             ['close', highest, lowest]))
+    g.alias('stoch_d', g.add(f"stoch_d_{k}_{c['stoch_d']}", _rolling('mean', c['stoch_d']), ['stoch_k']))
+
+    # Support / resistance (nearest clustered pivot levels below and above the close)
+    sr = g.add(f"sr_{c['lookback_period']}_{c['sr_threshold']}_{c['pivot_window']}",
+               lambda high, low, close: scan_levels(high, low, close, c), ['high', 'low', 'close'])
+    g.alias('support', g.add(f"{sr}_support", lambda levels: levels['support'], [sr]))
+    g.alias('resistance', g.add(f"{sr}_resistance", lambda levels: levels['resistance'], [sr]))
+    return g
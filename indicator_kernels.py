@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Indicator kernels with an optional JIT backend
+Recursive indicators compiled with Numba when it is installed, pandas/NumPy otherwise
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from streaming_indicators import _ewm_alpha, atr as _atr_reference, rsi as _rsi_reference, \
+    adx as _adx_reference, true_range as _true_range_reference
+
+try:
+    import numba
+except ImportError:  # Optional speedup
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('numpy', 'numba')
+_backend = 'numba' if numba is not None else 'numpy'
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def set_backend(name: str):
+    """Select 'numba' or 'numpy' (the pandas/NumPy reference formulas)"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend: {name}")
+    if name == 'numba' and numba is None:
+        raise RuntimeError("Numba is not installed")
+    _backend = name
+
+
+def _com(span: float = None, alpha: float = None) -> float:
+    """pandas center of mass for a span or alpha"""
+    if span is not None:
+        return float((span - 1) / 2)
+    return float((1 - alpha) / alpha)
+
+
+def _as_float(x) -> np.ndarray:
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+# ---------------------------------------------------------------------------
+# Numba kernels; the arithmetic follows pandas step for step
+# ---------------------------------------------------------------------------
+
+if numba is not None:
+    _jit = numba.njit(cache=True, nogil=True, error_model='numpy')
+
+    @_jit
+    def _ewm_nb(x, alpha):
+        n = x.shape[0]
+        out = np.empty(n)
+        if n == 0:
+            return out
+        factor = 1. - alpha
+        weighted = x[0]
+        old_wt = 1.
+        out[0] = weighted
+        for i in range(1, n):
+            cur = x[i]
+            if weighted == weighted:
+                old_wt *= factor
+                if cur == cur:
+                    if weighted != cur:
+                        weighted = old_wt * weighted + alpha * cur
+                        weighted /= (old_wt + alpha)
+                    old_wt = 1.
+            elif cur == cur:
+                weighted = cur
+            out[i] = weighted
+        return out
+
+    @_jit
+    def _ewm_rows_nb(x, alphas):
+        out = np.empty_like(x)
+        for row in range(x.shape[0]):
+            out[row] = _ewm_nb(x[row], alphas[row])
+        return out
+
+    @_jit
+    def _true_range_nb(high, low, close):
+        n = high.shape[0]
+        tr = np.empty(n)
+        if n == 0:
+            return tr
+        tr[0] = high[0] - low[0]
+        for i in range(1, n):
+            tr[i] = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        return tr
+
+    @_jit
+    def _rsi_nb(close, alpha):
+        n = close.shape[0]
+        gain = np.empty(n)
+        loss = np.empty(n)
+        if n == 0:
+            return gain
+        gain[0] = np.nan
+        loss[0] = np.nan
+        for i in range(1, n):
+            delta = close[i] - close[i - 1]
+            if delta != delta:
+                gain[i] = delta
+                loss[i] = delta
+            else:
+                gain[i] = delta if delta > 0 else 0.0
+                loss[i] = -delta if delta < 0 else 0.0
+        avg_gain = _ewm_nb(gain, alpha)
+        avg_loss = _ewm_nb(loss, alpha)
+        out = np.empty(n)
+        for i in range(n):
+            out[i] = 100 - 100 / (1 + avg_gain[i] / avg_loss[i])
+        return out
+
+    @_jit
+    def _adx_nb(high, low, close, alpha):
+        n = high.shape[0]
+        plus_dm = np.zeros(n)
+        minus_dm = np.zeros(n)
+        for i in range(1, n):
+            up = high[i] - high[i - 1]
+            down = -(low[i] - low[i - 1])
+            if up > down and up > 0:
+                plus_dm[i] = up
+            if down > up and down > 0:
+                minus_dm[i] = down
+        atr = _ewm_nb(_true_range_nb(high, low, close), alpha)
+        plus = _ewm_nb(plus_dm, alpha)
+        minus = _ewm_nb(minus_dm, alpha)
+        plus_di = np.empty(n)
+        minus_di = np.empty(n)
+        dx = np.empty(n)
+        for i in range(n):
+            plus_di[i] = 100 * plus[i] / atr[i]
+            minus_di[i] = 100 * minus[i] / atr[i]
+            dx[i] = 100 * abs(plus_di[i] - minus_di[i]) / (plus_di[i] + minus_di[i])
+        return _ewm_nb(dx, alpha), plus_di, minus_di
+
+    @_jit
+    def _rolling_extreme_nb(x, period, maximum):
+        # Monotonic deque of indices held in a ring buffer
+        n = x.shape[0]
+        out = np.empty(n)
+        # Up to period + 1 live entries, plus one slot so full != empty
+        size = period + 2
+        ring = np.empty(size, dtype=np.int64)
+        head = 0
+        tail = 0
+        for i in range(n):
+            value = x[i]
+            while head != tail:
+                last = ring[(tail - 1) % size]
+                if (x[last] <= value) if maximum else (x[last] >= value):
+                    tail = (tail - 1) % size
+                else:
+                    break
+            ring[tail] = i
+            tail = (tail + 1) % size
+            if ring[head] <= i - period:
+                head = (head + 1) % size
+            out[i] = x[ring[head]] if i >= period - 1 else np.nan
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Public kernels, dispatched on the active backend
+# ---------------------------------------------------------------------------
+
+def ewm_mean(x: np.ndarray, span: float = None, alpha: float = None) -> np.ndarray:
+    """pandas ewm(span=... or alpha=..., adjust=False).mean()"""
+    x = _as_float(x)
+    com = _com(span, alpha)
+    if _backend == 'numba':
+        return _ewm_nb(x, 1. / (1. + com))
+    return pd.Series(x).ewm(com=com, adjust=False).mean().values
+
+
+def ewm_rows(x: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    """Row-wise ewm over a 2-D array with one pandas-derived alpha per row"""
+    x = _as_float(x)
+    alphas = _as_float(alphas)
+    if _backend == 'numba':
+        return _ewm_rows_nb(x, alphas)
+    return np.vstack([pd.Series(row).ewm(com=_com(alpha=a), adjust=False).mean().values
+                      for row, a in zip(x, alphas)]) if len(x) else x.copy()
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    return ewm_mean(x, span=period)
+
+
+def wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """Wilder smoothing (alpha = 1 / period)"""
+    return ewm_mean(x, alpha=1 / period)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    if _backend == 'numba':
+        return _true_range_nb(high, low, close)
+    return _true_range_reference(pd.Series(high), pd.Series(low), pd.Series(close)).values
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    if _backend == 'numba':
+        return _ewm_nb(_true_range_nb(high, low, close), _ewm_alpha(alpha=1 / period))
+    return _atr_reference(pd.Series(high), pd.Series(low), pd.Series(close), period).values
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    close = _as_float(close)
+    if _backend == 'numba':
+        return _rsi_nb(close, _ewm_alpha(alpha=1 / period))
+    return _rsi_reference(pd.Series(close), period).values
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+        period: int = 14) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(adx, plus_di, minus_di)"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    if _backend == 'numba':
+        return _adx_nb(high, low, close, _ewm_alpha(alpha=1 / period))
+    frame = _adx_reference(pd.Series(high), pd.Series(low), pd.Series(close), period)
+    return frame['adx'].values, frame['plus_di'].values, frame['minus_di'].values
+
+
+def rolling_max(x: np.ndarray, period: int) -> np.ndarray:
+    x = _as_float(x)
+    if _backend == 'numba':
+        return _rolling_extreme_nb(x, period, True)
+    return pd.Series(x).rolling(period).max().values
+
+
+def rolling_min(x: np.ndarray, period: int) -> np.ndarray:
+    x = _as_float(x)
+    if _backend == 'numba':
+        return _rolling_extreme_nb(x, period, False)
+    return pd.Series(x).rolling(period).min().values
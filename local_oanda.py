@@ -0,0 +1,990 @@
+#!/usr/bin/env python3
+"""
+Local OANDA v20 stand-in server
+Implements the endpoints ForexTradingBot uses, backed by synthetic or stored
+candles, with configurable injected latency for offline benchmarking, or
+in-process without HTTP for event-driven backtests
+"""
+
+import re
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from candle_buffer import GRANULARITY_SECONDS
+from candle_codec import ns_to_rfc3339, rfc3339_to_ns
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+
+
+def format_time(ns: int) -> str:
+    return str(ns_to_rfc3339([ns])[0])
+
+
+def parse_time(value: str) -> int:
+    """Parse an RFC3339 or UNIX-seconds timestamp to epoch ns"""
+    try:
+        return int(float(value) * NS_PER_SECOND)
+    except ValueError:
+        return int(rfc3339_to_ns([value if value.endswith('Z') else value + 'Z'])[0])
+
+
+def default_spread(instrument: str) -> float:
+    """Typical spread in price units (about 1.2 pips)"""
+    return 0.012 if instrument.endswith('JPY') else 0.00012
+
+
+class CandleMarket:
+    """Mid-price candles at one base granularity, aggregated to coarser ones on request"""
+
+    def __init__(self, base_granularity: str, data: Dict[str, Dict[str, np.ndarray]],
+                 spreads: Optional[Dict[str, float]] = None):
+        """
+        Initialize the market
+
+        Args:
+            base_granularity: Granularity of the stored bars (e.g. 'M1')
+            data: Per instrument dict of 'time' (epoch ns), 'open', 'high',
+                'low', 'close' and 'volume' arrays sorted by time
+            spreads: Per instrument spread in price units
+        """
+        self.base_granularity = base_granularity
+        self.base_ns = GRANULARITY_SECONDS[base_granularity] * NS_PER_SECOND
+        self.data = data
+        self.spreads = spreads or {}
+
+    @property
+    def instruments(self) -> List[str]:
+        return list(self.data)
+
+    @classmethod
+    def synthetic(cls, instruments: List[str], end_ns: int, days: float = 60,
+                  base_granularity: str = 'M1', seed: int = 7) -> 'CandleMarket':
+        """Random-walk market covering `days` before end_ns, plus as long again after it"""
+        rng = np.random.default_rng(seed)
+        base_ns = GRANULARITY_SECONDS[base_granularity] * NS_PER_SECOND
+        bars = int(days * 86400 * NS_PER_SECOND // base_ns) * 2
+        start_ns = (end_ns - bars // 2 * base_ns) // base_ns * base_ns
+        times = start_ns + np.arange(bars, dtype=np.int64) * base_ns
+
+        data = {}
+        for instrument in instruments:
+            price0 = 110.0 if instrument.endswith('JPY') else 1.0 + rng.random() * 0.5
+            step = price0 * 0.0002 * np.sqrt(base_ns / (60 * NS_PER_SECOND))
+            closes = price0 + np.cumsum(rng.normal(0, step, bars))
+            opens = np.concatenate(([price0], closes[:-1]))
+            wick = np.abs(rng.normal(0, step / 2, (2, bars)))
+            data[instrument] = {
+                'time': times,
+                'open': opens,
+                'high': np.maximum(opens, closes) + wick[0],
+                'low': np.minimum(opens, closes) - wick[1],
+                'close': closes,
+                'volume': rng.integers(1, 200, bars)
+            }
+        return cls(base_granularity, data)
+
+    @classmethod
+    def from_store(cls, store, instruments: List[str], granularity: str) -> 'CandleMarket':
+        """Market replaying candles recorded in a CandleStore"""
+        data = {}
+        for instrument in instruments:
+            records = store.read(instrument, granularity)
+            if len(records) == 0:
+                raise ValueError(f"No stored {granularity} candles for {instrument}")
+            data[instrument] = {name: np.array(records[name]) for name in records.dtype.names}
+        return cls(granularity, data)
+
+    def spread(self, instrument: str) -> float:
+        return self.spreads.get(instrument, default_spread(instrument))
+
+    def _visible(self, instrument: str, now_ns: int) -> int:
+        """Number of base bars that have opened by now_ns"""
+        return int(np.searchsorted(self.data[instrument]['time'], now_ns, side='right'))
+
+    def mid(self, instrument: str, now_ns: int) -> Optional[float]:
+        """Price at now_ns: the open of the current base bar (no look-ahead)"""
+        n = self._visible(instrument, now_ns)
+        if n == 0:
+            return None
+        bars = self.data[instrument]
+        if bars['time'][n - 1] + self.base_ns <= now_ns:
+            return float(bars['close'][n - 1])
+        return float(bars['open'][n - 1])
+
+    def quote(self, instrument: str, now_ns: int) -> Optional[Tuple[float, float]]:
+        """(bid, ask) at now_ns"""
+        mid = self.mid(instrument, now_ns)
+        if mid is None:
+            return None
+        half = self.spread(instrument) / 2
+        return mid - half, mid + half
+
+    def bars(self, instrument: str, start_ns: int, end_ns: int) -> Dict[str, np.ndarray]:
+        """Complete base bars that closed in (start_ns, end_ns]"""
+        bars = self.data[instrument]
+        times = bars['time']
+        lo = int(np.searchsorted(times, start_ns - self.base_ns, side='right'))
+        hi = int(np.searchsorted(times, end_ns - self.base_ns, side='right'))
+        return {name: values[lo:hi] for name, values in bars.items()}
+
+    def candles(self, instrument: str, granularity: str, now_ns: int,
+                count: Optional[int] = None, from_ns: Optional[int] = None,
+                include_first: bool = True, to_ns: Optional[int] = None) -> List[Dict]:
+        """
+        Candles as OANDA returns them, ending with the current incomplete one
+
+        Only data up to now_ns is used; the current base bar contributes its
+        open only. With to_ns, candles end before the one opening at to_ns.
+        """
+        gran_ns = GRANULARITY_SECONDS[granularity] * NS_PER_SECOND
+        if gran_ns < self.base_ns or gran_ns % self.base_ns:
+            raise ValueError(f"{granularity} cannot be built from {self.base_granularity} bars")
+
+        bars = self.data[instrument]
+        n = self._visible(instrument, now_ns)
+        end_ns = now_ns
+        if to_ns is not None:
+            end_ns = min(now_ns, to_ns // gran_ns * gran_ns)
+            n = min(n, int(np.searchsorted(bars['time'], end_ns, side='left')))
+        if n == 0:
+            return []
+
+        if from_ns is not None:
+            lo = int(np.searchsorted(bars['time'], from_ns // gran_ns * gran_ns, side='left'))
+            count = count or 500
+        else:
+            count = count or 500
+            # Look far enough back to cover weekends and other gaps
+            span = count * gran_ns
+            while True:
+                lo = int(np.searchsorted(bars['time'], end_ns - span, side='left'))
+                if lo == 0 or len(np.unique(bars['time'][lo:n] // gran_ns)) > count:
+                    break
+                span *= 2
+
+        times = bars['time'][lo:n]
+        if len(times) == 0:
+            return []
+        opens = bars['open'][lo:n]
+        highs = bars['high'][lo:n].copy()
+        lows = bars['low'][lo:n].copy()
+        closes = bars['close'][lo:n].copy()
+        volumes = bars['volume'][lo:n]
+
+        # The current base bar has only just opened
+        if times[-1] + self.base_ns > now_ns:
+            highs[-1] = lows[-1] = closes[-1] = opens[-1]
+
+        buckets = times // gran_ns
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.concatenate((starts[1:], [len(times)])) - 1
+
+        candle_times = buckets[starts] * gran_ns
+        result_o = opens[starts]
+        result_h = np.maximum.reduceat(highs, starts)
+        result_l = np.minimum.reduceat(lows, starts)
+        result_c = closes[ends]
+        result_v = np.add.reduceat(volumes, starts)
+        complete = candle_times + gran_ns <= now_ns
+
+        keep = np.ones(len(starts), dtype=bool)
+        if from_ns is not None:
+            keep &= candle_times >= from_ns if include_first else candle_times > from_ns
+        index = np.flatnonzero(keep)
+        index = index[:count] if from_ns is not None else index[-count:]
+
+        formatted = ns_to_rfc3339(candle_times[index]).tolist()
+        return [
+            {
+                'complete': bool(complete[i]),
+                'volume': int(result_v[i]),
+                'time': t,
+                'o': result_o[i], 'h': result_h[i], 'l': result_l[i], 'c': result_c[i]
+            }
+            for t, i in zip(formatted, index)
+        ]
+
+
+class V20Simulator:
+    """
+    In-memory OANDA account: market orders with stop-loss/take-profit on fill,
+    position netting, closes and a transaction log with /changes support
+    """
+
+    ACCOUNT_PATH = re.compile(r'^/v3/accounts/([^/]+)(/.*)?$')
+    CANDLES_PATH = re.compile(r'^/v3/instruments/([A-Z0-9_]+)/candles$')
+    CLOSE_PATH = re.compile(r'^/positions/([A-Z0-9_]+)/close$')
+
+    def __init__(self, market: CandleMarket, account_id: str = '101-001-0000000-001',
+                 balance: float = 100000.0, margin_rate: float = 0.02,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the simulator
+
+        Args:
+            market: Candle source used for prices and stop/take-profit triggers
+            account_id: Account ID the endpoints answer to
+            balance: Starting balance in account currency (USD)
+            margin_rate: Margin requirement as a fraction of position value
+            clock: Returns the current time in epoch ns (defaults to wall clock)
+        """
+        self.market = market
+        self.account_id = account_id
+        self.balance = balance
+        self.margin_rate = margin_rate
+        self.clock = clock or time.time_ns
+
+        self.transactions: List[Dict] = []
+        self.effects: List[Dict] = []
+        self.trades: Dict[str, Dict] = {}
+        self.open_trades: Dict[str, Dict] = {}       # Open subset of trades, in ID order
+        self._realized: Dict[Tuple[str, int], float] = {}  # Realized PL per (instrument, side)
+        self.orders: Dict[str, Dict] = {}
+        self.traded_instruments: List[str] = []
+        self._checked_until = self.clock()
+        self._lock = threading.RLock()
+
+        self._transaction({'type': 'CREATE', 'balance': f"{balance:.4f}"}, {})
+
+    # ------------------------------------------------------------------ helpers
+
+    @property
+    def last_transaction_id(self) -> str:
+        return str(len(self.transactions))
+
+    def _transaction(self, fields: Dict, effects: Dict) -> Dict:
+        transaction = {
+            'id': str(len(self.transactions) + 1),
+            'time': format_time(self.clock()),
+            'accountID': self.account_id
+        }
+        transaction.update(fields)
+        self.transactions.append(transaction)
+        self.effects.append(effects)
+        return transaction
+
+    def _to_account_currency(self, instrument: str, amount: float, price: float) -> float:
+        """Convert an amount in the quote currency to USD"""
+        base, quote = instrument.split('_')
+        if quote == 'USD':
+            return amount
+        if base == 'USD':
+            return amount / price
+        return amount  # Crosses are approximated as USD-quoted
+
+    def _mid(self, instrument: str) -> float:
+        mid = self.market.mid(instrument, self.clock())
+        if mid is None:
+            raise ValueError(f"No price for {instrument}")
+        return mid
+
+    def _open_trades(self, instrument: Optional[str] = None) -> List[Dict]:
+        trades = list(self.open_trades.values())
+        if instrument is not None:
+            trades = [t for t in trades if t['instrument'] == instrument]
+        return trades
+
+    def _trade_unrealized(self, trade: Dict, mid: float) -> float:
+        units = float(trade['currentUnits'])
+        half = self.market.spread(trade['instrument']) / 2
+        exit_price = mid - half if units > 0 else mid + half
+        return self._to_account_currency(trade['instrument'], units * (exit_price - float(trade['price'])), mid)
+
+    def _position(self, instrument: str) -> Dict:
+        mid = self._mid(instrument)
+        sides = {}
+        for side, sign in (('long', 1), ('short', -1)):
+            trades = [t for t in self._open_trades(instrument) if float(t['currentUnits']) * sign > 0]
+            units = sum(float(t['currentUnits']) for t in trades)
+            upl = sum(self._trade_unrealized(t, mid) for t in trades)
+            average = (sum(float(t['currentUnits']) * float(t['price']) for t in trades) / units) if units else 0.0
+            sides[side] = {
+                'units': f"{units:.0f}",
+                'averagePrice': f"{average:.5f}" if units else None,
+                'tradeIDs': [t['id'] for t in trades],
+                'unrealizedPL': f"{upl:.4f}",
+                'pl': f"{self._realized.get((instrument, sign), 0.0):.4f}"
+            }
+            if not units:
+                del sides[side]['averagePrice']
+        return {
+            'instrument': instrument,
+            'long': sides['long'],
+            'short': sides['short'],
+            'unrealizedPL': f"{float(sides['long']['unrealizedPL']) + float(sides['short']['unrealizedPL']):.4f}",
+            'pl': f"{float(sides['long']['pl']) + float(sides['short']['pl']):.4f}",
+            'marginUsed': f"{self._margin(instrument):.4f}"
+        }
+
+    def _margin(self, instrument: Optional[str] = None) -> float:
+        margin = 0.0
+        for trade in self._open_trades(instrument):
+            mid = self._mid(trade['instrument'])
+            value = abs(float(trade['currentUnits'])) * mid
+            margin += self._to_account_currency(trade['instrument'], value, mid) * self.margin_rate
+        return margin
+
+    def _trade_view(self, trade: Dict) -> Dict:
+        view = dict(trade)
+        if trade['state'] == 'OPEN':
+            view['unrealizedPL'] = f"{self._trade_unrealized(trade, self._mid(trade['instrument'])):.4f}"
+        return view
+
+    def list_trades(self, params: Dict) -> List[Dict]:
+        """GET /trades: newest first, filtered by state (default OPEN) and instrument, up to count (max 500)"""
+        state = params.get('state', 'OPEN')
+        instrument = params.get('instrument')
+        count = min(int(params.get('count', 50)), 500)
+        trades = [t for t in self.trades.values()
+                  if (state == 'ALL' or t['state'] == state)
+                  and (instrument is None or t['instrument'] == instrument)]
+        trades.sort(key=lambda t: int(t['id']), reverse=True)
+        return [self._trade_view(t) for t in trades[:count]]
+
+    def _account_fields(self) -> Dict:
+        unrealized = sum(self._trade_unrealized(t, self._mid(t['instrument'])) for t in self._open_trades())
+        margin_used = self._margin()
+        nav = self.balance + unrealized
+        return {
+            'id': self.account_id,
+            'currency': 'USD',
+            'balance': f"{self.balance:.4f}",
+            'NAV': f"{nav:.4f}",
+            'unrealizedPL': f"{unrealized:.4f}",
+            'marginUsed': f"{margin_used:.4f}",
+            'marginAvailable': f"{max(nav - margin_used, 0.0):.4f}",
+            'marginRate': f"{self.margin_rate}",
+            'openTradeCount': len(self._open_trades()),
+            'openPositionCount': len({t['instrument'] for t in self._open_trades()}),
+            'pendingOrderCount': len(self.orders),
+            'lastTransactionID': self.last_transaction_id
+        }
+
+    # ------------------------------------------------------------------ trading
+
+    def _close_trade(self, trade: Dict, units: float, price: float, reason: str,
+                     order_id: Optional[str] = None) -> Dict:
+        """Close `units` (signed like the trade) of a trade at price"""
+        instrument = trade['instrument']
+        pl = self._to_account_currency(instrument, units * (price - float(trade['price'])), price)
+        self.balance += pl
+
+        remaining = float(trade['currentUnits']) - units
+        trade['realizedPL'] = f"{float(trade['realizedPL']) + pl:.4f}"
+        side = (instrument, 1 if float(trade['initialUnits']) > 0 else -1)
+        self._realized[side] = self._realized.get(side, 0.0) + pl
+        trade['currentUnits'] = f"{remaining:.0f}"
+
+        effects = {'instruments': [instrument]}
+        fields = {
+            'type': 'ORDER_FILL',
+            'orderID': order_id or self.last_transaction_id,
+            'instrument': instrument,
+            'units': f"{-units:.0f}",
+            'price': f"{price:.5f}",
+            'pl': f"{pl:.4f}",
+            'financing': '0.0000',
+            'accountBalance': f"{self.balance:.4f}",
+            'reason': reason
+        }
+        if abs(remaining) < 1e-9:
+            trade['state'] = 'CLOSED'
+            del self.open_trades[trade['id']]
+            trade['closeTime'] = format_time(self.clock())
+            trade['averageClosePrice'] = f"{price:.5f}"
+            fields['tradesClosed'] = [{'tradeID': trade['id'], 'units': f"{-units:.0f}", 'realizedPL': f"{pl:.4f}"}]
+            effects['tradesClosed'] = [trade['id']]
+
+            cancelled = [oid for oid, o in self.orders.items() if o['tradeID'] == trade['id'] and oid != order_id]
+            for oid in cancelled:
+                self.orders[oid]['state'] = 'CANCELLED'
+            effects['ordersCancelled'] = cancelled
+        else:
+            fields['tradeReduced'] = {'tradeID': trade['id'], 'units': f"{-units:.0f}", 'realizedPL': f"{pl:.4f}"}
+            effects['tradesReduced'] = [trade['id']]
+
+        if order_id:
+            effects['ordersFilled'] = [order_id]
+
+        transaction = self._transaction(fields, effects)
+        for oid in effects.get('ordersCancelled', []) + effects.get('ordersFilled', []):
+            self.orders.pop(oid, None)
+        return transaction
+
+    def _attach_exit(self, trade: Dict, order_type: str, price: float) -> str:
+        transaction = self._transaction({
+            'type': order_type,
+            'tradeID': trade['id'],
+            'price': f"{price:.5f}",
+            'timeInForce': 'GTC',
+            'reason': 'ON_FILL'
+        }, {})
+        order = {
+            'id': transaction['id'],
+            'type': order_type,
+            'tradeID': trade['id'],
+            'price': f"{price:.5f}",
+            'state': 'PENDING',
+            'createTime': transaction['time'],
+            'timeInForce': 'GTC'
+        }
+        self.effects[-1]['ordersCreated'] = [order['id']]
+        self.orders[order['id']] = order
+        key = 'stopLossOrder' if order_type == 'STOP_LOSS' else 'takeProfitOrder'
+        trade[key + 'ID'] = order['id']
+        # Trades embed their exit orders, which keep their final state after closing
+        trade[key] = order
+        return order['id']
+
+    def market_order(self, order: Dict) -> Tuple[int, Dict]:
+        instrument = order['instrument']
+        units = float(order['units'])
+        quote = self.market.quote(instrument, self.clock())
+        if quote is None or units == 0:
+            return 400, {'errorMessage': 'Invalid order', 'errorCode': 'INVALID_UNITS'}
+        bid, ask = quote
+        price = ask if units > 0 else bid
+
+        create = self._transaction({
+            'type': 'MARKET_ORDER',
+            'instrument': instrument,
+            'units': order['units'],
+            'timeInForce': order.get('timeInForce', 'FOK'),
+            'positionFill': order.get('positionFill', 'DEFAULT'),
+            'reason': 'CLIENT_ORDER'
+        }, {})
+
+        # Netting: an opposite order reduces existing trades first (FIFO)
+        fills = []
+        remaining = units
+        for trade in self._open_trades(instrument):
+            current = float(trade['currentUnits'])
+            if current * remaining >= 0:
+                continue
+            closing = -remaining if abs(remaining) < abs(current) else current
+            fills.append(self._close_trade(trade, closing, price, 'MARKET_ORDER', create['id']))
+            remaining += closing
+            if remaining == 0:
+                break
+
+        response = {
+            'orderCreateTransaction': create,
+            'relatedTransactionIDs': [create['id']]
+        }
+
+        if remaining:
+            fill = self._transaction({
+                'type': 'ORDER_FILL',
+                'orderID': create['id'],
+                'instrument': instrument,
+                'units': f"{remaining:.0f}",
+                'price': f"{price:.5f}",
+                'pl': '0.0000',
+                'financing': '0.0000',
+                'accountBalance': f"{self.balance:.4f}",
+                'reason': 'MARKET_ORDER',
+                'tradeOpened': {'tradeID': None, 'units': f"{remaining:.0f}"}
+            }, {'instruments': [instrument]})
+            trade = {
+                'id': fill['id'],
+                'instrument': instrument,
+                'price': f"{price:.5f}",
+                'openTime': fill['time'],
+                'initialUnits': f"{remaining:.0f}",
+                'currentUnits': f"{remaining:.0f}",
+                'state': 'OPEN',
+                'realizedPL': '0.0000',
+                'financing': '0.0000'
+            }
+            fill['tradeOpened']['tradeID'] = trade['id']
+            self.effects[-1]['tradesOpened'] = [trade['id']]
+            self.trades[trade['id']] = trade
+            self.open_trades[trade['id']] = trade
+            if instrument not in self.traded_instruments:
+                self.traded_instruments.append(instrument)
+
+            if 'stopLossOnFill' in order:
+                self._attach_exit(trade, 'STOP_LOSS', float(order['stopLossOnFill']['price']))
+            if 'takeProfitOnFill' in order:
+                self._attach_exit(trade, 'TAKE_PROFIT', float(order['takeProfitOnFill']['price']))
+            fills.append(fill)
+
+        response['orderFillTransaction'] = fills[-1]
+        response['relatedTransactionIDs'] += [t['id'] for t in self.transactions[int(create['id']):]]
+        response['lastTransactionID'] = self.last_transaction_id
+        return 201, response
+
+    def close_position(self, instrument: str, body: Dict) -> Tuple[int, Dict]:
+        quote = self.market.quote(instrument, self.clock())
+        trades = self._open_trades(instrument)
+        if quote is None or not trades:
+            return 400, {'errorMessage': 'The Position requested to be closed out does not exist',
+                         'errorCode': 'CLOSEOUT_POSITION_DOESNT_EXIST'}
+        bid, ask = quote
+
+        response = {'relatedTransactionIDs': []}
+        for side, sign in (('long', 1), ('short', -1)):
+            requested = body.get(f'{side}Units', 'ALL')
+            if requested == 'NONE':
+                continue
+            side_trades = [t for t in trades if float(t['currentUnits']) * sign > 0]
+            if not side_trades:
+                continue
+            fills = [self._close_trade(t, float(t['currentUnits']), bid if sign > 0 else ask,
+                                       'MARKET_ORDER_POSITION_CLOSEOUT') for t in side_trades]
+            response[f'{side}OrderFillTransaction'] = fills[-1]
+            response['relatedTransactionIDs'] += [t['id'] for t in fills]
+
+        response['lastTransactionID'] = self.last_transaction_id
+        return 200, response
+
+    def process_exits(self):
+        """Trigger stop-loss and take-profit orders on bars completed since the last check"""
+        now = self.clock()
+        start, self._checked_until = self._checked_until, now
+        if now <= start:
+            return
+
+        for trade in self._open_trades():
+            sl = self.orders.get(trade.get('stopLossOrderID', ''))
+            tp = self.orders.get(trade.get('takeProfitOrderID', ''))
+            if not sl and not tp:
+                continue
+
+            instrument = trade['instrument']
+            bars = self.market.bars(instrument, start, now)
+            if len(bars['time']) == 0:
+                continue
+
+            half = self.market.spread(instrument) / 2
+            long = float(trade['currentUnits']) > 0
+            # Longs exit on the bid, shorts on the ask
+            offset = -half if long else half
+            opens, highs, lows = bars['open'] + offset, bars['high'] + offset, bars['low'] + offset
+
+            hits = []
+            if sl:
+                level = float(sl['price'])
+                hit = lows <= level if long else highs >= level
+                hits.append((np.argmax(hit) if hit.any() else len(hit), 0, sl, level))
+            if tp:
+                level = float(tp['price'])
+                hit = highs >= level if long else lows <= level
+                hits.append((np.argmax(hit) if hit.any() else len(hit), 1, tp, level))
+
+            # Earliest bar wins; within one bar assume the stop was hit first
+            index, _, order, level = min(hits, key=lambda h: (h[0], h[1]))
+            if index == len(bars['time']):
+                continue
+
+            # A gap through the level fills at the bar open
+            bar_open = opens[index]
+            if order['type'] == 'STOP_LOSS':
+                price = min(level, bar_open) if long else max(level, bar_open)
+            else:
+                price = max(level, bar_open) if long else min(level, bar_open)
+
+            reason = 'STOP_LOSS_ORDER' if order['type'] == 'STOP_LOSS' else 'TAKE_PROFIT_ORDER'
+            self._close_trade(trade, float(trade['currentUnits']), price, reason, order['id'])
+
+    def nav(self) -> float:
+        """Net asset value after triggering the exits due by now"""
+        with self._lock:
+            self.process_exits()
+            return float(self._account_fields()['NAV'])
+
+    # ------------------------------------------------------------------ endpoints
+
+    def account_details(self) -> Dict:
+        account = self._account_fields()
+        account['positions'] = [self._position(i) for i in self.traded_instruments]
+        account['trades'] = [self._trade_view(t) for t in self._open_trades()]
+        account['orders'] = list(self.orders.values())
+        return {'account': account, 'lastTransactionID': self.last_transaction_id}
+
+    def changes(self, since: int) -> Dict:
+        """AccountChanges and AccountChangesState since a transaction ID"""
+        collected: Dict[str, List[str]] = {}
+        instruments = []
+        for effects in self.effects[since:]:
+            for key, ids in effects.items():
+                if key == 'instruments':
+                    instruments += [i for i in ids if i not in instruments]
+                else:
+                    collected.setdefault(key, []).extend(ids)
+
+        def trades(key):
+            return [self._trade_view(self.trades[i]) for i in collected.get(key, [])]
+
+        created_orders = [self.orders[i] for i in collected.get('ordersCreated', []) if i in self.orders]
+        changes = {
+            'ordersCreated': created_orders,
+            'ordersCancelled': [{'id': i, 'state': 'CANCELLED'} for i in collected.get('ordersCancelled', [])],
+            'ordersFilled': [{'id': i, 'state': 'FILLED'} for i in collected.get('ordersFilled', [])],
+            'ordersTriggered': [],
+            'tradesOpened': trades('tradesOpened'),
+            'tradesReduced': trades('tradesReduced'),
+            'tradesClosed': trades('tradesClosed'),
+            'positions': [self._position(i) for i in instruments],
+            'transactions': self.transactions[since:]
+        }
+
+        account = self._account_fields()
+        state = {field: account[field] for field in ('unrealizedPL', 'NAV', 'marginUsed', 'marginAvailable')}
+        state['positions'] = []
+        for instrument in self.traded_instruments:
+            position = self._position(instrument)
+            state['positions'].append({
+                'instrument': instrument,
+                'netUnrealizedPL': position['unrealizedPL'],
+                'longUnrealizedPL': position['long']['unrealizedPL'],
+                'shortUnrealizedPL': position['short']['unrealizedPL'],
+                'marginUsed': position['marginUsed']
+            })
+        state['trades'] = [{'id': t['id'], 'unrealizedPL': self._trade_view(t)['unrealizedPL']}
+                           for t in self._open_trades()]
+        state['orders'] = []
+        return {'changes': changes, 'state': state, 'lastTransactionID': self.last_transaction_id}
+
+    def candles_response(self, instrument: str, params: Dict) -> Tuple[int, Dict]:
+        if instrument not in self.market.data:
+            return 400, {'errorMessage': f"Invalid value specified for 'instrument'"}
+
+        granularity = params.get('granularity', 'S5')
+        components = params.get('price', 'M')
+        count = int(params['count']) if 'count' in params else None
+        from_ns = parse_time(params['from']) if 'from' in params else None
+        include_first = params.get('includeFirst', 'true').lower() != 'false'
+        to_ns = parse_time(params['to']) if 'to' in params else None
+        if count is not None and not 0 < count <= 5000:
+            return 400, {'errorMessage': "Invalid value specified for 'count'"}
+
+        try:
+            raw = self.market.candles(instrument, granularity, self.clock(), count, from_ns, include_first,
+                                      to_ns)
+        except (KeyError, ValueError) as e:
+            return 400, {'errorMessage': f"Invalid value specified for 'granularity': {e}"}
+
+        half = self.market.spread(instrument) / 2
+        candles = []
+        for bar in raw:
+            candle = {'complete': bar['complete'], 'volume': bar['volume'], 'time': bar['time']}
+            for letter, name, offset in (('M', 'mid', 0.0), ('B', 'bid', -half), ('A', 'ask', half)):
+                if letter in components:
+                    candle[name] = {k: f"{bar[k] + offset:.5f}" for k in ('o', 'h', 'l', 'c')}
+            candles.append(candle)
+        return 200, {'instrument': instrument, 'granularity': granularity, 'candles': candles}
+
+    def price_message(self, instrument: str) -> Optional[Dict]:
+        quote = self.market.quote(instrument, self.clock())
+        if quote is None:
+            return None
+        bid, ask = quote
+        return {
+            'type': 'PRICE',
+            'instrument': instrument,
+            'time': format_time(self.clock()),
+            'tradeable': True,
+            'bids': [{'price': f"{bid:.5f}", 'liquidity': 10000000}],
+            'asks': [{'price': f"{ask:.5f}", 'liquidity': 10000000}],
+            'closeoutBid': f"{bid:.5f}",
+            'closeoutAsk': f"{ask:.5f}"
+        }
+
+    def handle(self, method: str, path: str, params: Dict, body: Optional[Dict]) -> Tuple[int, Dict]:
+        """Dispatch one REST request; returns (status, JSON payload)"""
+        with self._lock:
+            self.process_exits()
+
+            match = self.CANDLES_PATH.match(path)
+            if match and method == 'GET':
+                return self.candles_response(match.group(1), params)
+
+            match = self.ACCOUNT_PATH.match(path)
+            if not match:
+                return 404, {'errorMessage': 'Not found'}
+            if match.group(1) != self.account_id:
+                return 403, {'errorMessage': 'The provided request was forbidden.'}
+            sub = match.group(2) or ''
+
+            if method == 'GET' and sub == '':
+                return 200, self.account_details()
+            if method == 'GET' and sub == '/summary':
+                return 200, {'account': self._account_fields(), 'lastTransactionID': self.last_transaction_id}
+            if method == 'GET' and sub == '/changes':
+                return 200, self.changes(int(params.get('sinceTransactionID', 0)))
+            if method == 'GET' and sub in ('/positions', '/openPositions'):
+                positions = [self._position(i) for i in self.traded_instruments]
+                if sub == '/openPositions':
+                    positions = [p for p in positions if p['long']['tradeIDs'] or p['short']['tradeIDs']]
+                return 200, {'positions': positions, 'lastTransactionID': self.last_transaction_id}
+            if method == 'GET' and sub in ('/pendingOrders', '/orders'):
+                return 200, {'orders': list(self.orders.values()), 'lastTransactionID': self.last_transaction_id}
+            if method == 'GET' and sub == '/openTrades':
+                return 200, {'trades': [self._trade_view(t) for t in self._open_trades()],
+                             'lastTransactionID': self.last_transaction_id}
+            if method == 'GET' and sub == '/transactions/sinceid':
+                since = int(params.get('id', 0))
+                return 200, {'transactions': self.transactions[since:since + 1000],
+                             'lastTransactionID': self.last_transaction_id}
+            if method == 'GET' and sub == '/trades':
+                return 200, {'trades': self.list_trades(params), 'lastTransactionID': self.last_transaction_id}
+            if method == 'POST' and sub == '/orders':
+                order = (body or {}).get('order', {})
+                if order.get('type') != 'MARKET':
+                    return 400, {'errorMessage': 'Only MARKET orders are simulated'}
+                return self.market_order(order)
+
+            match = self.CLOSE_PATH.match(sub)
+            if method == 'PUT' and match:
+                return self.close_position(match.group(1), body or {})
+
+            return 404, {'errorMessage': f"Unsupported endpoint {method} {path}"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'LocalOANDA/1.0'
+    # Headers and body are written separately; don't let Nagle + delayed ACK add ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _inject_latency(self):
+        server = self.server
+        delay = server.latency_ms + (random.uniform(0, server.jitter_ms) if server.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _params(self) -> Tuple[str, Dict]:
+        url = urlparse(self.path)
+        return url.path, {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+    def _body(self) -> Optional[Dict]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method: str):
+        path, params = self._params()
+        if method == 'GET' and path.endswith('/pricing/stream'):
+            return self._stream_prices(params)
+        if method == 'GET' and path.endswith('/transactions/stream'):
+            return self._stream_transactions()
+
+        self._inject_latency()
+        try:
+            status, payload = self.server.simulator.handle(method, path, params, self._body())
+        except Exception as e:
+            logger.error(f"Error handling {method} {path}: {e}", exc_info=True)
+            status, payload = 500, {'errorMessage': str(e)}
+        self._send_json(status, payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_line(self, message: Dict):
+        line = (json.dumps(message) + '\n').encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+
+    def _stream_prices(self, params: Dict):
+        instruments = [i for i in params.get('instruments', '').split(',') if i]
+        simulator = self.server.simulator
+        self._start_stream()
+        last_heartbeat = 0.0
+        try:
+            while not self.server.stopping.is_set():
+                with simulator._lock:
+                    messages = [simulator.price_message(i) for i in instruments]
+                for message in messages:
+                    if message is not None:
+                        self._write_line(message)
+                if time.monotonic() - last_heartbeat >= 5:
+                    self._write_line({'type': 'HEARTBEAT', 'time': format_time(simulator.clock())})
+                    last_heartbeat = time.monotonic()
+                self.server.stopping.wait(self.server.price_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _stream_transactions(self):
+        simulator = self.server.simulator
+        self._start_stream()
+        sent = len(simulator.transactions)
+        last_heartbeat = 0.0
+        try:
+            while not self.server.stopping.is_set():
+                with simulator._lock:
+                    simulator.process_exits()
+                    pending = simulator.transactions[sent:]
+                for transaction in pending:
+                    self._write_line(transaction)
+                sent += len(pending)
+                if time.monotonic() - last_heartbeat >= 5:
+                    self._write_line({'type': 'HEARTBEAT', 'lastTransactionID': simulator.last_transaction_id,
+                                      'time': format_time(simulator.clock())})
+                    last_heartbeat = time.monotonic()
+                self.server.stopping.wait(0.1)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class LocalOandaServer:
+    """Threaded HTTP server exposing a V20Simulator on localhost"""
+
+    def __init__(self, simulator: V20Simulator, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, price_interval: float = 0.25):
+        """
+        Initialize the server
+
+        Args:
+            simulator: Account and market behind the endpoints
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency_ms: Delay added to every REST response
+            jitter_ms: Extra uniformly distributed random delay
+            price_interval: Seconds between streamed prices
+        """
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.simulator = simulator
+        self.httpd.latency_ms = latency_ms
+        self.httpd.jitter_ms = jitter_ms
+        self.httpd.price_interval = price_interval
+        self.httpd.stopping = threading.Event()
+        self.simulator = simulator
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'LocalOandaServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='LocalOanda', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.stopping.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'LocalOandaServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class SimulatorSession:
+    """
+    Stand-in for the transport's requests.Session that answers from a
+    V20Simulator in-process
+
+    The bot's request code, coalescing and latency counters run unchanged
+    and responses are real JSON requests.Response objects, but there is no
+    HTTP round trip, server thread or request preparation. Streaming
+    endpoints are not served; poll prices and transactions instead.
+    """
+
+    def __init__(self, simulator: V20Simulator):
+        self.simulator = simulator
+        self.headers = CaseInsensitiveDict()
+        self.requests = 0
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        target = urlparse(url)
+        query = {k: v[-1] for k, v in parse_qs(target.query).items()}
+        query.update({k: str(v) for k, v in (params or {}).items()})
+        try:
+            status, payload = self.simulator.handle(method, target.path, query, kwargs.get('json'))
+        except Exception as e:
+            logger.error(f"Error handling {method} {target.path}: {e}", exc_info=True)
+            status, payload = 500, {'errorMessage': str(e)}
+        self.requests += 1
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK' if status < 400 else 'Error'
+        response._content = json.dumps(payload).encode()
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OANDA v20 stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--account-id', default='101-001-0000000-001')
+    parser.add_argument('--instruments', default='EUR_USD,GBP_USD,USD_JPY,AUD_USD')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every REST call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra delay per REST call')
+    parser.add_argument('--store', help='Replay candles from this CandleStore directory instead of synthetic data')
+    parser.add_argument('--granularity', default='M1', help='Base granularity of stored or synthetic candles')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    instruments = args.instruments.split(',')
+
+    if args.store:
+        from candle_store import CandleStore
+        market = CandleMarket.from_store(CandleStore(args.store), instruments, args.granularity)
+    else:
+        market = CandleMarket.synthetic(instruments, time.time_ns(), base_granularity=args.granularity,
+                                        seed=args.seed)
+
+    server = LocalOandaServer(V20Simulator(market, args.account_id), args.host, args.port,
+                              args.latency_ms, args.jitter_ms)
+    logger.info(f"Serving OANDA v20 stand-in for account {args.account_id} at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo trade-sequence simulation
+Bootstrap resampling of trade outcomes for drawdown, risk-of-ruin and fractional Kelly sizing
+"""
+
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_MONTE_CARLO_CONFIG = {
+    'paths': 10000,               # Simulated trade sequences
+    'horizon': 500,               # Trades per sequence
+    'block_size': 10,             # Consecutive trades resampled together (1 = plain bootstrap)
+    'kelly_fraction': 0.5,        # Share of the full Kelly stake recommended
+    'max_fraction': 0.02,         # Never risk more of the balance than this per trade
+    'min_fraction': 0.0025,       # Stake the bot keeps trading at without an edge, so the sample still grows
+    'ruin_level': 0.5,            # Equity (as a share of the start) counted as ruin
+    'max_ruin_probability': 0.01, # Recommended stakes reach ruin_level in at most this share of paths
+    'max_drawdown': 0.25,         # ... and stay within this drawdown at drawdown_quantile
+    'drawdown_quantile': 0.95,
+    'min_trades': 30,             # Fewer closed trades: no recommendation
+    'history': 500,               # Most recent closed trades resampled
+    'refresh_trades': 20,         # Re-run after this many new closed trades
+    'seed': None
+}
+
+
+def kelly_fraction(outcomes: np.ndarray) -> float:
+    """
+    Full Kelly stake for trade outcomes in R multiples (PnL / amount risked)
+
+    The fraction f of equity risked per trade that maximizes the mean
+    log growth log(1 + f * R) over the outcomes; 0 without an edge.
+    """
+    outcomes = np.asarray(outcomes, dtype=np.float64)
+    if len(outcomes) == 0 or outcomes.mean() <= 0:
+        return 0.0
+    worst = outcomes.min()
+    if worst >= 0:
+        return 1.0
+    # The growth rate is concave in f; bisect its derivative below the stake that loses everything
+    lo, hi = 0.0, -1.0 / worst
+    for _ in range(60):
+        f = (lo + hi) / 2
+        if np.mean(outcomes / (1 + f * outcomes)) > 0:
+            lo = f
+        else:
+            hi = f
+    return lo
+
+
+def _block_stats(steps: np.ndarray, length: int) -> np.ndarray:
+    """
+    Per start index, the log-equity path of the circular block of length steps
+
+    Rows are (total, lowest point, highest point, drawdown within the
+    block), all relative to the block's starting level.
+    """
+    n = len(steps)
+    index = (np.arange(n)[:, None] + np.arange(length)) % n
+    path = np.cumsum(steps[index], axis=1)
+    peak = np.maximum(np.maximum.accumulate(path, axis=1), 0)
+    return np.stack([path[:, -1], np.minimum(path.min(axis=1), 0),
+                     np.maximum(path.max(axis=1), 0), (peak - path).max(axis=1)])
+
+
+def simulate_paths(steps: np.ndarray, starts: np.ndarray, horizon: int, block_size: int) -> Dict[str, np.ndarray]:
+    """
+    Final level, lowest level and maximum drawdown of resampled log-equity paths
+
+    Each path concatenates circular blocks of block_size consecutive
+    steps beginning at its column of starts (the last block is cut to
+    fit horizon). Paths are evaluated a block at a time from per-block
+    totals, lows, highs and inner drawdowns, which is exact and needs
+    one operation per block instead of one per step. Every operation
+    covers all paths at once, and only one row of blocks is held in
+    memory.
+
+    Args:
+        steps: Log growth of each trade, log(1 + f * R)
+        starts: Block start indices, shape (ceil(horizon / block_size), paths)
+        horizon: Trades per path
+        block_size: Trades per block
+
+    Returns:
+        final, low and drawdown per path, in log equity
+    """
+    blocks, paths = starts.shape
+    last = horizon - (blocks - 1) * block_size
+    table = _block_stats(steps, block_size)
+    tail = table if last == block_size else _block_stats(steps, last)
+
+    level = np.zeros(paths)
+    peak = np.zeros(paths)
+    lowest = np.zeros(paths)
+    drawdown = np.zeros(paths)
+    point = np.empty(paths)
+    row = np.empty((4, paths))
+    for k in range(blocks):
+        np.take(table if k < blocks - 1 else tail, starts[k], axis=1, out=row)
+        total, low, high, inner = row
+        np.add(level, low, out=point)
+        np.minimum(lowest, point, out=lowest)
+        # Fall from the earlier peak to this block's low, or within the block
+        np.subtract(peak, point, out=point)
+        np.maximum(point, inner, out=point)
+        np.maximum(drawdown, point, out=drawdown)
+        np.add(level, high, out=point)
+        np.maximum(peak, point, out=peak)
+        level += total
+    return {'final': level, 'low': lowest, 'drawdown': drawdown}
+
+
+class MonteCarloResult(NamedTuple):
+    """Distribution of outcomes when risking fraction of equity per trade"""
+    fraction: float
+    full_kelly: float
+    final_equity: np.ndarray    # Equity multiple after horizon trades, per path
+    max_drawdown: np.ndarray    # Deepest peak-to-trough decline, per path
+    ruin_probability: float     # Share of paths that fell to ruin_level
+
+    def drawdown_at(self, quantile: float) -> float:
+        return float(np.quantile(self.max_drawdown, quantile))
+
+    def summary(self) -> str:
+        median = float(np.median(self.final_equity))
+        return (f"risk {self.fraction:.2%} per trade ({self.fraction / self.full_kelly:.0%} Kelly): "
+                f"median equity x{median:.2f}, drawdown p50 {self.drawdown_at(0.5):.1%} / "
+                f"p95 {self.drawdown_at(0.95):.1%}, ruin {self.ruin_probability:.2%}"
+                if self.full_kelly > 0 else "no edge: full Kelly stake is 0")
+
+
+class TradeMonteCarlo:
+    """
+    Bootstrap simulation of future trade sequences from past outcomes
+
+    Outcomes are R multiples (PnL divided by the amount risked), so one
+    sample serves every stake size. Paths are drawn as blocks of
+    consecutive trades so losing streaks stay together (block_size 1
+    resamples trades independently); all paths are evaluated at once in
+    NumPy. The same random blocks are reused when comparing stakes.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Initialize the simulator
+
+        Args:
+            config: Overrides for DEFAULT_MONTE_CARLO_CONFIG
+        """
+        self.config = {**DEFAULT_MONTE_CARLO_CONFIG, **(config or {})}
+        self.rng = np.random.default_rng(self.config['seed'])
+
+    def sample_starts(self, n: int) -> np.ndarray:
+        """Random block starts for every path over n outcomes"""
+        c = self.config
+        blocks = -(-c['horizon'] // c['block_size'])
+        return self.rng.integers(0, n, (blocks, c['paths']), dtype=np.int32)
+
+    def simulate(self, outcomes: Sequence[float], fraction: float,
+                 starts: Optional[np.ndarray] = None) -> MonteCarloResult:
+        """
+        Simulate risking fraction of equity on each resampled trade
+
+        Args:
+            outcomes: Past trade outcomes as R multiples
+            fraction: Share of equity lost on a -1R trade
+            starts: Block starts from sample_starts (default: fresh ones)
+        """
+        c = self.config
+        outcomes = np.asarray(outcomes, dtype=np.float64)
+        if starts is None:
+            starts = self.sample_starts(len(outcomes))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            steps = np.log(np.maximum(1 + fraction * outcomes, 0))
+        paths = simulate_paths(steps, starts, c['horizon'], c['block_size'])
+        with np.errstate(invalid='ignore'):
+            ruined = paths['low'] <= np.log(c['ruin_level'])
+            drawdown = -np.expm1(-paths['drawdown'])
+        return MonteCarloResult(fraction, kelly_fraction(outcomes), np.exp(paths['final']),
+                                np.nan_to_num(drawdown, nan=1.0), float(ruined.mean()))
+
+    def recommend(self, outcomes: Sequence[float],
+                  max_fraction: Optional[float] = None) -> Optional[MonteCarloResult]:
+        """
+        Fractional Kelly stake that keeps ruin and drawdown within limits
+
+        Starts from kelly_fraction of the full Kelly stake, capped at
+        max_fraction, and halves it (up to eight times, keeping the last)
+        until the simulated risk of ruin and the drawdown at
+        drawdown_quantile are acceptable. Returns None with fewer than
+        min_trades outcomes.
+
+        Args:
+            outcomes: Past trade outcomes as R multiples
+            max_fraction: Stake cap (default: the configured max_fraction)
+        """
+        c = self.config
+        outcomes = np.asarray(outcomes, dtype=np.float64)
+        if len(outcomes) < c['min_trades']:
+            return None
+        cap = c['max_fraction'] if max_fraction is None else max_fraction
+        fraction = min(c['kelly_fraction'] * kelly_fraction(outcomes), cap)
+        if fraction <= 0:
+            return MonteCarloResult(0.0, 0.0, np.ones(c['paths']), np.zeros(c['paths']), 0.0)
+
+        starts = self.sample_starts(len(outcomes))
+        for _ in range(8):
+            result = self.simulate(outcomes, fraction, starts)
+            if (result.ruin_probability <= c['max_ruin_probability']
+                    and result.drawdown_at(c['drawdown_quantile']) <= c['max_drawdown']):
+                return result
+            fraction /= 2
+        return result
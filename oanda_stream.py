@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Long-lived OANDA v20 streaming connections
+Background consumers that reconnect when heartbeats stop arriving
+"""
+
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_STREAM_CONFIG = {
+    'enabled': True,             # Start the streaming price feed in run()
+    'transaction_stream': True,  # Start the transaction stream in run()
+    'heartbeat_timeout': 10.0,   # OANDA sends a heartbeat every 5 seconds
+    'connect_timeout': 5.0,
+    'reconnect_delay': 1.0,      # Initial delay, doubled after each failure
+    'max_reconnect_delay': 60.0,
+    'max_quote_age': None        # Seconds; None trusts any quote while the stream is alive
+}
+
+
+class StreamConsumer:
+    """Base class for a background thread reading a chunked JSON-lines stream"""
+
+    def __init__(self, url: str, headers: Dict, params: Optional[Dict] = None,
+                 config: Optional[Dict] = None, name: str = 'stream'):
+        """
+        Initialize the consumer
+
+        Args:
+            url: Full streaming endpoint URL
+            headers: Request headers (authorization)
+            params: Query parameters for the stream request
+            config: Overrides for DEFAULT_STREAM_CONFIG
+            name: Thread and log name
+        """
+        self.url = url
+        self.params = params or {}
+        self.name = name
+        self.config = dict(DEFAULT_STREAM_CONFIG)
+        if config:
+            self.config.update(config)
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+
+        self.connected = False
+        self.last_message_at = 0.0
+        self.reconnects = 0
+        self.messages = 0
+
+        self._stop_event = threading.Event()
+        self._response = None
+        self._thread = None
+
+    @property
+    def is_alive(self) -> bool:
+        """True if connected and a message or heartbeat arrived recently"""
+        if not self.connected:
+            return False
+        return time.monotonic() - self.last_message_at < self.config['heartbeat_timeout']
+
+    def start(self):
+        """Start consuming in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the consumer and close its connection"""
+        self._stop_event.set()
+        response = self._response
+        if response is not None:
+            response.close()
+        if self._thread:
+            self._thread.join(timeout)
+        self.session.close()
+        self.connected = False
+
+    def handle_message(self, message: Dict):
+        """Process one non-heartbeat message (implemented by subclasses)"""
+        raise NotImplementedError
+
+    def on_connect(self):
+        """Called after each successful (re)connection"""
+
+    def _run(self):
+        delay = self.config['reconnect_delay']
+
+        while not self._stop_event.is_set():
+            try:
+                self._consume()
+                delay = self.config['reconnect_delay']
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                logger.warning(f"{self.name} disconnected: {e}")
+
+            self.connected = False
+            if self._stop_event.is_set():
+                break
+
+            self.reconnects += 1
+            logger.info(f"{self.name} reconnecting in {delay:.0f}s")
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.config['max_reconnect_delay'])
+
+    def _consume(self):
+        # The read timeout doubles as the heartbeat watchdog: if nothing
+        # (not even a heartbeat) arrives in time, the read raises and we reconnect
+        timeout = (self.config['connect_timeout'], self.config['heartbeat_timeout'])
+        response = self.session.get(self.url, params=self.params, stream=True, timeout=timeout)
+        self._response = response
+
+        try:
+            if response.status_code != 200:
+                raise ConnectionError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+            self.connected = True
+            self.last_message_at = time.monotonic()
+            logger.info(f"{self.name} connected")
+            self.on_connect()
+
+            for line in response.iter_lines():
+                if self._stop_event.is_set():
+                    return
+                if not line:
+                    continue
+
+                self.last_message_at = time.monotonic()
+                self.messages += 1
+                message = json.loads(line)
+
+                if message.get('type') == 'HEARTBEAT':
+                    continue
+                self.handle_message(message)
+        finally:
+            self._response = None
+            response.close()
+
+
+class Quote(NamedTuple):
+    """Latest top-of-book price for an instrument"""
+    bid: float
+    ask: float
+    time: str
+    received_at: float
+
+    @property
+    def mid(self) -> float:
+        return (self.bid + self.ask) / 2
+
+
+class PriceStream(StreamConsumer):
+    """Keeps the latest bid/ask for every instrument from /pricing/stream"""
+
+    def __init__(self, stream_url: str, account_id: str, headers: Dict,
+                 instruments: List[str], config: Optional[Dict] = None):
+        url = f"{stream_url}/v3/accounts/{account_id}/pricing/stream"
+        params = {'instruments': ','.join(instruments)}
+        super().__init__(url, headers, params, config, name='PriceStream')
+        self.instruments = list(instruments)
+        self.quotes: Dict[str, Quote] = {}
+
+    def on_connect(self):
+        # OANDA sends a fresh price for every instrument right after connecting
+        self.quotes.clear()
+
+    def handle_message(self, message: Dict):
+        if message.get('type') != 'PRICE':
+            return
+
+        bids = message.get('bids')
+        asks = message.get('asks')
+        if not bids or not asks:
+            return
+
+        self.quotes[message['instrument']] = Quote(
+            bid=float(bids[0]['price']),
+            ask=float(asks[0]['price']),
+            time=message.get('time', ''),
+            received_at=time.monotonic()
+        )
+
+    def get_quote(self, instrument: str, max_age: Optional[float] = None) -> Optional[Quote]:
+        """
+        Return the latest quote, or None if the stream is down or the quote is stale
+
+        Args:
+            instrument: Instrument name (e.g. EUR_USD)
+            max_age: Maximum quote age in seconds (defaults to config max_quote_age)
+        """
+        if not self.is_alive:
+            return None
+
+        quote = self.quotes.get(instrument)
+        if quote is None:
+            return None
+
+        if max_age is None:
+            max_age = self.config['max_quote_age']
+        if max_age is not None and time.monotonic() - quote.received_at > max_age:
+            return None
+
+        return quote
+
+
+class TransactionStream(StreamConsumer):
+    """Pushes every account transaction from /transactions/stream to a callback"""
+
+    def __init__(self, stream_url: str, account_id: str, headers: Dict,
+                 on_transaction: Callable[[Dict], None], config: Optional[Dict] = None):
+        url = f"{stream_url}/v3/accounts/{account_id}/transactions/stream"
+        super().__init__(url, headers, None, config, name='TransactionStream')
+        self.on_transaction = on_transaction
+        self.last_transaction_id: Optional[str] = None
+
+    def handle_message(self, message: Dict):
+        if 'id' not in message:
+            return
+        self.last_transaction_id = message['id']
+        try:
+            self.on_transaction(message)
+        except Exception as e:
+            # Never let one bad transaction kill the stream
+            logger.error(f"Error handling transaction {message['id']}: {e}", exc_info=True)
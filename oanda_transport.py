@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP transport for the OANDA v20 REST API
+Keeps TCP/TLS connections alive between calls, rate-limits and coalesces
+requests, and records per-endpoint latency
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from http_capture import CaptureWriter, RecordingAdapter, ReplayAdapter
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TRANSPORT_CONFIG = {
+    'pool_connections': 4,      # Number of host pools to cache
+    'pool_maxsize': 8,          # Connections kept alive per host
+    'connect_timeout': 5.0,     # Seconds to establish a connection
+    'read_timeout': 15.0,       # Seconds to wait for a response
+    'max_retries': 3,           # Retries on connection errors (idempotent calls only)
+    'backoff_factor': 0.5,      # Exponential backoff between retries
+    'gzip': True,               # Ask OANDA for compressed responses
+    'rate_limit': 50.0,         # Requests per second shared by all calls (0 disables)
+    'rate_burst': 10,           # Requests allowed back-to-back before throttling
+    'coalesce_gets': True,      # Identical concurrent GETs share one request
+    'record_path': None,        # Append every request/response to this capture file
+    'replay_path': None,        # Serve responses from this capture file instead of the network
+    'replay_speed': 1.0         # Recorded latency divisor for replay (0 = no waiting)
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers block until a token is available"""
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Initialize the bucket
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping if necessary
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            # Reserve the token even if it is not there yet; a negative balance
+            # queues later callers behind us in arrival order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs a function once per key while it is in flight; concurrent callers share the result"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable) -> Tuple[object, bool]:
+        """
+        Call func, or wait for the identical call already in flight
+
+        Returns:
+            (result, shared) where shared is True if another caller did the work
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+class EndpointStats:
+    """Latency counters for a single API endpoint"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.coalesced = 0
+        self.total_wait_ms = 0.0
+
+    def record(self, elapsed_ms: float, ok: bool):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if not ok:
+            self.errors += 1
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return self.total_wait_ms / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': round(self.avg_ms, 2),
+            'max_ms': round(self.max_ms, 2),
+            'last_ms': round(self.last_ms, 2),
+            'coalesced': self.coalesced,
+            'avg_wait_ms': round(self.avg_wait_ms, 2)
+        }
+
+
+class OandaTransport:
+    """Shared keep-alive session used by every ForexTradingBot REST call"""
+
+    def __init__(self, headers: Dict, config: Optional[Dict] = None):
+        """
+        Initialize the transport
+
+        Args:
+            headers: Default headers (authorization, content type)
+            config: Overrides for DEFAULT_TRANSPORT_CONFIG
+        """
+        self.config = dict(DEFAULT_TRANSPORT_CONFIG)
+        if config:
+            self.config.update(config)
+
+        self.timeout = (self.config['connect_timeout'], self.config['read_timeout'])
+        self.stats: Dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.headers['Connection'] = 'keep-alive'
+        if self.config['gzip']:
+            self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        else:
+            self.session.headers['Accept-Encoding'] = 'identity'
+
+        # Only retry idempotent requests - a retried POST could open a second trade
+        retry = Retry(
+            total=self.config['max_retries'],
+            connect=self.config['max_retries'],
+            read=0,
+            status=0,
+            backoff_factor=self.config['backoff_factor'],
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.config['pool_connections'],
+            pool_maxsize=self.config['pool_maxsize'],
+            max_retries=retry
+        )
+        self.capture = None
+        if self.config['replay_path']:
+            adapter = ReplayAdapter.from_file(self.config['replay_path'], self.config['replay_speed'])
+            logger.info(f"Replaying HTTP traffic from {self.config['replay_path']}")
+        elif self.config['record_path']:
+            self.capture = CaptureWriter(self.config['record_path'])
+            adapter = RecordingAdapter(adapter, self.capture)
+            logger.info(f"Recording HTTP traffic to {self.config['record_path']}")
+
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.rate_limiter = None
+        if self.config['rate_limit']:
+            self.rate_limiter = TokenBucket(self.config['rate_limit'], self.config['rate_burst'])
+        self.single_flight = SingleFlight()
+
+    def request(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session
+
+        GETs identical to one already in flight wait for it and share its
+        response instead of sending a second request.
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            endpoint: Short label used to group latency counters (e.g. 'candles')
+        """
+        if method != 'GET' or not self.config['coalesce_gets'] or kwargs.get('stream'):
+            return self._send(method, url, endpoint, **kwargs)
+
+        params = kwargs.get('params') or {}
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+        response, shared = self.single_flight.do(
+            key, lambda: self._send(method, url, endpoint, **kwargs)
+        )
+        if shared:
+            with self._stats_lock:
+                self._endpoint_stats(endpoint).coalesced += 1
+        return response
+
+    def _send(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        wait_ms = 0.0
+        if self.rate_limiter is not None:
+            wait_ms = self.rate_limiter.acquire() * 1000
+
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.request(method, url, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self._record(endpoint, (time.perf_counter() - start) * 1000, ok, wait_ms)
+
+    def get(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, endpoint, **kwargs)
+
+    def put(self, url: str, endpoint: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, endpoint, **kwargs)
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        stats = self.stats.get(endpoint)
+        if stats is None:
+            stats = self.stats[endpoint] = EndpointStats()
+        return stats
+
+    def _record(self, endpoint: str, elapsed_ms: float, ok: bool, wait_ms: float = 0.0):
+        with self._stats_lock:
+            stats = self._endpoint_stats(endpoint)
+            stats.record(elapsed_ms, ok)
+            stats.total_wait_ms += wait_ms
+
+    @property
+    def total_calls(self) -> int:
+        """Requests sent across all endpoints"""
+        with self._stats_lock:
+            return sum(stats.calls for stats in self.stats.values())
+
+    def latency_report(self) -> Dict[str, Dict]:
+        """Return latency counters for every endpoint seen so far"""
+        with self._stats_lock:
+            return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
+
+    def log_latency_report(self, level: int = logging.INFO):
+        """Log one line per endpoint with call count and latency"""
+        for name, stats in self.latency_report().items():
+            logger.log(level, f"API {name} - Calls: {stats['calls']}, Errors: {stats['errors']}, "
+                       f"Avg: {stats['avg_ms']:.1f}ms, Max: {stats['max_ms']:.1f}ms, "
+                       f"Queue wait: {stats['avg_wait_ms']:.1f}ms, Coalesced: {stats['coalesced']}")
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+        if self.capture is not None:
+            self.capture.close()
@@ -13,7 +13,7 @@ from pathlib import Path
 
 def create_directories():
     """Create necessary directories"""
-    dirs = ['logs', 'backtest', 'backtest/results']
+    dirs = ['logs', 'backtest', 'backtest/results', 'data', 'data/candles']
     for dir_name in dirs:
         Path(dir_name).mkdir(exist_ok=True)
     print("✓ Created project directories")
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Streaming technical indicators
+Constant-time per-candle updates that reproduce the pandas batch formulas
+"""
+
+import math
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+# Periods used when the algorithm configuration does not name them
+DEFAULT_INDICATOR_CONFIG = {
+    'rsi_period': 14,
+    'ema_fast': 20,
+    'ema_slow': 50,
+    'adx_period': 14,
+    'atr_period': 14,
+    'bb_period': 20,
+    'bb_std': 2,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'stoch_k': 14,
+    'stoch_d': 3,
+    'atr_baseline': 100
+}
+
+# Algorithm configuration keys that set an indicator period under another name
+CONFIG_ALIASES = {
+    'stoch_period': 'stoch_k'  # config_template.json's name for the %K lookback
+}
+
+
+def indicator_config(config: Optional[Dict] = None, defaults: Optional[Dict] = None) -> Dict:
+    """Indicator periods from an algorithm configuration, over defaults (DEFAULT_INDICATOR_CONFIG)"""
+    c = {**(DEFAULT_INDICATOR_CONFIG if defaults is None else defaults), **(config or {})}
+    for alias, key in CONFIG_ALIASES.items():
+        if alias in c:
+            c[key] = c[alias]
+    return c
+
+
+def _ewm_alpha(span: Optional[float] = None, alpha: Optional[float] = None) -> float:
+    """Smoothing factor exactly as pandas derives it (via the center of mass)"""
+    if span is not None:
+        com = (span - 1) / 2
+    else:
+        com = (1 - alpha) / alpha
+    return 1. / (1. + float(com))
+
+
+class IndicatorValues(dict):
+    """
+    Indicator snapshot for DataFrame.attrs
+
+    pandas deep-copies attrs into every derived Series/DataFrame; the
+    snapshot is read-only, so derived objects share it instead.
+    """
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _clone(indicator):
+    """Independent copy of an indicator's state (much cheaper than deepcopy)"""
+    clone = object.__new__(type(indicator))
+    for name, value in indicator.__dict__.items():
+        if isinstance(value, deque):
+            value = deque(value)
+        elif type(value).__module__ == __name__:
+            value = _clone(value)
+        clone.__dict__[name] = value
+    return clone
+
+
+def _div(a: float, b: float) -> float:
+    """Float division with NumPy semantics for a zero denominator"""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+# ---------------------------------------------------------------------------
+# Batch reference implementations (full recompute over a Series)
+# ---------------------------------------------------------------------------
+
+def ema(series: pd.Series, period: int) -> pd.Series:
+    return series.ewm(span=period, adjust=False).mean()
+
+
+def true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    prev_close = close.shift()
+    return pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+
+
+def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
+    return true_range(high, low, close).ewm(alpha=1 / period, adjust=False).mean()
+
+
+def volatility_baseline(high: pd.Series, low: pd.Series, close: pd.Series,
+                        period: int = 14, baseline: int = 100) -> pd.DataFrame:
+    """True range, Wilder ATR and the ATR's mean over the last baseline candles"""
+    tr = true_range(high, low, close)
+    atr_ = tr.ewm(alpha=1 / period, adjust=False).mean()
+    return pd.DataFrame({'true_range': tr, 'atr': atr_, 'atr_baseline': atr_.rolling(baseline).mean()})
+
+
+def rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    """Wilder RSI"""
+    delta = close.diff()
+    gain = delta.clip(lower=0)
+    loss = (-delta).clip(lower=0)
+    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.DataFrame:
+    """Wilder ADX with the +DI/-DI lines"""
+    up = high.diff()
+    down = -low.diff()
+    plus_dm = pd.Series(np.where((up > down) & (up > 0), up, 0.0), index=high.index)
+    minus_dm = pd.Series(np.where((down > up) & (down > 0), down, 0.0), index=high.index)
+
+    atr_ = atr(high, low, close, period)
+    plus_di = 100 * plus_dm.ewm(alpha=1 / period, adjust=False).mean() / atr_
+    minus_di = 100 * minus_dm.ewm(alpha=1 / period, adjust=False).mean() / atr_
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    return pd.DataFrame({
+        'adx': dx.ewm(alpha=1 / period, adjust=False).mean(),
+        'plus_di': plus_di,
+        'minus_di': minus_di
+    })
+
+
+def bollinger(close: pd.Series, period: int = 20, num_std: float = 2) -> pd.DataFrame:
+    middle = close.rolling(period).mean()
+    std = close.rolling(period).std()
+    return pd.DataFrame({
+        'bb_upper': middle + num_std * std,
+        'bb_middle': middle,
+        'bb_lower': middle - num_std * std
+    })
+
+
+def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False).mean()
+    return pd.DataFrame({'macd': line, 'macd_signal': signal_line, 'macd_hist': line - signal_line})
+
+
+def stochastic(high: pd.Series, low: pd.Series, close: pd.Series,
+               k_period: int = 14, d_period: int = 3) -> pd.DataFrame:
+    lowest = low.rolling(k_period).min()
+    highest = high.rolling(k_period).max()
+    k = 100 * (close - lowest) / (highest - lowest)
+    return pd.DataFrame({'stoch_k': k, 'stoch_d': k.rolling(d_period).mean()})
+
+
+# ---------------------------------------------------------------------------
+# Streaming implementations
+# ---------------------------------------------------------------------------
+
+class EMA:
+    """
+    Exponential moving average, pandas ewm(adjust=False) step for step
+
+    The arithmetic (including NaN handling and the constant-series
+    short cut) mirrors pandas, so results are bit-identical.
+    """
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None):
+        self.alpha = _ewm_alpha(span, alpha)
+        self._old_wt_factor = 1. - self.alpha
+        self._old_wt = 1.
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        weighted = self.value
+        if weighted == weighted:
+            observed = x == x
+            self._old_wt *= self._old_wt_factor
+            if observed:
+                if weighted != x:
+                    weighted = self._old_wt * weighted + self.alpha * x
+                    weighted /= (self._old_wt + self.alpha)
+                self._old_wt = 1.
+                self.value = weighted
+        elif x == x:
+            self.value = x
+        return self.value
+
+
+class TrueRange:
+    """True range; the first candle falls back to high - low"""
+
+    def __init__(self):
+        self.prev_close: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return tr
+
+
+class ATR:
+    """Wilder average true range"""
+
+    def __init__(self, period: int = 14):
+        self.tr = TrueRange()
+        self.ema = EMA(alpha=1 / period)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self.ema.update(self.tr.update(high, low, close))
+        return self.value
+
+
+class RSI:
+    """Wilder relative strength index"""
+
+    def __init__(self, period: int = 14):
+        self.avg_gain = EMA(alpha=1 / period)
+        self.avg_loss = EMA(alpha=1 / period)
+        self.prev: Optional[float] = None
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        if self.prev is None:
+            self.prev = close
+            return self.value
+
+        delta = close - self.prev
+        self.prev = close
+        gain = self.avg_gain.update(delta if delta > 0 else 0.0)
+        loss = self.avg_loss.update(-delta if delta < 0 else 0.0)
+        self.value = 100 - 100 / (1 + _div(gain, loss))
+        return self.value
+
+
+class ADX:
+    """Wilder average directional index with +DI/-DI"""
+
+    def __init__(self, period: int = 14):
+        self.atr = ATR(period)
+        self.plus = EMA(alpha=1 / period)
+        self.minus = EMA(alpha=1 / period)
+        self.dx = EMA(alpha=1 / period)
+        self.prev_high: Optional[float] = None
+        self.prev_low: Optional[float] = None
+        self.value = NAN
+        self.plus_di = NAN
+        self.minus_di = NAN
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float, float]:
+        plus_dm = minus_dm = 0.0
+        if self.prev_high is not None:
+            up = high - self.prev_high
+            down = -(low - self.prev_low)
+            if up > down and up > 0:
+                plus_dm = up
+            if down > up and down > 0:
+                minus_dm = down
+        self.prev_high = high
+        self.prev_low = low
+
+        atr_ = self.atr.update(high, low, close)
+        self.plus_di = _div(100 * self.plus.update(plus_dm), atr_)
+        self.minus_di = _div(100 * self.minus.update(minus_dm), atr_)
+        dx = _div(100 * abs(self.plus_di - self.minus_di), self.plus_di + self.minus_di)
+        self.value = self.dx.update(dx)
+        return self.value, self.plus_di, self.minus_di
+
+
+class RollingStats:
+    """
+    Sliding-window mean and sample standard deviation (Welford add/remove)
+
+    Matches pandas rolling mean/std to floating-point rounding (not
+    bit-for-bit: pandas uses compensated sums). The accumulators are
+    rebuilt from the window every `resync` updates to stop drift.
+    Any NaN in the window makes the result NaN, as in pandas.
+    """
+
+    def __init__(self, period: int, resync: int = 1000):
+        self.period = period
+        self.resync = resync
+        self.window: Deque[float] = deque()
+        self._nans = 0
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def _add(self, x: float):
+        self._n += 1
+        delta = x - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (x - self._mean)
+
+    def _remove(self, x: float):
+        if self._n == 1:
+            self._n, self._mean, self._m2 = 0, 0.0, 0.0
+            return
+        self._n -= 1
+        delta = x - self._mean
+        self._mean -= delta / self._n
+        self._m2 -= delta * (x - self._mean)
+
+    def _rebuild(self):
+        values = [x for x in self.window if x == x]
+        self._n = len(values)
+        self._mean = math.fsum(values) / self._n if values else 0.0
+        self._m2 = math.fsum((x - self._mean) ** 2 for x in values)
+
+    def update(self, x: float):
+        self.window.append(x)
+        if x == x:
+            self._add(x)
+        else:
+            self._nans += 1
+
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            if old == old:
+                self._remove(old)
+            else:
+                self._nans -= 1
+
+        self._updates += 1
+        if self._updates % self.resync == 0:
+            self._rebuild()
+
+    @property
+    def ready(self) -> bool:
+        return len(self.window) == self.period and self._nans == 0
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.ready else NAN
+
+    @property
+    def std(self) -> float:
+        if not self.ready or self._n < 2:
+            return NAN
+        return math.sqrt(max(self._m2, 0.0) / (self._n - 1))
+
+
+class Bollinger:
+    """Bollinger bands on a rolling mean and sample standard deviation"""
+
+    def __init__(self, period: int = 20, num_std: float = 2):
+        self.stats = RollingStats(period)
+        self.num_std = num_std
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        self.stats.update(close)
+        middle, std = self.stats.mean, self.stats.std
+        return middle + self.num_std * std, middle, middle - self.num_std * std
+
+
+class MACD:
+    """MACD line, signal line and histogram"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(span=fast)
+        self.slow = EMA(span=slow)
+        self.signal = EMA(span=signal)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        line = self.fast.update(close) - self.slow.update(close)
+        signal_line = self.signal.update(line)
+        return line, signal_line, line - signal_line
+
+
+class RollingExtreme:
+    """Sliding-window max (or min) with a monotonic deque, amortized O(1)"""
+
+    def __init__(self, period: int, maximum: bool = True):
+        self.period = period
+        self.maximum = maximum
+        self._deque: Deque[Tuple[int, float]] = deque()
+        self._index = -1
+
+    def update(self, x: float) -> float:
+        self._index += 1
+        dq = self._deque
+        if self.maximum:
+            while dq and dq[-1][1] <= x:
+                dq.pop()
+        else:
+            while dq and dq[-1][1] >= x:
+                dq.pop()
+        dq.append((self._index, x))
+        if dq[0][0] <= self._index - self.period:
+            dq.popleft()
+        return dq[0][1] if self._index >= self.period - 1 else NAN
+
+
+class Stochastic:
+    """Stochastic oscillator %K/%D"""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self.highest = RollingExtreme(k_period, maximum=True)
+        self.lowest = RollingExtreme(k_period, maximum=False)
+        self.d = RollingStats(d_period)
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float]:
+        highest = self.highest.update(high)
+        lowest = self.lowest.update(low)
+        k = _div(100 * (close - lowest), highest - lowest)
+        self.d.update(k)
+        return k, self.d.mean
+
+
+class IndicatorSet:
+    """Every indicator the strategies use, advanced one candle at a time"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = indicator_config(config)
+        c = self.config
+        self.rsi = RSI(c['rsi_period'])
+        self.ema_fast = EMA(span=c['ema_fast'])
+        self.ema_slow = EMA(span=c['ema_slow'])
+        self.atr = ATR(c['atr_period'])
+        self.adx = ADX(c['adx_period'])
+        self.bollinger = Bollinger(c['bb_period'], c['bb_std'])
+        self.macd = MACD(c['macd_fast'], c['macd_slow'], c['macd_signal'])
+        self.stochastic = Stochastic(c['stoch_k'], c['stoch_d'])
+        self.bars = 0
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        self.bars += 1
+        adx_, plus_di, minus_di = self.adx.update(high, low, close)
+        bb_upper, bb_middle, bb_lower = self.bollinger.update(close)
+        macd_, macd_signal, macd_hist = self.macd.update(close)
+        stoch_k, stoch_d = self.stochastic.update(high, low, close)
+        return {
+            'rsi': self.rsi.update(close),
+            'ema_fast': self.ema_fast.update(close),
+            'ema_slow': self.ema_slow.update(close),
+            'atr': self.atr.update(high, low, close),
+            'adx': adx_,
+            'plus_di': plus_di,
+            'minus_di': minus_di,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'macd': macd_,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d
+        }
+
+
+class VolatilityBaseline:
+    """True range, ATR and the long-horizon ATR average, advanced one candle at a time"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = indicator_config(config)
+        self.tr = TrueRange()
+        self.atr = EMA(alpha=1 / self.config['atr_period'])
+        self.baseline = RollingStats(self.config['atr_baseline'])
+        self.bars = 0
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        self.bars += 1
+        tr = self.tr.update(high, low, close)
+        atr_ = self.atr.update(tr)
+        self.baseline.update(atr_)
+        return {'true_range': tr, 'atr': atr_, 'atr_baseline': self.baseline.mean}
+
+
+def batch_indicators(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
+    """All IndicatorSet outputs recomputed over a whole candle DataFrame"""
+    c = indicator_config(config)
+    high, low, close = df['high'], df['low'], df['close']
+    adx_ = adx(high, low, close, c['adx_period'])
+    frame = pd.DataFrame({
+        'rsi': rsi(close, c['rsi_period']),
+        'ema_fast': ema(close, c['ema_fast']),
+        'ema_slow': ema(close, c['ema_slow']),
+        'atr': atr(high, low, close, c['atr_period']),
+        'adx': adx_['adx'],
+        'plus_di': adx_['plus_di'],
+        'minus_di': adx_['minus_di']
+    })
+    return pd.concat([
+        frame,
+        bollinger(close, c['bb_period'], c['bb_std']),
+        macd(close, c['macd_fast'], c['macd_slow'], c['macd_signal']),
+        stochastic(high, low, close, c['stoch_k'], c['stoch_d'])
+    ], axis=1)
+
+
+class IndicatorEngine:
+    """
+    Incremental indicators for one (instrument, granularity)
+
+    Completed candles are folded into the running state once; the last
+    row of each DataFrame is treated as the forming candle and evaluated
+    on a throwaway copy, so it is re-evaluated until a newer candle
+    arrives. Values equal the batch formulas run over every candle the
+    engine has consumed since its last reset (a longer warm-up than the
+    200-candle window the strategies see).
+    """
+
+    def __init__(self, config: Optional[Dict] = None, factory: Callable = IndicatorSet):
+        """
+        Initialize the engine
+
+        Args:
+            config: Indicator periods (defaults from DEFAULT_INDICATOR_CONFIG)
+            factory: Indicator set to advance, called with config
+                (IndicatorSet or VolatilityBaseline)
+        """
+        self.config = config
+        self.factory = factory
+        self._lock = threading.Lock()
+        self.resets = 0
+        self.reset()
+
+    def reset(self):
+        self._set = self.factory(self.config)
+        self._last_time: Optional[str] = None
+        self._committed: Dict[str, float] = {}
+
+    @property
+    def bars(self) -> int:
+        return self._set.bars
+
+    def update(self, df: pd.DataFrame) -> Dict:
+        """
+        Advance over the new candles in df and return current values
+
+        Returns:
+            Indicator values for the last row, with the values for the
+            row before it under 'prev'
+        """
+        if df.empty:
+            return {}
+
+        with self._lock:
+            times = df['time'].values
+            high = df['high'].values
+            low = df['low'].values
+            close = df['close'].values
+            last = len(df) - 1
+
+            start = 0
+            if self._last_time is not None:
+                start = int(np.searchsorted(times[:last], self._last_time, side='right'))
+                # History no longer lines up (gap or rewind): rebuild from this window
+                if start == 0 or times[start - 1] != self._last_time:
+                    logger.debug(f"Indicator history discontinuity at {times[0]}, rebuilding")
+                    self.reset()
+                    self.resets += 1
+                    start = 0
+
+            for i in range(start, last):
+                self._committed = self._set.update(float(high[i]), float(low[i]), float(close[i]))
+            if last > start:
+                self._last_time = times[last - 1]
+
+            forming = _clone(self._set)
+            values = IndicatorValues(forming.update(float(high[last]), float(low[last]), float(close[last])))
+            values['prev'] = dict(self._committed)
+            values['bars'] = forming.bars
+            return values
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Support and resistance detection
+Swing pivots from rolling extrema, clustered into price levels
+"""
+
+import bisect
+import logging
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import indicator_kernels as kernels
+from streaming_indicators import RollingExtreme
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SR_CONFIG = {
+    'lookback_period': 50,   # Candles whose pivots contribute levels
+    'sr_threshold': 0.002,   # Relative gap that separates two levels
+    'pivot_window': 3        # Candles either side a swing high/low must dominate
+}
+
+
+class Level(NamedTuple):
+    """A support/resistance level: the mean of clustered pivot prices"""
+    price: float
+    touches: int
+    low: float
+    high: float
+
+
+def cluster_levels(prices: List[float], threshold: float) -> List[Level]:
+    """
+    Cluster sorted pivot prices into levels
+
+    Neighbouring prices stay in one level while the relative gap to the
+    previous price is at most threshold.
+    """
+    levels = []
+    start = 0
+    for i in range(1, len(prices) + 1):
+        if i == len(prices) or (prices[i] - prices[i - 1]) / prices[i - 1] > threshold:
+            members = prices[start:i]
+            levels.append(Level(sum(members) / len(members), len(members), members[0], members[-1]))
+            start = i
+    return levels
+
+
+def nearest_levels(levels: List[Level], price: float) -> Tuple[Optional[Level], Optional[Level]]:
+    """(support, resistance): the closest level at or below and strictly above price"""
+    support = resistance = None
+    for level in levels:
+        if level.price <= price:
+            support = level
+        elif resistance is None:
+            resistance = level
+    return support, resistance
+
+
+class SupportResistance:
+    """
+    Incremental support/resistance for one instrument
+
+    A candle is a swing pivot when its high (low) is the highest (lowest)
+    of the pivot_window candles either side, so pivots are confirmed
+    pivot_window candles late. Pivots from the last lookback_period
+    candles are kept in price order and clustered on demand.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Initialize the engine
+
+        Args:
+            config: lookback_period / sr_threshold / pivot_window overrides
+        """
+        c = {**DEFAULT_SR_CONFIG, **(config or {})}
+        self.lookback = c['lookback_period']
+        self.threshold = c['sr_threshold']
+        self.window = c['pivot_window']
+
+        span = 2 * self.window + 1
+        self._highest = RollingExtreme(span, maximum=True)
+        self._lowest = RollingExtreme(span, maximum=False)
+        self._highs: Deque[float] = deque(maxlen=span)
+        self._lows: Deque[float] = deque(maxlen=span)
+        self._pivots: Deque[Tuple[int, float]] = deque()  # (candle index, price) in time order
+        self._sorted: List[float] = []
+        self._levels: Optional[List[Level]] = None
+        self.index = -1
+
+    def update(self, high: float, low: float) -> bool:
+        """
+        Add a completed candle
+
+        Returns:
+            True if the set of levels changed
+        """
+        self.index += 1
+        highest = self._highest.update(high)
+        lowest = self._lowest.update(low)
+        self._highs.append(high)
+        self._lows.append(low)
+        changed = False
+
+        center = self.index - self.window
+        if center >= 0 and len(self._highs) == self._highs.maxlen:
+            if self._highs[self.window] == highest:
+                self._add_pivot(center, self._highs[self.window])
+                changed = True
+            if self._lows[self.window] == lowest:
+                self._add_pivot(center, self._lows[self.window])
+                changed = True
+
+        while self._pivots and self._pivots[0][0] <= self.index - self.lookback:
+            _, price = self._pivots.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, price)]
+            changed = True
+
+        if changed:
+            self._levels = None
+        return changed
+
+    def _add_pivot(self, index: int, price: float):
+        self._pivots.append((index, price))
+        bisect.insort(self._sorted, price)
+
+    def levels(self) -> List[Level]:
+        """Current levels, lowest first"""
+        if self._levels is None:
+            self._levels = cluster_levels(self._sorted, self.threshold)
+        return self._levels
+
+    def nearest(self, price: float) -> Tuple[Optional[Level], Optional[Level]]:
+        return nearest_levels(self.levels(), price)
+
+
+def find_pivots(high: np.ndarray, low: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Swing pivots over a whole history
+
+    Returns:
+        (candle index, price) arrays ordered by index, highs before lows
+        on the same candle
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    n = len(high)
+    span = 2 * window + 1
+    if n < span:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    # The rolling extreme ending at c + window covers c's whole neighbourhood
+    centers = np.arange(window, n - window)
+    is_high = high[centers] == kernels.rolling_max(high, span)[centers + window]
+    is_low = low[centers] == kernels.rolling_min(low, span)[centers + window]
+
+    index = np.concatenate([centers[is_high], centers[is_low]])
+    price = np.concatenate([high[centers][is_high], low[centers][is_low]])
+    order = np.argsort(index, kind='stable')
+    return index[order], price[order]
+
+
+def scan_levels(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                config: Optional[Dict] = None, chunk: int = 20000) -> Dict[str, np.ndarray]:
+    """
+    Nearest support and resistance for every candle of a history
+
+    Vectorized equivalent of feeding SupportResistance candle by candle
+    and calling nearest(close) after each one (level prices agree to
+    floating-point rounding). Candles without a level below/above get NaN
+    and zero touches.
+    """
+    c = {**DEFAULT_SR_CONFIG, **(config or {})}
+    lookback, threshold, window = c['lookback_period'], c['sr_threshold'], c['pivot_window']
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    result = {
+        'support': np.full(n, np.nan),
+        'resistance': np.full(n, np.nan),
+        'support_touches': np.zeros(n, dtype=np.int64),
+        'resistance_touches': np.zeros(n, dtype=np.int64)
+    }
+    pivot_index, pivot_price = find_pivots(high, low, window)
+    if len(pivot_index) == 0:
+        return result
+
+    # Pivots visible at candle t: confirmed (index <= t - window) and recent (index > t - lookback)
+    t = np.arange(n)
+    hi = np.searchsorted(pivot_index, t - window, side='right')
+    lo = np.searchsorted(pivot_index, t - lookback, side='right')
+    counts = hi - lo
+    width = int(counts.max())
+    if width == 0:
+        return result
+    columns = np.arange(width)
+
+    for start in range(0, n, chunk):
+        rows = slice(start, min(start + chunk, n))
+        valid = columns < counts[rows, None]
+        prices = np.where(valid, pivot_price[np.minimum(lo[rows, None] + columns, len(pivot_price) - 1)], np.nan)
+        prices.sort(axis=1)  # NaN sorts last
+
+        with np.errstate(invalid='ignore'):
+            breaks = np.ones(prices.shape, dtype=bool)
+            breaks[:, 1:] = (prices[:, 1:] - prices[:, :-1]) / prices[:, :-1] > threshold
+            ends = valid.copy()
+            ends[:, :-1] &= breaks[:, 1:] | ~valid[:, 1:]
+
+        # Segment sums from prefix sums; each level is read at its last member
+        starts = np.maximum.accumulate(np.where(breaks & valid, columns, 0), axis=1)
+        prefix = np.cumsum(np.where(valid, prices, 0.0), axis=1)
+        before = np.where(starts > 0, np.take_along_axis(prefix, np.maximum(starts - 1, 0), axis=1), 0.0)
+        touches = columns - starts + 1
+        means = np.where(ends, (prefix - before) / touches, np.nan)
+
+        price = close[rows, None]
+        with np.errstate(invalid='ignore'):
+            below = np.where(means <= price, means, -np.inf)
+            above = np.where(means > price, means, np.inf)
+        s_col = below.argmax(axis=1)
+        r_col = above.argmin(axis=1)
+        row_ids = np.arange(below.shape[0])
+        has_support = np.isfinite(below[row_ids, s_col])
+        has_resistance = np.isfinite(above[row_ids, r_col])
+
+        result['support'][rows] = np.where(has_support, below[row_ids, s_col], np.nan)
+        result['resistance'][rows] = np.where(has_resistance, above[row_ids, r_col], np.nan)
+        result['support_touches'][rows] = np.where(has_support, touches[row_ids, s_col], 0)
+        result['resistance_touches'][rows] = np.where(has_resistance, touches[row_ids, r_col], 0)
+
+    return result
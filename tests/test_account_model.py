@@ -0,0 +1,69 @@
+"""
+Account model tests
+Run in-process against the simulated OANDA account
+"""
+
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from account_model import AccountModel
+from local_oanda import CandleMarket, SimulatorSession, V20Simulator
+from oanda_transport import OandaTransport
+
+ACCOUNT_ID = '101-001-0000000-001'
+ORDERS = f'/v3/accounts/{ACCOUNT_ID}/orders'
+
+
+class ExpiredChangesSession(SimulatorSession):
+    """Rejects /changes (as for a transaction ID too old) and optionally /transactions"""
+
+    def __init__(self, simulator: V20Simulator, transactions: bool = True):
+        super().__init__(simulator)
+        self.rejected = ['/changes'] + ([] if transactions else ['/transactions/sinceid'])
+
+    def request(self, method, url, params=None, **kwargs):
+        if any(url.endswith(path) for path in self.rejected):
+            return super().request(method, url.rsplit('/', 1)[0] + '/unsupported', params, **kwargs)
+        return super().request(method, url, params, **kwargs)
+
+
+def make_model(transactions: bool = True):
+    market = CandleMarket.synthetic(['EUR_USD'], time.time_ns(), days=2, base_granularity='M5')
+    simulator = V20Simulator(market, ACCOUNT_ID)
+    transport = OandaTransport({})
+    transport.session = ExpiredChangesSession(simulator, transactions)
+    fills = []
+    model = AccountModel(transport, 'http://local', ACCOUNT_ID, on_fill=fills.append)
+    assert model.refresh()
+
+    # Open and close a trade while the model is not looking
+    for units in ('1000', '-1000'):
+        status, _ = simulator.handle('POST', ORDERS, {}, {'order': {'type': 'MARKET', 'instrument': 'EUR_USD',
+                                                                    'units': units}})
+        assert status == 201
+    return simulator, model, fills
+
+
+def test_full_reload_replays_missed_fills():
+    simulator, model, fills = make_model()
+    model.mark_stale()
+    assert model.refresh()
+
+    assert model.full_loads == 2
+    assert model.last_transaction_id == simulator.last_transaction_id
+    assert len(fills) == 1 and fills[0]['tradesClosed']
+
+
+def test_full_reload_warns_about_lost_fills(caplog):
+    simulator, model, fills = make_model(transactions=False)
+    since = model.last_transaction_id
+    model.mark_stale()
+    with caplog.at_level(logging.WARNING, logger='account_model'):
+        assert model.refresh()
+
+    assert fills == []
+    assert f"transactions {int(since) + 1}-{simulator.last_transaction_id}" in caplog.text
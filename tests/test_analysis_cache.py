@@ -0,0 +1,62 @@
+"""
+Analysis memoization tests
+Repeated analysis of unchanged candles reuses the graph run and the signal
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_codec import ns_to_rfc3339
+from forex_bot import ForexTradingBot
+from trading_algorithms import Signal, TradingSignal
+
+
+class CountingAlgorithm:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, df, current_price):
+        self.calls += 1
+        return TradingSignal(Signal.HOLD, 0.0, current_price, current_price, current_price, 'count', {})
+
+
+def make_candles(count: int) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    times = ns_to_rfc3339(np.datetime64('2024-01-01', 'ns').astype(np.int64)
+                          + np.arange(count, dtype=np.int64) * 300_000_000_000)
+    return pd.DataFrame({'time': times.astype(object), 'open': close, 'high': close + 0.0002,
+                         'low': close - 0.0002, 'close': close, 'volume': np.ones(count, dtype=int)})
+
+
+def test_repeated_analysis_is_memoized(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = ForexTradingBot('101-001-0000000-001', 'local-token', base_url='http://127.0.0.1:9')
+    bot.algorithm = algorithm = CountingAlgorithm()
+    candles = make_candles(200)
+
+    def analyze(df, price=1.1):
+        bot._attach_indicators('EUR_USD', df)
+        return df.attrs['indicator_graph'], bot._analyze(df, price)
+
+    run, signal = analyze(candles.copy())
+    run['rsi']
+    again_run, again_signal = analyze(candles.copy())
+    assert again_run is run and again_signal is signal
+    assert algorithm.calls == 1
+    assert again_run.graph.resolve('rsi') in again_run.values
+
+    # A new price, a shorter window or a new tick are analyzed afresh
+    analyze(candles.copy(), price=1.2)
+    short_run, _ = analyze(candles.tail(50).reset_index(drop=True))
+    assert short_run is not run
+    ticked = candles.copy()
+    ticked.loc[ticked.index[-1], 'close'] += 0.0001
+    ticked_run, _ = analyze(ticked)
+    assert ticked_run is not run
+    assert algorithm.calls == 4
@@ -0,0 +1,96 @@
+"""
+Batched analysis tests
+Batch signals must match each algorithm's per-instrument rules
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_analysis import STRATEGY_VOTES, BatchAnalyzer
+from backtest.strategies import strategy_signals
+from candle_codec import ns_to_rfc3339
+from forex_bot import ForexTradingBot
+from trading_algorithms import Signal
+
+SIDES = {Signal.BUY: 1, Signal.STRONG_BUY: 1, Signal.SELL: -1, Signal.STRONG_SELL: -1}
+
+
+def make_candles(count: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Alternate calm and trending instruments so every vote gets exercised
+    drift = 0.0003 * rng.choice([-1, 0, 1])
+    close = 1.1 + np.cumsum(rng.normal(drift, 0.0004, count))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    times = ns_to_rfc3339(np.datetime64('2024-01-01', 'ns').astype(np.int64)
+                          + np.arange(count, dtype=np.int64) * 300_000_000_000)
+    return pd.DataFrame({'time': times.astype(object), 'open': open_,
+                         'high': np.maximum(open_, close) + spread,
+                         'low': np.minimum(open_, close) - spread, 'close': close})
+
+
+@pytest.mark.parametrize('algorithm', sorted(STRATEGY_VOTES))
+def test_batch_matches_per_instrument_rules(algorithm):
+    frames = {f"PAIR_{i:02d}": make_candles(200, seed=i) for i in range(60)}
+    signals = BatchAnalyzer(algorithm=algorithm).analyze(frames)
+
+    assert set(signals) == set(frames)
+    traded = 0
+    for name, df in frames.items():
+        expected = strategy_signals(algorithm, df)
+        assert SIDES.get(signals[name].signal, 0) == expected.direction[-1], name
+        assert signals[name].confidence == pytest.approx(expected.confidence[-1]), name
+        assert signals[name].reason.startswith(f"Batch {algorithm}:")
+        traded += expected.direction[-1] != 0
+    assert traded > 0
+
+
+def test_batch_skipped_for_algorithms_without_vote_rules(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = ForexTradingBot('101-001-0000000-001', 'local-token', base_url='http://127.0.0.1:9')
+    bot.execution_config['batch_analysis'] = True
+    bot.execution_config['concurrent_analysis'] = False
+    bot.algorithm_name = 'custom'
+
+    def fail(instruments):
+        raise AssertionError("analyze_batch used without vote rules")
+
+    monkeypatch.setattr(bot, 'analyze_batch', fail)
+    monkeypatch.setattr(bot, 'generate_signal_advanced', lambda instrument, signal=None: None)
+    assert list(bot.generate_signals(['EUR_USD', 'GBP_USD'])) == [('EUR_USD', None), ('GBP_USD', None)]
+
+    with pytest.raises(ValueError):
+        BatchAnalyzer().analyze({'EUR_USD': make_candles(200, seed=0)}, algorithm='custom')
+
+
+def test_batch_path_fetches_each_instrument_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = ForexTradingBot('101-001-0000000-001', 'local-token', base_url='http://127.0.0.1:9')
+    bot.execution_config['batch_analysis'] = True
+    bot.execution_config['concurrent_analysis'] = False
+    instruments = ['EUR_USD', 'GBP_USD', 'USD_JPY']
+    frames = {name: make_candles(200, seed=i) for i, name in enumerate(instruments)}
+    fetched = []
+
+    def get_historical_prices(instrument, count=200):
+        fetched.append(instrument)
+        return frames[instrument]
+
+    def attach(instrument, df, granularity='M5'):
+        raise AssertionError("indicators attached for a precomputed signal")
+
+    monkeypatch.setattr(bot, 'get_historical_prices', get_historical_prices)
+    monkeypatch.setattr(bot, 'get_current_price', lambda instrument: float(frames[instrument]['close'].iat[-1]))
+    monkeypatch.setattr(bot, '_attach_indicators', attach)
+    monkeypatch.setattr(type(bot.snapshot), 'account', property(lambda self: {'account': {'balance': '10000'}}))
+    monkeypatch.setattr(type(bot.snapshot), 'positions', property(lambda self: []))
+
+    results = dict(bot.generate_signals(instruments))
+    assert fetched == instruments
+    assert set(results) == set(instruments)
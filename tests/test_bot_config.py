@@ -0,0 +1,41 @@
+"""
+Bot configuration tests
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forex_bot import ForexTradingBot
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config_template.json')
+
+
+def load_template() -> dict:
+    with open(TEMPLATE) as f:
+        return json.load(f)
+
+
+def test_network_section_reaches_the_transport(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = load_template()
+    config['network'].update(read_timeout=42.0, rate_limit=0, pool_maxsize=3)
+    bot = ForexTradingBot.from_config(config, base_url='http://127.0.0.1:9')
+
+    assert bot.account_id == 'YOUR_ACCOUNT_ID'
+    assert bot.transport.config['read_timeout'] == 42.0
+    assert bot.transport.config['rate_limit'] == 0
+    assert bot.transport.config['pool_maxsize'] == 3
+
+
+def test_streaming_section_reaches_the_stream_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = load_template()
+    config['streaming'].update(enabled=False, heartbeat_timeout=7.5)
+    bot = ForexTradingBot.from_config(config, base_url='http://127.0.0.1:9')
+
+    assert bot.stream_config['enabled'] is False
+    assert bot.stream_config['heartbeat_timeout'] == 7.5
+    assert bot.stream_config['transaction_stream'] is True
@@ -0,0 +1,45 @@
+"""
+Candle buffer tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_buffer import CandleBuffer
+
+
+def make_frame(start: int, count: int) -> pd.DataFrame:
+    index = np.arange(start, start + count)
+    close = 1.1 + index * 1e-4
+    return pd.DataFrame({'time': [f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z" for i in index],
+                         'open': close, 'high': close, 'low': close, 'close': close,
+                         'volume': index})
+
+
+def test_append_longer_than_buffer_keeps_max_size():
+    buffer = CandleBuffer(max_size=10)
+    buffer.replace('EUR_USD', 'M5', make_frame(0, 5))
+    buffer.append('EUR_USD', 'M5', make_frame(3, 25))
+
+    window = buffer.window('EUR_USD', 'M5', 100)
+    assert buffer.size('EUR_USD', 'M5') == 10
+    assert list(window['volume']) == list(range(18, 28))
+    assert list(window.index) == list(range(10))
+
+
+def test_append_replaces_overlapping_candles():
+    buffer = CandleBuffer(max_size=10)
+    buffer.replace('EUR_USD', 'M5', make_frame(0, 8))
+    update = make_frame(7, 4)
+    update['close'] += 1
+    buffer.append('EUR_USD', 'M5', update)
+
+    window = buffer.window('EUR_USD', 'M5', 100)
+    assert list(window['volume']) == list(range(1, 11))
+    assert (window['close'].values[-4:] > 2).all()
+    assert (window['close'].values[:-4] < 2).all()
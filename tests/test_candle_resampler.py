@@ -0,0 +1,69 @@
+"""
+Candle resampler tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CANDLE_DTYPE, records_to_frame
+from forex_bot import ForexTradingBot
+
+M5_NS = 300 * 10**9
+
+
+def make_records(count: int) -> np.ndarray:
+    rng = np.random.default_rng(2)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    records = np.zeros(count, dtype=CANDLE_DTYPE)
+    records['time'] = np.datetime64('2024-01-01', 'ns').astype(np.int64) + np.arange(count) * M5_NS
+    records['open'] = np.r_[close[0], close[:-1]]
+    records['high'] = np.maximum(records['open'], close) + 0.0002
+    records['low'] = np.minimum(records['open'], close) - 0.0002
+    records['close'] = close
+    records['volume'] = 1
+    return records
+
+
+def make_bot(tmp_path, base: np.ndarray, window: dict) -> ForexTradingBot:
+    bot = ForexTradingBot('101-001-0000000-001', 'local-token', base_url='http://127.0.0.1:9')
+    bot.candle_store = None
+    bot.get_historical_prices = lambda instrument, count, granularity='M5': records_to_frame(
+        base[window['start']:window['end']])
+    bot._download_base_history = lambda instrument, granularity, count: base[:window['end'] - 1][-count:]
+    return bot
+
+
+def test_gap_longer_than_the_base_window_reseeds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = make_records(3000)
+    window = {'start': 800, 'end': 1001}
+    bot = make_bot(tmp_path, base, window)
+    assert bot._get_resampled_prices('EUR_USD', 20, 'H1') is not None
+
+    # The bot was down for longer than the 200-candle base window
+    window.update(start=2000, end=2201)
+    resampled = bot._get_resampled_prices('EUR_USD', 20, 'H1')
+
+    fresh = make_bot(tmp_path, base, window)._get_resampled_prices('EUR_USD', 20, 'H1')
+    pd.testing.assert_frame_equal(resampled, fresh)
+    hours = pd.to_datetime(resampled['time']).diff().dropna()
+    assert (hours == pd.Timedelta(hours=1)).all()
+
+
+def test_overlapping_windows_fold_in_incrementally(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = make_records(3000)
+    window = {'start': 800, 'end': 1001}
+    bot = make_bot(tmp_path, base, window)
+    bot._get_resampled_prices('EUR_USD', 20, 'H1')
+
+    downloads = []
+    bot._download_base_history = lambda *args: downloads.append(args)
+    window.update(start=900, end=1101)
+    assert bot._get_resampled_prices('EUR_USD', 20, 'H1') is not None
+    assert downloads == []
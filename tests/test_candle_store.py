@@ -0,0 +1,44 @@
+"""
+Candle store tests
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CANDLE_DTYPE, CandleStore
+from forex_bot import ForexTradingBot
+
+
+def test_store_directory_created_on_first_append(tmp_path):
+    root = tmp_path / 'candles'
+    store = CandleStore(str(root))
+    assert not root.exists()
+    assert store.count('EUR_USD', 'M5') == 0
+    assert store.last_time('EUR_USD', 'M5') is None
+    assert store.instruments() == []
+
+    records = np.zeros(3, dtype=CANDLE_DTYPE)
+    records['time'] = [1, 2, 3]
+    assert store.append('EUR_USD', 'M5', records) == 3
+    assert store.instruments() == [('EUR_USD', 'M5')]
+    assert store.last_time('EUR_USD', 'M5') == 3
+    # The header was renamed into place, leaving no temp file behind
+    assert os.listdir(root) == ['EUR_USD_M5.candles']
+
+
+def test_relative_root_is_anchored_to_the_package(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert CandleStore('data/candles').root == os.path.join(package_dir, 'data', 'candles')
+    assert CandleStore(str(tmp_path)).root == str(tmp_path)
+
+
+def test_bot_construction_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = ForexTradingBot('101-001-0000000-001', 'local-token', base_url='http://127.0.0.1:9')
+    assert bot.candle_store is not None
+    assert os.listdir(tmp_path) == []
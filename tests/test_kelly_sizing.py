@@ -0,0 +1,45 @@
+"""
+Kelly sizing tests
+Trade outcomes must be scored against each trade's own risk
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from account_model import closed_trade_outcome
+from forex_bot import ForexTradingBot
+from local_oanda import CandleMarket, SimulatorSession, V20Simulator
+
+ACCOUNT_ID = '101-001-0000000-001'
+
+
+def test_outcomes_divide_pnl_by_each_trades_risk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    market = CandleMarket.synthetic(['EUR_USD'], time.time_ns(), days=2, base_granularity='M5')
+    simulator = V20Simulator(market, ACCOUNT_ID)
+    bot = ForexTradingBot(ACCOUNT_ID, 'local-token', base_url='http://local')
+    bot.transport.session = SimulatorSession(simulator)
+    assert bot.account_model.refresh()
+
+    close = f'/v3/accounts/{ACCOUNT_ID}/positions/EUR_USD/close'
+    for units, stop_pips in ((1000, 20), (50000, 5)):
+        price = bot.get_current_price('EUR_USD')
+        assert bot.place_order('EUR_USD', units, stop_loss=price - stop_pips * 0.0001)
+        status, _ = simulator.handle('PUT', close, {}, {'longUnits': 'ALL'})
+        assert status == 200
+        bot.account_model.mark_stale()
+        assert bot.account_model.refresh()
+
+    trades = simulator.list_trades({'state': 'CLOSED'})[::-1]
+    expected = [closed_trade_outcome(t) for t in trades]
+    assert len(bot.trade_history) == 2
+    assert list(bot._kelly_outcomes) == pytest.approx(expected)
+    # EUR_USD PnL is already in USD: R is PnL over units x stop distance
+    for trade, outcome in zip(trades, expected):
+        risk = float(trade['initialUnits']) * (float(trade['price']) - float(trade['stopLossOrder']['price']))
+        assert float(trade['realizedPL']) / risk == pytest.approx(outcome, abs=0.01)
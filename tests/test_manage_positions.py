@@ -0,0 +1,62 @@
+"""
+Position management tests
+Run against the local OANDA stand-in
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forex_bot import ForexTradingBot
+from local_oanda import CandleMarket, LocalOandaServer, V20Simulator
+from trading_algorithms import Signal, TradingSignal
+
+ACCOUNT_ID = '101-001-0000000-001'
+
+
+class ReversalAlgorithm:
+    """Always signals a sell"""
+
+    def analyze(self, df, current_price):
+        return TradingSignal(Signal.SELL, 0.9, current_price, current_price * 1.01,
+                             current_price * 0.98, 'reversal', {})
+
+
+def test_reversal_recorded_once_with_transaction_stream(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    market = CandleMarket.synthetic(['EUR_USD'], time.time_ns(), days=2, base_granularity='M5')
+    simulator = V20Simulator(market, ACCOUNT_ID)
+
+    with LocalOandaServer(simulator) as server:
+        bot = ForexTradingBot(ACCOUNT_ID, 'local-token', base_url=server.base_url)
+        bot.instruments = ['EUR_USD']
+        bot.account_model = None
+        bot.candle_store = None
+        bot.algorithm = ReversalAlgorithm()
+
+        status, _ = simulator.handle('POST', f'/v3/accounts/{ACCOUNT_ID}/orders', {},
+                                     {'order': {'type': 'MARKET', 'instrument': 'EUR_USD', 'units': '1000'}})
+        assert status == 201
+
+        bot.start_transaction_stream()
+        try:
+            # Wait for the stream to connect so it sees the closing fill
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and not bot.transaction_stream.connected:
+                time.sleep(0.05)
+
+            bot.manage_positions()
+
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and not bot.trade_history:
+                time.sleep(0.05)
+            # Leave time for a duplicate to show up
+            time.sleep(0.5)
+        finally:
+            bot.stop_transaction_stream()
+            bot.transport.close()
+
+    assert len(bot.trade_history) == 1
+    assert simulator.handle('GET', f'/v3/accounts/{ACCOUNT_ID}/openPositions', {}, None)[1]['positions'] == []
@@ -0,0 +1,73 @@
+"""
+Streaming indicator parity and configuration tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_analysis import compute_indicators
+from indicator_graph import hybrid_graph
+from streaming_indicators import IndicatorEngine, IndicatorSet, batch_indicators, indicator_config
+
+# Welford sliding windows agree with pandas' compensated sums only to rounding
+ROUNDED_COLUMNS = {'bb_upper', 'bb_middle', 'bb_lower', 'stoch_d'}
+
+
+def make_candles(count: int = 120) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    return pd.DataFrame({'time': [f"t{i:04d}" for i in range(count)], 'open': close,
+                         'high': close + spread, 'low': close - spread, 'close': close})
+
+
+def make_flat_candles(count: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    # Flat candles exercise the zero-range paths
+    spread[rng.random(count) < 0.02] = 0.0
+    return pd.DataFrame({'time': [f"t{i:05d}" for i in range(count)], 'open': open_,
+                         'high': np.maximum(open_, close) + spread,
+                         'low': np.minimum(open_, close) - spread, 'close': close})
+
+
+def test_streaming_matches_batch_formulas():
+    df = make_flat_candles(3000)
+    expected = batch_indicators(df)
+    indicators = IndicatorSet()
+    actual = pd.DataFrame([indicators.update(h, l, c) for h, l, c in
+                           zip(df['high'].tolist(), df['low'].tolist(), df['close'].tolist())])
+
+    for column in expected.columns:
+        a, e = actual[column].values, expected[column].values
+        if column in ROUNDED_COLUMNS:
+            np.testing.assert_allclose(a, e, rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=column)
+        else:
+            # EMA, RSI, ATR, ADX and the rest are bit-identical
+            np.testing.assert_array_equal(a, e, err_msg=column)
+
+
+def test_stoch_period_sets_stoch_k():
+    assert indicator_config({'stoch_period': 5})['stoch_k'] == 5
+    assert indicator_config()['stoch_k'] == 14
+
+    df = make_candles()
+    expected = batch_indicators(df, {'stoch_k': 5})
+    engine = IndicatorEngine({'stoch_period': 5})
+    values = engine.update(df)
+    assert np.isclose(values['stoch_k'], expected['stoch_k'].iloc[-1])
+    assert np.isclose(values['stoch_d'], expected['stoch_d'].iloc[-1])
+
+    graph = hybrid_graph({'stoch_period': 5}).run_frame(df).compute(['stoch_k'])['stoch_k']
+    np.testing.assert_allclose(graph, expected['stoch_k'].values, equal_nan=True)
+
+    arrays = [df[column].values[None, :] for column in ('high', 'low', 'close')]
+    batched = compute_indicators(*arrays, {'stoch_period': 5})['stoch_k'][0]
+    np.testing.assert_allclose(batched, expected['stoch_k'].values, equal_nan=True)
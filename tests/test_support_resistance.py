@@ -0,0 +1,56 @@
+"""
+Support/resistance parity tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from support_resistance import DEFAULT_SR_CONFIG, SupportResistance, cluster_levels, find_pivots, scan_levels
+
+
+def make_series(count: int = 5000):
+    rng = np.random.default_rng(6)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    # Flat candles give tied highs and lows
+    spread[rng.random(count) < 0.05] = 0.0
+    return np.maximum(open_, close) + spread, np.minimum(open_, close) - spread, close
+
+
+CONFIGS = [DEFAULT_SR_CONFIG, {'lookback_period': 20, 'sr_threshold': 0.0005, 'pivot_window': 2}]
+
+
+@pytest.mark.parametrize('config', CONFIGS)
+def test_engine_pivots_match_find_pivots(config):
+    high, low, close = make_series()
+    # A lookback covering the whole history keeps every pivot
+    engine = SupportResistance({**config, 'lookback_period': len(close) + 1})
+    for h, l in zip(high, low):
+        engine.update(h, l)
+
+    index, price = find_pivots(high, low, engine.window)
+    assert list(engine._pivots) == list(zip(index.tolist(), price.tolist()))
+    assert engine.levels() == cluster_levels(sorted(price.tolist()), engine.threshold)
+
+
+@pytest.mark.parametrize('config', CONFIGS)
+def test_engine_levels_match_scan(config):
+    high, low, close = make_series()
+    engine = SupportResistance(config)
+    scan = scan_levels(high, low, close, config, chunk=1000)
+
+    for t in range(len(close)):
+        engine.update(high[t], low[t])
+        for level, key in zip(engine.nearest(close[t]), ('support', 'resistance')):
+            if level is None:
+                assert np.isnan(scan[key][t]), (t, key)
+                assert scan[f"{key}_touches"][t] == 0, (t, key)
+            else:
+                assert level.price == pytest.approx(scan[key][t], rel=1e-12, abs=0), (t, key)
+                assert level.touches == scan[f"{key}_touches"][t], (t, key)
@@ -0,0 +1,45 @@
+"""
+Volatility scaling tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volatility import VolatilityService
+
+
+class RecordingRiskManager:
+    def adjust_position_for_volatility(self, position_size, atr, baseline):
+        self.args = (atr, baseline)
+        return position_size * baseline / atr
+
+
+def make_candles(count: int) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    return pd.DataFrame({'time': [f"t{i:05d}" for i in range(count)], 'open': close,
+                         'high': close + spread, 'low': close - spread, 'close': close})
+
+
+def test_ratio_uses_the_services_own_atr():
+    df = make_candles(300)
+    service = VolatilityService()
+    risk_manager = RecordingRiskManager()
+
+    size = service.adjust_position(risk_manager, 1000.0, 'EUR_USD', df)
+    values = service.update('EUR_USD', df)
+    assert risk_manager.args == (values['atr'], values['atr_baseline'])
+    assert size == 1000.0 * values['atr_baseline'] / values['atr']
+
+
+def test_unchanged_without_baseline_history():
+    service = VolatilityService()
+    risk_manager = RecordingRiskManager()
+    assert service.adjust_position(risk_manager, 1000.0, 'EUR_USD', make_candles(20)) == 1000.0
+    assert not hasattr(risk_manager, 'args')
@@ -0,0 +1,49 @@
+"""
+Walk-forward stitching tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest.walk_forward import WalkForward
+from candle_codec import ns_to_rfc3339
+
+
+def make_candles(count: int) -> pd.DataFrame:
+    rng = np.random.default_rng(4)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0004, count))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0003, count))
+    times = ns_to_rfc3339(np.datetime64('2024-01-01', 'ns').astype(np.int64)
+                          + np.arange(count, dtype=np.int64) * 300_000_000_000)
+    return pd.DataFrame({'time': times.astype(object), 'open': open_,
+                         'high': np.maximum(open_, close) + spread,
+                         'low': np.minimum(open_, close) - spread, 'close': close})
+
+
+def test_out_of_sample_equity_matches_trades():
+    walk = WalkForward(make_candles(288 * 40), 'EUR_USD', config={'in_sample_days': 10, 'out_of_sample_days': 3, 'min_trades': 1})
+    combos = [{'rsi_period': 10}, {'rsi_period': 14, 'atr_stop_mult': 3.0, 'atr_target_mult': 6.0}]
+    result = walk.run(combos)
+    equity, trades = result.backtest.equity, result.backtest.trades
+    assert len(trades) > 0
+
+    # Every position opens and closes inside its own out-of-sample window
+    for j, w in enumerate(walk.windows()):
+        window = trades[trades['window'] == j]
+        start = pd.Timestamp(int(walk.times[w.out_start]), tz='UTC')
+        end = pd.Timestamp(int(walk.times[w.out_end - 1]), tz='UTC')
+        assert (window['entry_time'] >= start).all() and (window['exit_time'] <= end).all()
+        # The window's equity ends flat, at the balance after its trades
+        level = equity[:end].iloc[-1]
+        if len(window):
+            assert level == pytest.approx(window['balance'].iloc[-1])
+
+    assert equity.iloc[-1] == pytest.approx(walk.backtester.config['initial_balance'] + trades['pnl'].sum())
+    assert result.stats['trades'] == int(result.windows['oos_trades'].sum())